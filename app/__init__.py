@@ -1,10 +1,10 @@
+import os
 from flask import Flask, g
 from app.database.database import SessionLocal, engine, Base
 from sqlalchemy.exc import SQLAlchemyError
 from flask_wtf import CSRFProtect
 from flask_login import LoginManager
-from app.models import Traveler, Employee
-from app.database.database import SessionLocal
+from app.database import request_session
 
 csrf = CSRFProtect()
 login_manager = LoginManager()
@@ -17,14 +17,18 @@ def create_app():
     csrf.init_app(app)
     login_manager.login_view = "auth.login_page"
 
+    # Tożsamość użytkownika z pamięci podręcznej; baza tylko przy chybieniu
+    from app.cache.user_cache import user_cache, Principal
+    from app.repositories.principal_repository import PrincipalRepository
+    user_cache.init_app(app)
+
+    def load_principal(user_id):
+        row = PrincipalRepository(g.db).find(user_id)
+        return Principal(**row) if row else None
+
     @login_manager.user_loader
     def load_user(user_id):
-        db = SessionLocal()
-        user = db.query(Traveler).filter_by(pesel=user_id).first()
-        if user:
-            return user
-        user = db.query(Employee).filter_by(login=user_id).first()
-        return user
+        return user_cache.get(user_id, load_principal)
     
     login_manager.init_app(app)
     
@@ -35,21 +39,28 @@ def create_app():
     except SQLAlchemyError as e:
         print(f"Error creating tables: {e}")
 
+    # Indeks etapów w pamięci (drzewa przedziałów)
+    from app.cache.stage_index import stage_index
+    stage_index.init_app(app, SessionLocal.session_factory)
+
+    # Kolejka wysyłki alertów (wznawia niedokończone zadania)
+    from app.services.alert_dispatcher import alert_dispatcher
+    alert_dispatcher.init_app(app)
+
+    # Synchronizacja ostrzeżeń w tle (WARNING_SYNC_ENABLED=1; inaczej osobny worker)
+    from app.services.warning_sync import warning_sync
+    warning_sync.init_app(app)
+
     # Rejestracja blueprintów
     from app.views import all_blueprints
 
     for bp in all_blueprints:
         app.register_blueprint(bp)
 
+    # Odczyty z repliki; po własnym zapisie użytkownik przez chwilę czyta z bazy głównej
+    app.config.setdefault("REPLICA_STICKY_SECONDS", float(os.environ.get("REPLICA_STICKY_SECONDS", 10)))
 
-
-    # Tworzenie i zamykanie sesji bazy
-    @app.before_request
-    def create_session():
-        g.db = SessionLocal()
-
-    @app.teardown_request
-    def shutdown_session(exception=None):
-        SessionLocal.remove()
+    # Sesja bazy tworzona leniwie przy pierwszym g.db i zamykana w teardown
+    request_session.init_app(app)
 
     return app
@@ -0,0 +1,22 @@
+from .interval_tree import IntervalTree
+from .stage_index import StageIndex, StageEntry, stage_index
+from .user_cache import UserCache, Principal, user_cache
+from .versioned_cache import VersionedCache
+from .version_clock import VersionClock, version_clock
+from .reference_cache import ReferenceCache, reference_cache, REFERENCE_VERSION
+
+__all__ = [
+    'IntervalTree',
+    'StageIndex',
+    'StageEntry',
+    'stage_index',
+    'UserCache',
+    'Principal',
+    'user_cache',
+    'VersionedCache',
+    'VersionClock',
+    'version_clock',
+    'ReferenceCache',
+    'reference_cache',
+    'REFERENCE_VERSION',
+]
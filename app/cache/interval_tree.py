@@ -0,0 +1,81 @@
+"""
+Statyczne drzewo przedziałów (centered interval tree)
+"""
+from typing import Any, Iterable, List, Tuple
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, by_start, by_end, left, right):
+        self.center = center
+        self.by_start = by_start
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+
+class IntervalTree:
+    """
+    Drzewo budowane raz z listy (start, end, value), przedziały domknięte.
+    overlap(lo, hi) zwraca wartości przedziałów przecinających [lo, hi]
+    w czasie O(log n + k).
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, Any]]):
+        intervals = list(intervals)
+        self.size = len(intervals)
+        self.root = self._build(intervals)
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        points = sorted(p for start, end, _ in intervals for p in (start, end))
+        center = points[len(points) // 2]
+
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+
+        return _Node(
+            center,
+            sorted(here, key=lambda i: i[0]),
+            sorted(here, key=lambda i: i[1], reverse=True),
+            self._build(left),
+            self._build(right)
+        )
+
+    def overlap(self, lo, hi) -> List[Any]:
+        result = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if hi < node.center:
+                # Wszystkie przedziały węzła kończą się >= center > hi; wystarczy start <= hi
+                for start, end, value in node.by_start:
+                    if start > hi:
+                        break
+                    result.append(value)
+                stack.append(node.left)
+            elif lo > node.center:
+                for start, end, value in node.by_end:
+                    if end < lo:
+                        break
+                    result.append(value)
+                stack.append(node.right)
+            else:
+                # center w [lo, hi] - każdy przedział węzła zawiera center
+                result.extend(value for _, _, value in node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        return result
+
+    def __len__(self):
+        return self.size
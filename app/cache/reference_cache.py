@@ -0,0 +1,142 @@
+"""
+Dane referencyjne (kraje, miasta, lokalizacje) w pamięci procesu, unieważniane licznikiem
+"reference" w data_versions. Kraje i miasta - tabele małe i prawie niezmienne - są jedną
+migawką z indeksami po id i nazwie; lokalizacji może być dużo, więc trafiają do LRU
+pojedynczo, w miarę użycia. Obiekty są niemutowalne i niezależne od sesji SQLAlchemy.
+"""
+import os
+from typing import Dict, Hashable, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from app.cache.versioned_cache import VersionedCache
+from app.repositories.country_repository import CountryRepository
+from app.repositories.city_repository import CityRepository
+from app.repositories.location_repository import LocationRepository
+
+# Licznik w data_versions zwiększany przy każdej zmianie krajów, miast lub lokalizacji
+REFERENCE_VERSION = "reference"
+
+SNAPSHOT_KEY = "countries_and_cities"
+
+
+class CountryRef:
+    __slots__ = ("id", "name", "cities")
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+        self.cities: List["CityRef"] = []
+
+
+class CityRef:
+    __slots__ = ("id", "name", "country_id", "country")
+
+    def __init__(self, id: int, name: str, country_id: Optional[int], country: Optional[CountryRef]):
+        self.id = id
+        self.name = name
+        self.country_id = country_id
+        self.country = country
+
+
+class LocationRef:
+    __slots__ = ("id", "address", "city_id")
+
+    def __init__(self, id: int, address: str, city_id: Optional[int]):
+        self.id = id
+        self.address = address
+        self.city_id = city_id
+
+
+class ReferenceSnapshot:
+    """Wszystkie kraje i miasta (po id) z indeksami; dla powtórzonej nazwy wygrywa najniższe id"""
+
+    def __init__(self, countries: List[CountryRef], cities: List[CityRef]):
+        self.countries = countries
+        self.cities = cities
+        self.countries_by_id = {country.id: country for country in countries}
+        self.cities_by_id = {city.id: city for city in cities}
+        self.countries_by_name: Dict[str, CountryRef] = {}
+        self.cities_by_name: Dict[str, CityRef] = {}
+        for country in countries:
+            self.countries_by_name.setdefault(country.name, country)
+        for city in cities:
+            self.cities_by_name.setdefault(city.name, city)
+
+
+class ReferenceCache:
+
+    def __init__(self, ttl: float = 300, max_size: int = 4096):
+        self.cache = VersionedCache(REFERENCE_VERSION, ttl=ttl, max_size=max_size)
+
+    def snapshot(self, db: Session) -> ReferenceSnapshot:
+        return self.cache.get(db, SNAPSHOT_KEY, lambda: self._load_snapshot(db))
+
+    def countries(self, db: Session) -> List[CountryRef]:
+        return self.snapshot(db).countries
+
+    def cities(self, db: Session) -> List[CityRef]:
+        return self.snapshot(db).cities
+
+    def country(self, db: Session, country_id) -> Optional[CountryRef]:
+        country_id = _to_id(country_id)
+        return self.snapshot(db).countries_by_id.get(country_id) if country_id is not None else None
+
+    def country_by_name(self, db: Session, name: str) -> Optional[CountryRef]:
+        return self.snapshot(db).countries_by_name.get(name)
+
+    def city(self, db: Session, city_id) -> Optional[CityRef]:
+        city_id = _to_id(city_id)
+        return self.snapshot(db).cities_by_id.get(city_id) if city_id is not None else None
+
+    def city_by_name(self, db: Session, name: str) -> Optional[CityRef]:
+        return self.snapshot(db).cities_by_name.get(name)
+
+    def location(self, db: Session, location_id) -> Optional[LocationRef]:
+        location_id = _to_id(location_id)
+        if location_id is None:
+            return None
+        return self.locations(db, [location_id]).get(location_id)
+
+    def locations(self, db: Session, location_ids: Iterable[int]) -> Dict[int, LocationRef]:
+        """{id: lokalizacja} dla istniejących; brakujące w pamięci ładowane jednym zapytaniem"""
+        keys = [("location", location_id) for location_id in map(_to_id, location_ids) if location_id is not None]
+        found = self.cache.get_many(db, keys, lambda missing: self._load_locations(db, missing))
+        return {key[1]: location for key, location in found.items()}
+
+    def invalidate(self) -> None:
+        self.cache.invalidate()
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
+
+    def _load_snapshot(self, db: Session) -> ReferenceSnapshot:
+        # Dwa zapytania niezależnie od liczby krajów (zamiast country.cities per kraj)
+        countries = [CountryRef(country.id, country.name)
+                     for country in sorted(CountryRepository(db).get_all(), key=lambda c: c.id)]
+        by_id = {country.id: country for country in countries}
+        cities = []
+        for city in sorted(CityRepository(db).get_all(), key=lambda c: c.id):
+            country = by_id.get(city.country_id)
+            ref = CityRef(city.id, city.name, city.country_id, country)
+            if country is not None:
+                country.cities.append(ref)
+            cities.append(ref)
+        return ReferenceSnapshot(countries, cities)
+
+    def _load_locations(self, db: Session, keys: List[Hashable]) -> Dict[Hashable, LocationRef]:
+        locations = LocationRepository(db).find_by_ids(key[1] for key in keys)
+        return {("location", location.id): LocationRef(location.id, location.address, location.city_id)
+                for location in locations}
+
+
+def _to_id(value) -> Optional[int]:
+    # Identyfikatory z JSON-a / formularzy bywają napisami
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+reference_cache = ReferenceCache(
+    ttl=float(os.environ.get("REFERENCE_CACHE_TTL", 300)),
+    max_size=int(os.environ.get("REFERENCE_CACHE_MAX_SIZE", 4096))
+)
@@ -0,0 +1,240 @@
+"""
+Indeks etapów w pamięci procesu: drzewa przedziałów per miasto, per kraj i globalne.
+Odpowiada na pytania "które podróże przecinają [t1, t2] w mieście/kraju X" bez złączeń SQL.
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.cache.interval_tree import IntervalTree
+from app.models import Stage, TripStatus
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.stage_change_repository import StageChangeRepository
+from app.repositories.stage_repository import StageRepository
+
+
+STAGES_VERSION = "stages"
+
+# Bufor zmian kubełka przebudowywany po max(REBUILD_MIN_CHANGES, rozmiar / REBUILD_FRACTION) zmianach
+REBUILD_MIN_CHANGES = 64
+REBUILD_FRACTION = 8
+
+
+class StageEntry:
+    __slots__ = ("stage_id", "trip_id", "traveler_pesel", "city_id", "country_id",
+                 "trip_status", "start_date", "end_date")
+
+    def __init__(self, stage_id, trip_id, traveler_pesel, city_id, country_id,
+                 trip_status, start_date, end_date):
+        self.stage_id = stage_id
+        self.trip_id = trip_id
+        self.traveler_pesel = traveler_pesel
+        self.city_id = city_id
+        self.country_id = country_id
+        self.trip_status = trip_status
+        self.start_date = start_date
+        self.end_date = end_date
+
+
+class _Bucket:
+    """
+    Etapy jednego miasta/kraju: statyczne drzewo plus bufor zmian od jego zbudowania
+    (nowe etapy sprawdzane liniowo, usunięte odfiltrowywane). Drzewo budowane jest od nowa
+    dopiero, gdy bufor przekroczy ułamek rozmiaru - koszt przebudowy rozkłada się na wiele zmian.
+    """
+    __slots__ = ("entries", "tree", "added", "removed")
+
+    def __init__(self):
+        self.entries: Dict[int, StageEntry] = {}
+        self.tree: Optional[IntervalTree] = None
+        self.added: Dict[int, StageEntry] = {}
+        self.removed: Set[StageEntry] = set()
+
+    def add(self, entry: StageEntry):
+        self.remove(entry.stage_id)
+        self.entries[entry.stage_id] = entry
+        self.added[entry.stage_id] = entry
+
+    def remove(self, stage_id: int):
+        entry = self.entries.pop(stage_id, None)
+        if entry is not None and self.added.pop(stage_id, None) is None:
+            self.removed.add(entry)
+
+    def overlap(self, lo: datetime, hi: datetime) -> List[StageEntry]:
+        if self.tree is None or len(self.added) + len(self.removed) > max(REBUILD_MIN_CHANGES, len(self.entries) // REBUILD_FRACTION):
+            self.tree = IntervalTree((e.start_date, e.end_date, e) for e in self.entries.values())
+            self.added, self.removed = {}, set()
+        found = self.tree.overlap(lo, hi)
+        if self.removed:
+            found = [entry for entry in found if entry not in self.removed]
+        found.extend(entry for entry in self.added.values() if entry.start_date <= hi and entry.end_date >= lo)
+        return found
+
+
+class StageIndex:
+    """
+    Spójność między procesami zapewnia licznik data_versions["stages"], zwiększany
+    w tej samej transakcji co zapis etapów i wpis w dzienniku stage_changes (StageProjections).
+    Przed każdym zapytaniem indeks porównuje swoją wersję z bazą i doczytuje tylko etapy
+    zmienione od tamtej pory; całość przeładowuje, gdy dziennik już ich nie obejmuje.
+    Domyślnie wyłączony (STAGE_INDEX_ENABLED=1 włącza) - każdy proces trzyma wszystkie etapy w pamięci.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.version: Optional[int] = None
+        self.entries: Dict[int, StageEntry] = {}
+        self.by_trip: Dict[int, Set[int]] = {}
+        self.by_city: Dict[int, _Bucket] = {}
+        self.by_country: Dict[int, _Bucket] = {}
+        self.everything = _Bucket()
+        self.reloads = 0
+        self.refreshes = 0
+        self.lock = threading.RLock()
+
+    def init_app(self, app, session_factory):
+        app.config.setdefault("STAGE_INDEX_ENABLED", os.environ.get("STAGE_INDEX_ENABLED", "0") == "1")
+        self.enabled = app.config["STAGE_INDEX_ENABLED"]
+        if self.enabled:
+            db = session_factory()
+            try:
+                self.load(db)
+            finally:
+                db.close()
+
+    def load(self, db: Session) -> None:
+        """Zbuduj indeks od zera z tabeli stages"""
+        with self.lock:
+            version = DataVersionRepository(db).get(STAGES_VERSION)
+            self.entries = {}
+            self.by_trip = {}
+            self.by_city = {}
+            self.by_country = {}
+            self.everything = _Bucket()
+            query = StageRepository(db).select_denormalized().execution_options(yield_per=5000)
+            for row in db.execute(query):
+                self._add(StageEntry(*row))
+            self.version = version
+            self.reloads += 1
+
+    def ensure_fresh(self, db: Session) -> None:
+        version = DataVersionRepository(db).get(STAGES_VERSION)
+        if version == self.version:
+            return
+        changes = None
+        if self.version is not None and version > self.version:
+            changes = StageChangeRepository(db).changed_since(self.version, version)
+        if changes is None:
+            self.load(db)
+            return
+        self._refresh(db, *changes)
+        self.version = version
+        self.refreshes += 1
+
+    def apply(self, db: Session, stage_ids: Iterable[int], trip_ids: Iterable[int], version: int) -> None:
+        """Nanieś zatwierdzone zmiany etapów/podróży z tego procesu"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self._refresh(db, set(stage_ids), set(trip_ids))
+            # Jeśli w międzyczasie zapisywał inny proces, jego zmiany doczyta ensure_fresh z dziennika
+            if self.version is not None and version == self.version + 1:
+                self.version = version
+
+    def overlapping(self, db: Session, start: datetime, end: datetime,
+                    city_ids: Optional[Iterable[int]] = None,
+                    country_ids: Optional[Iterable[int]] = None) -> List[StageEntry]:
+        """
+        Etapy przecinające [start, end] w podanych miastach lub krajach
+        (bez city_ids i country_ids - we wszystkich).
+        """
+        with self.lock:
+            self.ensure_fresh(db)
+            if city_ids is not None:
+                buckets = [self.by_city[i] for i in city_ids if i in self.by_city]
+            elif country_ids is not None:
+                buckets = [self.by_country[i] for i in country_ids if i in self.by_country]
+            else:
+                buckets = [self.everything]
+            return [entry for bucket in buckets for entry in bucket.overlap(start, end)]
+
+    def trips_overlapping(self, db: Session, start: datetime, end: datetime,
+                          city_ids: Optional[Iterable[int]] = None,
+                          country_ids: Optional[Iterable[int]] = None,
+                          trip_status: Optional[TripStatus] = None) -> Set[Tuple[int, str]]:
+        """Pary (trip_id, traveler_pesel) podróży przecinających [start, end]"""
+        return {
+            (entry.trip_id, entry.traveler_pesel)
+            for entry in self.overlapping(db, start, end, city_ids, country_ids)
+            if trip_status is None or entry.trip_status == trip_status
+        }
+
+    def trip_statuses_overlapping(self, db: Session, start: datetime, end: datetime,
+                                  country_ids: Optional[Iterable[int]] = None,
+                                  trip_status: Optional[TripStatus] = None) -> Dict[int, TripStatus]:
+        """{trip_id: status} podróży przecinających [start, end]"""
+        return {
+            entry.trip_id: entry.trip_status
+            for entry in self.overlapping(db, start, end, country_ids=country_ids)
+            if trip_status is None or entry.trip_status == trip_status
+        }
+
+    def trips_per_country(self, trip_ids: Iterable[int]) -> Dict[int, int]:
+        """{country_id: liczba podróży} po wszystkich etapach podanych podróży"""
+        counts: Dict[int, int] = {}
+        with self.lock:
+            for trip_id in trip_ids:
+                countries = {self.entries[stage_id].country_id for stage_id in self.by_trip.get(trip_id, ())}
+                for country_id in countries:
+                    if country_id is not None:
+                        counts[country_id] = counts.get(country_id, 0) + 1
+        return counts
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "version": self.version,
+                "stages": len(self.entries),
+                "reloads": self.reloads,
+                "refreshes": self.refreshes
+            }
+
+    def _refresh(self, db: Session, stage_ids: Set[int], trip_ids: Set[int]) -> None:
+        """Usuń wskazane etapy (i etapy wskazanych podróży) i wczytaj ich bieżący stan z bazy"""
+        touched = set(stage_ids)
+        for trip_id in trip_ids:
+            touched |= self.by_trip.get(trip_id, set())
+        for stage_id in touched:
+            if stage_id in self.entries:
+                self._remove(self.entries[stage_id])
+
+        conditions = []
+        if stage_ids:
+            conditions.append(Stage.id.in_(stage_ids))
+        if trip_ids:
+            conditions.append(Stage.trip_id.in_(trip_ids))
+        for condition in conditions:
+            for row in db.execute(StageRepository(db).select_denormalized().where(condition)):
+                self._add(StageEntry(*row))
+
+    def _add(self, entry: StageEntry):
+        self.entries[entry.stage_id] = entry
+        self.by_trip.setdefault(entry.trip_id, set()).add(entry.stage_id)
+        self.everything.add(entry)
+        self.by_city.setdefault(entry.city_id, _Bucket()).add(entry)
+        if entry.country_id is not None:
+            self.by_country.setdefault(entry.country_id, _Bucket()).add(entry)
+
+    def _remove(self, entry: StageEntry):
+        self.entries.pop(entry.stage_id, None)
+        self.by_trip.get(entry.trip_id, set()).discard(entry.stage_id)
+        self.everything.remove(entry.stage_id)
+        if entry.city_id in self.by_city:
+            self.by_city[entry.city_id].remove(entry.stage_id)
+        if entry.country_id in self.by_country:
+            self.by_country[entry.country_id].remove(entry.stage_id)
+
+
+stage_index = StageIndex()
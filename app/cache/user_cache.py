@@ -0,0 +1,114 @@
+"""
+Pamięć podręczna tożsamości zalogowanych użytkowników (Flask-Login user_loader).
+Zamiast encji ORM przechowuje lekkie obiekty Principal, niezależne od sesji bazy,
+więc mogą być współdzielone między żądaniami. Wpisy wygasają po USER_CACHE_TTL sekund
+oraz są unieważniane jawnie po zmianie profilu lub preferencji w tym procesie.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from flask_login import UserMixin
+
+
+class Principal(UserMixin):
+    """Zalogowany podróżny lub pracownik: tylko pola potrzebne widokom i szablonom"""
+    __slots__ = ("kind", "pesel", "login", "first_name", "last_name", "email",
+                 "pref_sms", "pref_email", "pref_push", "role", "consulate_name")
+
+    def __init__(self, kind, pesel, login, first_name, last_name, email,
+                 pref_sms=None, pref_email=None, pref_push=None, role=None, consulate_name=None):
+        self.kind = kind
+        self.pesel = pesel
+        self.login = login
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+        self.pref_sms = pref_sms
+        self.pref_email = pref_email
+        self.pref_push = pref_push
+        self.role = role
+        self.consulate_name = consulate_name
+
+    @property
+    def is_traveler(self) -> bool:
+        return self.kind == "traveler"
+
+    @property
+    def is_employee(self) -> bool:
+        return self.kind == "employee"
+
+    def get_id(self):
+        # Jak Traveler.get_id / Employee.get_id - identyfikator zapisany w sesji Flask-Login
+        return self.pesel if self.is_traveler else self.login
+
+
+class UserCache:
+
+    def __init__(self, ttl: float = 60, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("USER_CACHE_TTL", float(os.environ.get("USER_CACHE_TTL", 60)))
+        app.config.setdefault("USER_CACHE_MAX_SIZE", int(os.environ.get("USER_CACHE_MAX_SIZE", 10000)))
+        self.ttl = app.config["USER_CACHE_TTL"]
+        self.max_size = app.config["USER_CACHE_MAX_SIZE"]
+        self.clear()
+
+    def get(self, user_id: str, load: Callable[[str], Optional[Principal]]) -> Optional[Principal]:
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(user_id)
+                    self.hits += 1
+                    return entry[1]
+                del self.entries[user_id]
+                self.expired += 1
+            self.misses += 1
+
+        # Ładowanie poza blokadą - równoległe chybienia tego samego użytkownika co najwyżej powtórzą zapytanie
+        principal = load(user_id)
+        if principal is not None and self.ttl > 0:
+            with self.lock:
+                self.entries[user_id] = (now + self.ttl, principal)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, *user_ids: str) -> None:
+        with self.lock:
+            for user_id in user_ids:
+                if self.entries.pop(user_id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+user_cache = UserCache()
@@ -0,0 +1,62 @@
+"""
+Bieżące wartości liczników data_versions (wersja i chwila zmiany) współdzielone w procesie.
+Odczyt wszystkich śledzonych liczników to jedno zapytanie, wykonywane najwyżej raz na
+check_interval sekund - w tym oknie odpowiedź nie potrzebuje nawet sesji bazy danych.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.repositories.data_version_repository import DataVersionRepository
+
+VersionInfo = Tuple[int, Optional[datetime]]
+
+
+class VersionClock:
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self.versions: Dict[str, VersionInfo] = {}
+        self.checked_at = 0.0
+        self.reads = 0
+        self.lock = threading.Lock()
+
+    def read(self, names: Iterable[str], session: Callable[[], Session]) -> Dict[str, VersionInfo]:
+        """
+        {nazwa: (wersja, updated_at)}; session wołane tylko, gdy trzeba odświeżyć liczniki
+        (np. lambda: g.db - leniwa sesja żądania nie jest wtedy w ogóle tworzona).
+        """
+        names = tuple(names)
+        now = time.monotonic()
+        with self.lock:
+            if now - self.checked_at < self.check_interval and all(name in self.versions for name in names):
+                return {name: self.versions[name] for name in names}
+            # Odświeżamy też liczniki innych widoków - jedno zapytanie zamiast kilku
+            tracked = set(self.versions) | set(names)
+
+        versions = DataVersionRepository(session()).get_many(tracked)
+        with self.lock:
+            self.versions.update(versions)
+            self.checked_at = now
+            self.reads += 1
+            return {name: self.versions[name] for name in names}
+
+    def invalidate(self) -> None:
+        """Po zapisie w tym procesie: następny odczyt sięgnie do bazy"""
+        with self.lock:
+            self.checked_at = 0.0
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "check_interval_seconds": self.check_interval,
+                "reads": self.reads,
+                "versions": {
+                    name: {"version": version, "updated_at": updated_at.isoformat() if updated_at else None}
+                    for name, (version, updated_at) in sorted(self.versions.items())
+                }
+            }
+
+
+version_clock = VersionClock()
@@ -0,0 +1,130 @@
+"""
+Pamięć podręczna procesu unieważniana licznikiem data_versions: wpisy (LRU z TTL) należą
+do wersji danych, a zmiana licznika w bazie - przez dowolny proces - czyści całość.
+Licznik sprawdzany jest co najwyżej raz na check_interval sekund, więc trafienie
+przy dużym ruchu zwykle nie wykonuje żadnego zapytania.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, TypeVar
+from sqlalchemy.orm import Session
+from app.repositories.data_version_repository import DataVersionRepository
+
+T = TypeVar("T")
+
+
+class VersionedCache:
+
+    def __init__(self, version_name: str, ttl: float = 60, max_size: int = 1024, check_interval: float = 1.0):
+        self.version_name = version_name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self.checked_at = 0.0
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def get(self, db: Session, key: Hashable, load: Callable[[], T]) -> T:
+        now = time.monotonic()
+        with self.lock:
+            if now - self.checked_at >= self.check_interval:
+                self._check_version(db, now)
+            version = self.version
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = load()
+        with self.lock:
+            # Dane mogły się zmienić w trakcie ładowania - wtedy wynik nie trafia do pamięci
+            if self.version == version and self.ttl > 0:
+                self.entries[key] = (now + self.ttl, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return value
+
+    def get_many(self, db: Session, keys: Iterable[Hashable],
+                 load: Callable[[List[Hashable]], Dict[Hashable, T]]) -> Dict[Hashable, T]:
+        """
+        Wiele kluczy naraz: brakujące ładowane jednym wywołaniem load(brakujące).
+        Klucze, których load nie zwrócił (brak w bazie), nie są zapamiętywane.
+        """
+        now = time.monotonic()
+        found: Dict[Hashable, T] = {}
+        missing: List[Hashable] = []
+        with self.lock:
+            if now - self.checked_at >= self.check_interval:
+                self._check_version(db, now)
+            version = self.version
+            for key in dict.fromkeys(keys):
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self.entries.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if not missing:
+            return found
+        loaded = load(missing)
+        with self.lock:
+            if self.version == version and self.ttl > 0:
+                for key, value in loaded.items():
+                    self.entries[key] = (now + self.ttl, value)
+                    self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        found.update(loaded)
+        return found
+
+    def current_version(self, db: Session) -> int:
+        """Wersja danych (sprawdzana w bazie nie częściej niż co check_interval)"""
+        now = time.monotonic()
+        with self.lock:
+            if self.version is None or now - self.checked_at >= self.check_interval:
+                self._check_version(db, now)
+            return self.version
+
+    def invalidate(self) -> None:
+        """Po zapisie w tym procesie: wyczyść wpisy i wymuś sprawdzenie licznika"""
+        with self.lock:
+            self._clear()
+            self.checked_at = 0.0
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+            }
+
+    def _check_version(self, db: Session, now: float) -> None:
+        version = DataVersionRepository(db).get(self.version_name)
+        if version != self.version:
+            self._clear()
+            self.version = version
+        self.checked_at = now
+
+    def _clear(self) -> None:
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.version = None
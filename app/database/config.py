@@ -0,0 +1,176 @@
+"""
+Konfiguracja silnika bazy danych: adres z DATABASE_URL (SQLite lub PostgreSQL), pula połączeń,
+pragmy SQLite i limity PostgreSQL ustawiane przy każdym połączeniu.
+Wartości domyślne można nadpisać zmiennymi środowiskowymi (DB_* / SQLITE_* / PG_*).
+"""
+import os
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool, StaticPool
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return int(value) if value != "" else None
+
+
+def _env_str(name: str, default: Optional[str]) -> Optional[str]:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value or None
+
+
+class DatabaseSettings:
+    """
+    Pragmy o wartości None nie są ustawiane (zostaje domyślne zachowanie SQLite).
+    - journal_mode WAL: czytelnicy nie blokują piszących i odwrotnie
+    - synchronous NORMAL: w trybie WAL bezpieczne przy awarii procesu, dużo mniej fsync
+    - busy_timeout: zamiast natychmiastowego "database is locked" czekaj na blokadę
+    - cache_size (KiB) i mmap_size (B): większy cache stron na połączenie
+    Dla PostgreSQL: statement_timeout i lock_timeout (ms) ustawiane w opcjach połączenia,
+    pool_recycle (s) zamyka połączenia starsze niż limit (np. przed timeoutem PgBouncera).
+    """
+
+    def __init__(self, url: str,
+                 journal_mode: Optional[str] = "WAL",
+                 synchronous: Optional[str] = "NORMAL",
+                 busy_timeout_ms: Optional[int] = 5000,
+                 cache_size_kib: Optional[int] = 65536,
+                 mmap_size: Optional[int] = 268435456,
+                 temp_store: Optional[str] = "MEMORY",
+                 pool_size: int = 10,
+                 max_overflow: int = 20,
+                 pool_timeout: int = 30,
+                 pool_recycle: int = 1800,
+                 statement_timeout_ms: Optional[int] = 30000,
+                 lock_timeout_ms: Optional[int] = 10000,
+                 application_name: str = "odyseusz",
+                 echo: bool = False):
+        self.url = normalize_url(url)
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.temp_store = temp_store
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.statement_timeout_ms = statement_timeout_ms
+        self.lock_timeout_ms = lock_timeout_ms
+        self.application_name = application_name
+        self.echo = echo
+
+    @classmethod
+    def from_env(cls, default_url: str, url_variable: str = "DATABASE_URL") -> "DatabaseSettings":
+        return cls(
+            url=os.environ.get(url_variable) or default_url,
+            journal_mode=_env_str("SQLITE_JOURNAL_MODE", "WAL"),
+            synchronous=_env_str("SQLITE_SYNCHRONOUS", "NORMAL"),
+            busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+            cache_size_kib=_env_int("SQLITE_CACHE_SIZE_KIB", 65536),
+            mmap_size=_env_int("SQLITE_MMAP_SIZE", 268435456),
+            temp_store=_env_str("SQLITE_TEMP_STORE", "MEMORY"),
+            pool_size=_env_int("DB_POOL_SIZE", 10),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", 20),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+            statement_timeout_ms=_env_int("PG_STATEMENT_TIMEOUT_MS", 30000),
+            lock_timeout_ms=_env_int("PG_LOCK_TIMEOUT_MS", 10000),
+            application_name=os.environ.get("PG_APPLICATION_NAME", "odyseusz"),
+            echo=os.environ.get("DB_ECHO", "0") == "1"
+        )
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.url.startswith("sqlite")
+
+    @property
+    def is_postgres(self) -> bool:
+        return self.url.startswith("postgresql")
+
+    @property
+    def is_memory(self) -> bool:
+        return self.is_sqlite and (":memory:" in self.url or self.url.rstrip("/") == "sqlite:")
+
+    def pragmas(self) -> Dict[str, object]:
+        pragmas = {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "busy_timeout": self.busy_timeout_ms,
+            "cache_size": -self.cache_size_kib if self.cache_size_kib is not None else None,
+            "mmap_size": self.mmap_size,
+            "temp_store": self.temp_store
+        }
+        return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def build_engine(settings: DatabaseSettings) -> Engine:
+    options = {"echo": settings.echo}
+
+    if settings.is_sqlite:
+        # Flask obsługuje żądania w wielu wątkach - połączenie może trafić do innego wątku z puli
+        options["connect_args"] = {"check_same_thread": False}
+        if settings.is_memory:
+            # Baza w pamięci istnieje tylko w jednym połączeniu
+            options["poolclass"] = StaticPool
+        else:
+            options["poolclass"] = QueuePool
+            options["pool_size"] = settings.pool_size
+            options["max_overflow"] = settings.max_overflow
+            options["pool_timeout"] = settings.pool_timeout
+    else:
+        # Serwer bazy danych: QueuePool (domyślny), sprawdzanie połączenia przed użyciem
+        options["pool_size"] = settings.pool_size
+        options["max_overflow"] = settings.max_overflow
+        options["pool_timeout"] = settings.pool_timeout
+        options["pool_recycle"] = settings.pool_recycle
+        options["pool_pre_ping"] = True
+        if settings.is_postgres:
+            options["connect_args"] = {
+                "application_name": settings.application_name,
+                "options": postgres_options(settings)
+            }
+
+    engine = create_engine(settings.url, **options)
+    if settings.is_sqlite:
+        install_sqlite_pragmas(engine, settings)
+    return engine
+
+
+def normalize_url(url: str) -> str:
+    """postgres:// (np. z Heroku / docker-compose) -> postgresql:// rozpoznawane przez SQLAlchemy"""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def postgres_options(settings: DatabaseSettings) -> str:
+    options = []
+    if settings.statement_timeout_ms is not None:
+        options.append(f"-c statement_timeout={settings.statement_timeout_ms}")
+    if settings.lock_timeout_ms is not None:
+        options.append(f"-c lock_timeout={settings.lock_timeout_ms}")
+    return " ".join(options)
+
+
+def install_sqlite_pragmas(engine: Engine, settings: DatabaseSettings) -> None:
+    pragmas = settings.pragmas()
+    if settings.is_memory:
+        # WAL nie dotyczy bazy w pamięci
+        pragmas.pop("journal_mode", None)
+        pragmas.pop("mmap_size", None)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -1,12 +1,29 @@
-from sqlalchemy import create_engine
+import os
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from app.database.config import DatabaseSettings, build_engine
+from app.database.routing import make_routing_session_class
 
 DATABASE_NAME = "Database"
 
-DATABASE_URL = "sqlite:///" + DATABASE_NAME + ".db"
+# Domyślnie lokalny plik SQLite; DATABASE_URL (np. postgresql+psycopg2://...) nadpisuje
+DEFAULT_DATABASE_URL = "sqlite:///" + DATABASE_NAME + ".db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+database_settings = DatabaseSettings.from_env(DEFAULT_DATABASE_URL)
 
-SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+DATABASE_URL = database_settings.url
 
-Base = declarative_base()
\ No newline at end of file
+engine = build_engine(database_settings)
+
+# Replika tylko do odczytu (drugi plik SQLite lub standby PostgreSQL); bez niej wszystko idzie do engine
+REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+
+replica_engine = build_engine(DatabaseSettings.from_env(REPLICA_DATABASE_URL, "REPLICA_DATABASE_URL")) if REPLICA_DATABASE_URL else engine
+
+SessionLocal = scoped_session(sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=make_routing_session_class(engine, replica_engine)
+))
+
+Base = declarative_base()
@@ -0,0 +1,51 @@
+"""
+Sesja bazy w obrębie żądania: g.db tworzona leniwie przy pierwszym użyciu i zamykana
+raz, w teardown. Pliki statyczne i strony renderujące sam szablon nie sięgają do puli połączeń.
+"""
+import time
+from flask import Flask, g, has_request_context, request, session
+from flask.ctx import _AppCtxGlobals
+from app.database.database import SessionLocal
+
+
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+WRITTEN_AT_KEY = "_db_written_at"
+
+
+class LazySessionGlobals(_AppCtxGlobals):
+    """`g`, w którym atrybut db powstaje przy pierwszym odwołaniu"""
+
+    def __getattr__(self, name):
+        if name == "db":
+            db = SessionLocal()
+            if has_request_context() and _needs_primary():
+                db.use_primary()
+            self.db = db
+            return db
+        return super().__getattr__(name)
+
+
+def _needs_primary() -> bool:
+    """Żądania modyfikujące i użytkownik tuż po własnym zapisie czytają z bazy głównej"""
+    from flask import current_app
+    view = current_app.view_functions.get(request.endpoint)
+    read_only = request.method in READ_ONLY_METHODS or getattr(view, "db_read_only", False)
+    written_at = session.get(WRITTEN_AT_KEY)
+    recently_written = written_at and time.time() - written_at < current_app.config["REPLICA_STICKY_SECONDS"]
+    return not read_only or bool(recently_written)
+
+
+def init_app(app: Flask) -> None:
+    app.app_ctx_globals_class = LazySessionGlobals
+
+    @app.after_request
+    def remember_write(response):
+        db = g.get("db")
+        if db is not None and db.last_write_commit:
+            session[WRITTEN_AT_KEY] = db.last_write_commit
+        return response
+
+    @app.teardown_request
+    def shutdown_session(exception=None):
+        if "db" in g:
+            SessionLocal.remove()
@@ -0,0 +1,62 @@
+"""
+Kierowanie zapytań: odczyty do repliki, zapisy do bazy głównej.
+Bez REPLICA_DATABASE_URL obie role pełni ten sam silnik.
+"""
+import time
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+
+class RoutingSession(Session):
+    """
+    SELECT-y trafiają do repliki, dopóki sesja niczego nie zapisała. Pierwszy flush
+    lub instrukcja INSERT/UPDATE/DELETE przełącza sesję na bazę główną do końca jej
+    życia - dzięki temu w tym samym żądaniu widać własne zapisy (read-your-writes).
+    use_primary() wymusza bazę główną od początku (np. żądania modyfikujące).
+    """
+
+    primary_engine: Optional[Engine] = None
+    replica_engine: Optional[Engine] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary_only = False
+        self.wrote = False
+        self.last_write_commit: Optional[float] = None
+
+    def use_primary(self) -> None:
+        self.primary_only = True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.primary_engine is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.wrote = True
+            self.primary_only = True
+        if self.primary_only or self.replica_engine is None:
+            return self.primary_engine
+        return self.replica_engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write_commit(session: RoutingSession):
+    if session.wrote:
+        session.last_write_commit = time.time()
+        session.wrote = False
+
+
+def read_only(view):
+    """Oznacza widok jako tylko do odczytu mimo metody POST (np. formularz wyszukiwania)"""
+    view.db_read_only = True
+    return view
+
+
+def make_routing_session_class(primary: Engine, replica: Optional[Engine]) -> type:
+    """Podklasa RoutingSession powiązana z konkretnymi silnikami (do sessionmaker(class_=...))"""
+    return type("BoundRoutingSession", (RoutingSession,), {
+        "primary_engine": primary,
+        "replica_engine": replica if replica is not primary else None
+    })
@@ -0,0 +1,24 @@
+from .channels import (
+    DeliveryMessage,
+    DeliveryChannel,
+    SmtpChannel,
+    SmsGatewayChannel,
+    PushChannel,
+    LocalSink
+)
+from .rate_limit import TokenBucket
+from .engine import DeliveryEngine, ChannelSettings, get_delivery_engine, set_delivery_engine
+
+__all__ = [
+    'DeliveryMessage',
+    'DeliveryChannel',
+    'SmtpChannel',
+    'SmsGatewayChannel',
+    'PushChannel',
+    'LocalSink',
+    'TokenBucket',
+    'DeliveryEngine',
+    'ChannelSettings',
+    'get_delivery_engine',
+    'set_delivery_engine',
+]
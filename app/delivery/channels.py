@@ -0,0 +1,125 @@
+"""
+Adaptery kanałów dostarczania powiadomień (e-mail, SMS, push) oraz lokalny sink
+"""
+import smtplib
+import threading
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+import requests
+
+
+class DeliveryMessage:
+    """Pojedyncza wiadomość do dostarczenia jednym kanałem"""
+
+    def __init__(self, traveler_pesel: str, address: Optional[str], body: str, subject: str = ""):
+        self.traveler_pesel = traveler_pesel
+        self.address = address
+        self.body = body
+        self.subject = subject
+
+
+class DeliveryChannel(ABC):
+    """
+    Bazowy kanał. send_batch wysyła całą paczkę (jedno połączenie / jedno żądanie)
+    i zwraca liczbę wiadomości przyjętych przez bramkę.
+    """
+    name = "base"
+
+    @abstractmethod
+    def send_batch(self, messages: List[DeliveryMessage]) -> int:
+        pass
+
+
+class SmtpChannel(DeliveryChannel):
+    """E-mail - cała paczka wysyłana przez jedno połączenie SMTP"""
+    name = "email"
+
+    def __init__(self, host: str, port: int = 587, sender: str = "alerty@odyseusz.pl",
+                 username: Optional[str] = None, password: Optional[str] = None, use_tls: bool = True):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+
+    def send_batch(self, messages: List[DeliveryMessage]) -> int:
+        sent = 0
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for message in messages:
+                email = EmailMessage()
+                email["From"] = self.sender
+                email["To"] = message.address
+                email["Subject"] = message.subject or "Odyseusz - powiadomienie"
+                email.set_content(message.body)
+                try:
+                    smtp.send_message(email)
+                    sent += 1
+                except smtplib.SMTPRecipientsRefused:
+                    continue
+        return sent
+
+
+class HttpBatchChannel(DeliveryChannel):
+    """Bramka HTTP przyjmująca paczkę wiadomości w jednym żądaniu POST (JSON)"""
+
+    def __init__(self, url: str, api_key: Optional[str] = None, timeout: float = 30):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def send_batch(self, messages: List[DeliveryMessage]) -> int:
+        # Jedna sesja HTTP (keep-alive) na wątek kanału
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        response = self.local.session.post(
+            self.url,
+            json={"messages": [self._message_to_dict(m) for m in messages]},
+            headers=headers,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return len(messages)
+
+    def _message_to_dict(self, message: DeliveryMessage) -> Dict:
+        return {"to": message.address, "text": message.body}
+
+
+class SmsGatewayChannel(HttpBatchChannel):
+    name = "sms"
+
+
+class PushChannel(HttpBatchChannel):
+    name = "push"
+
+    def _message_to_dict(self, message: DeliveryMessage) -> Dict:
+        # Urządzenia podróżnego są identyfikowane po PESEL-u po stronie bramki push
+        return {"user": message.traveler_pesel, "title": message.subject, "text": message.body}
+
+
+class LocalSink(DeliveryChannel):
+    """Lokalny zamiennik bramki - zapamiętuje wiadomości w pamięci (lokalnie i w testach)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.messages: List[DeliveryMessage] = []
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def send_batch(self, messages: List[DeliveryMessage]) -> int:
+        with self.lock:
+            self.messages.extend(messages)
+            self.batches += 1
+        return len(messages)
+
+    def clear(self):
+        with self.lock:
+            self.messages = []
+            self.batches = 0
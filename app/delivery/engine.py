@@ -0,0 +1,157 @@
+"""
+Silnik dostarczania - rozdziela odbiorców na kanały według preferencji i wysyła paczkami
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Sequence
+from app.delivery.channels import (
+    DeliveryChannel,
+    DeliveryMessage,
+    SmtpChannel,
+    SmsGatewayChannel,
+    PushChannel,
+    LocalSink
+)
+from app.delivery.rate_limit import TokenBucket
+
+
+CHANNELS = ("email", "sms", "push")
+
+
+class ChannelSettings:
+    """Rozmiar paczki, liczba równoległych wysyłek i limit wiadomości na sekundę dla kanału"""
+
+    def __init__(self, batch_size: int = 100, concurrency: int = 4, rate_per_second: float = 0):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.rate_per_second = rate_per_second
+
+    @classmethod
+    def from_env(cls, channel: str) -> "ChannelSettings":
+        prefix = f"DELIVERY_{channel.upper()}_"
+        return cls(
+            batch_size=int(os.environ.get(prefix + "BATCH_SIZE", 100)),
+            concurrency=int(os.environ.get(prefix + "CONCURRENCY", 4)),
+            rate_per_second=float(os.environ.get(prefix + "RATE", 0))
+        )
+
+
+class ChannelWorker:
+    """Kanał razem z własną pulą wątków i kubełkiem limitu"""
+
+    def __init__(self, channel: DeliveryChannel, settings: ChannelSettings):
+        self.channel = channel
+        self.settings = settings
+        self.bucket = TokenBucket(settings.rate_per_second, max(settings.rate_per_second, settings.batch_size))
+        self.executor = ThreadPoolExecutor(max_workers=settings.concurrency,
+                                           thread_name_prefix=f"delivery-{channel.name}")
+
+    def submit(self, batch: List[DeliveryMessage]):
+        return self.executor.submit(self._send, batch)
+
+    def _send(self, batch: List[DeliveryMessage]) -> int:
+        self.bucket.acquire(len(batch))
+        return self.channel.send_batch(batch)
+
+
+class DeliveryEngine:
+
+    def __init__(self, channels: Dict[str, DeliveryChannel], settings: Optional[Dict[str, ChannelSettings]] = None):
+        settings = settings or {}
+        self.workers = {
+            name: ChannelWorker(channel, settings.get(name, ChannelSettings()))
+            for name, channel in channels.items()
+        }
+
+    def deliver(self, recipients: Iterable, body: str, subject: str = "",
+                channels: Sequence[str] = CHANNELS) -> Dict[str, Dict[str, int]]:
+        """
+        Dostarcz wiadomość odbiorcom. `recipients` to strumień wierszy
+        (pesel, email, phone_number, pref_sms, pref_email, pref_push).
+        Zwraca statystyki per kanał: sent, failed, batches.
+        """
+        active = [name for name in channels if name in self.workers]
+        batches = {name: [] for name in active}
+        futures = {name: [] for name in active}
+
+        for pesel, email, phone_number, pref_sms, pref_email, pref_push in recipients:
+            for name, wanted, address in (
+                ("email", pref_email, email),
+                ("sms", pref_sms, phone_number),
+                ("push", pref_push, pesel)
+            ):
+                if name not in batches or not wanted or not address:
+                    continue
+                batch = batches[name]
+                batch.append(DeliveryMessage(pesel, address, body, subject))
+                if len(batch) >= self.workers[name].settings.batch_size:
+                    futures[name].append((self.workers[name].submit(batch), len(batch)))
+                    batches[name] = []
+
+        for name, batch in batches.items():
+            if batch:
+                futures[name].append((self.workers[name].submit(batch), len(batch)))
+
+        wait([future for pending in futures.values() for future, _ in pending])
+
+        stats = {}
+        for name, pending in futures.items():
+            sent = failed = 0
+            for future, size in pending:
+                try:
+                    accepted = future.result()
+                    sent += accepted
+                    failed += size - accepted
+                except Exception as e:
+                    print(f"Błąd wysyłki kanałem {name}: {e}")
+                    failed += size
+            stats[name] = {"sent": sent, "failed": failed, "batches": len(pending)}
+        return stats
+
+
+_engine: Optional[DeliveryEngine] = None
+_engine_lock = threading.Lock()
+
+
+def build_channels_from_env() -> Dict[str, DeliveryChannel]:
+    """Kanały skonfigurowane zmiennymi środowiskowymi; brak konfiguracji -> LocalSink"""
+    channels: Dict[str, DeliveryChannel] = {}
+
+    smtp_host = os.environ.get("DELIVERY_SMTP_HOST")
+    channels["email"] = SmtpChannel(
+        host=smtp_host,
+        port=int(os.environ.get("DELIVERY_SMTP_PORT", 587)),
+        sender=os.environ.get("DELIVERY_SMTP_SENDER", "alerty@odyseusz.pl"),
+        username=os.environ.get("DELIVERY_SMTP_USER"),
+        password=os.environ.get("DELIVERY_SMTP_PASSWORD"),
+        use_tls=os.environ.get("DELIVERY_SMTP_TLS", "1") == "1"
+    ) if smtp_host else LocalSink("email")
+
+    sms_url = os.environ.get("DELIVERY_SMS_URL")
+    channels["sms"] = SmsGatewayChannel(sms_url, os.environ.get("DELIVERY_SMS_API_KEY")) \
+        if sms_url else LocalSink("sms")
+
+    push_url = os.environ.get("DELIVERY_PUSH_URL")
+    channels["push"] = PushChannel(push_url, os.environ.get("DELIVERY_PUSH_API_KEY")) \
+        if push_url else LocalSink("push")
+
+    return channels
+
+
+def get_delivery_engine() -> DeliveryEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DeliveryEngine(
+                build_channels_from_env(),
+                {name: ChannelSettings.from_env(name) for name in CHANNELS}
+            )
+        return _engine
+
+
+def set_delivery_engine(engine: Optional[DeliveryEngine]) -> None:
+    """Podmień silnik (np. na LocalSink-i w testach); None przywraca konfigurację z env"""
+    global _engine
+    with _engine_lock:
+        _engine = engine
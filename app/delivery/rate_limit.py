@@ -0,0 +1,36 @@
+"""
+Ogranicznik przepustowości typu token bucket, współdzielony przez wątki kanału
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Kubełek o pojemności `capacity` napełniany w tempie `rate` żetonów na sekundę.
+    rate <= 0 oznacza brak limitu.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        """Zablokuj wątek, aż w kubełku będzie `amount` żetonów, i pobierz je"""
+        if self.rate <= 0:
+            return
+        # Paczka większa niż pojemność pobiera cały kubełek "na kredyt"
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Enum, Float
 from sqlalchemy.orm import relationship
 from app.database.database import Base  # Importujemy Base
-from sqlalchemy import Boolean, Table
+from sqlalchemy import Boolean, Table, Index
 from datetime import datetime
 from enum import Enum as PyEnum
 from flask_login import UserMixin
@@ -20,6 +20,12 @@ class EvacuationStatus(PyEnum):
     COMPLETED = "completed"
     CANCELED = "canceled"
 
+class AlertJobStatus(PyEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class ThreatLevel(PyEnum):
     LOW = "low"
     MEDIUM = "medium"
@@ -79,6 +85,11 @@ class City(Base):
 
     country_id = Column(Integer, ForeignKey("countries.id"))
 
+    __table_args__ = (
+        # kraj -> miasta (pokrywający: nie trzeba sięgać do tabeli po id)
+        Index("ix_cities_country_id", "country_id", "id"),
+    )
+
     # Relationships
     country = relationship("Country", back_populates="cities")
     locations = relationship("Location", back_populates="city")
@@ -91,6 +102,11 @@ class Location(Base):
 
     city_id = Column(Integer, ForeignKey("cities.id"))
 
+    __table_args__ = (
+        # miasto -> lokalizacje (pokrywający)
+        Index("ix_locations_city_id", "city_id", "id"),
+    )
+
     # Relationships
     city = relationship("City", back_populates="locations")
     stages = relationship("Stage", back_populates="location")
@@ -167,6 +183,11 @@ class Trip(Base):
     traveler_pesel = Column(String, ForeignKey("travelers.pesel"))
     evacuation_id = Column(Integer, ForeignKey("evacuations.id"), nullable=True)
 
+    __table_args__ = (
+        # podróże podróżnego (pokrywający dla złączeń Traveler -> Trip)
+        Index("ix_trips_traveler_pesel", "traveler_pesel", "id"),
+    )
+
     traveler = relationship("Traveler", back_populates="trips")
     evacuation = relationship("Evacuation", back_populates="trips")
     stages = relationship("Stage", back_populates="trip")
@@ -186,10 +207,56 @@ class Stage(Base):
     trip_id = Column(Integer, ForeignKey("trips.id"))
     location_id = Column(Integer, ForeignKey("locations.id"))
 
+    __table_args__ = (
+        # etapy podróży (Trip.stages, złączenia Trip -> Stage)
+        Index("ix_stages_trip_id", "trip_id"),
+        # "kto jest teraz w lokalizacji X": równość po location_id, zakres po start_date,
+        # end_date i trip_id w indeksie - zapytanie nie sięga do tabeli stages
+        Index("ix_stages_location_window", "location_id", "start_date", "end_date", "trip_id"),
+    )
+
     trip = relationship("Trip", back_populates="stages")
     location = relationship("Location", back_populates="stages")
 
 
+class TravelerPresence(Base):
+    """
+    Projekcja "kto gdzie przebywa": jeden wiersz na aktywny lub przyszły etap,
+    z miastem, krajem i podróżnym zdenormalizowanymi z Trip/Location/City.
+    Utrzymywana przez StageService/TripService, wygasłe wiersze usuwa presence_sweep.
+    """
+    __tablename__ = "traveler_presence"
+    stage_id = Column(Integer, ForeignKey("stages.id"), primary_key=True)
+    trip_id = Column(Integer, ForeignKey("trips.id"), nullable=False, index=True)
+    traveler_pesel = Column(String, ForeignKey("travelers.pesel"), nullable=False)
+    city_id = Column(Integer, ForeignKey("cities.id"), nullable=False)
+    country_id = Column(Integer, ForeignKey("countries.id"))
+    trip_status = Column(Enum(TripStatus), nullable=False)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_traveler_presence_city", "city_id", "start_date", "end_date", "traveler_pesel"),
+        Index("ix_traveler_presence_country", "country_id", "trip_status", "start_date", "end_date", "traveler_pesel"),
+        Index("ix_traveler_presence_end_date", "end_date"),
+    )
+
+
+class TripStat(Base):
+    """
+    Kostka statystyk: liczba podróży i podróżnych obecnych danego dnia w mieście
+    lub kraju (scope = "city" / "country"), w podziale na status podróży.
+    Utrzymywana przyrostowo przez StageProjections, w całości odbudowywana przez scripts/rebuild_trip_stats.py.
+    """
+    __tablename__ = "trip_stats"
+    scope = Column(String, primary_key=True)
+    scope_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(TripStatus), primary_key=True)
+    trips = Column(Integer, nullable=False, default=0)
+    travelers = Column(Integer, nullable=False, default=0)
+
+
 class Notification(Base):
     __tablename__ = "notifications"
     id = Column(Integer, primary_key=True, index=True)
@@ -198,8 +265,92 @@ class Notification(Base):
     created_at = Column(DateTime, default=datetime.now)
     is_read = Column(Boolean, default=False)
 
+    __table_args__ = (
+        # listy powiadomień od najnowszych (paginacja keyset po created_at, id)
+        Index("ix_notifications_created_at", "created_at", "id"),
+        Index("ix_notifications_traveler_created", "traveler_pesel", "created_at", "id"),
+    )
+
     traveler = relationship("Traveler", backref="notifications")
 
+class DataVersion(Base):
+    """Licznik zmian danych (np. "stages") - do unieważniania pamięci podręcznych między procesami"""
+    __tablename__ = "data_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # Chwila ostatniej zmiany (UTC) - nagłówek Last-Modified odpowiedzi zależnych od licznika
+    updated_at = Column(DateTime, nullable=True)
+
+
+class StageChange(Base):
+    """
+    Dziennik zmian etapów: które etapy/podróże zmieniła transakcja podbijająca licznik "stages"
+    do danej wersji. Indeksy w pamięci innych procesów doczytują na jego podstawie tylko zmienione wiersze.
+    """
+    __tablename__ = "stage_changes"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, index=True)
+    stage_id = Column(Integer, nullable=True)
+    trip_id = Column(Integer, nullable=True)
+
+class AlertJob(Base):
+    __tablename__ = "alert_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(String, nullable=False)
+    status = Column(Enum(AlertJobStatus), nullable=False, default=AlertJobStatus.QUEUED, index=True)
+    recipients_resolved = Column(Integer, default=0)
+    notifications_written = Column(Integer, default=0)
+    error = Column(String)
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    # Dzierżawa: proces wykonujący zadanie i jego ostatni sygnał życia - po wygaśnięciu
+    # zadanie RUNNING wraca do kolejki, a spóźniony wykonawca nie może go już zakończyć
+    claimed_by = Column(String)
+    heartbeat_at = Column(DateTime)
+    # Powiadomienia zapisane (written_at) - zostały wysyłki kanałami zewnętrznymi z planu
+    # deliveries (JSON); ponowienie zadania powtarza tylko te wysyłki, nie zapis powiadomień
+    written_at = Column(DateTime)
+    deliveries = Column(String)
+    delivery_attempts = Column(Integer, default=0)
+
+class WarningNotification(Base):
+    """
+    Rejestr powiadomień o ostrzeżeniach: podróżny dostał powiadomienie o ostrzeżeniu na danym
+    poziomie zagrożenia (threat_rank). Kolejne powiadomienie tylko po eskalacji poziomu.
+    """
+    __tablename__ = "warning_notifications"
+    warning_id = Column(Integer, ForeignKey("consular_warnings.id"), primary_key=True)
+    traveler_pesel = Column(String, ForeignKey("travelers.pesel"), primary_key=True)
+    threat_rank = Column(Integer, primary_key=True)
+    notified_at = Column(DateTime, nullable=False, index=True)
+
+class WarningFeed(Base):
+    """Stan synchronizacji jednego feedu ostrzeżeń (plik lub URL) - pomijanie niezmienionych i backoff"""
+    __tablename__ = "warning_feeds"
+    source = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    mtime = Column(Float)
+    size = Column(Integer)
+    checksum = Column(String(64))
+    last_status = Column(String)
+    last_error = Column(String)
+    last_report = Column(String)
+    last_duration_seconds = Column(Float)
+    last_run_at = Column(DateTime)
+    last_success_at = Column(DateTime)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    next_run_at = Column(DateTime)
+
+class SchedulerLease(Base):
+    """Blokada lidera: zadanie cykliczne wykonuje tylko proces, który trzyma ważną dzierżawę"""
+    __tablename__ = "scheduler_leases"
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
 warning_location_association = Table(
     "warning_location",
     Base.metadata,
@@ -218,5 +369,15 @@ class ConsularWarning(Base):
     threat_level = Column(Enum(ThreatLevel), nullable=False)      
     publication_date = Column(DateTime, default=datetime.now)           
     expiry_date = Column(DateTime, nullable=False)                         
+    # SHA-256 pól z feedu - import porównuje skróty zamiast treści
+    content_hash = Column(String(64))
+    # Feed, z którego pochodzi ostrzeżenie - wygaszanie nieobecnych dotyczy tylko jego ostrzeżeń
+    source = Column(String, index=True)
+
+    __table_args__ = (
+        # lista ostrzeżeń: aktywne/wygasłe (zakres po expiry_date) i filtr poziomu zagrożenia
+        Index("ix_consular_warnings_expiry", "expiry_date", "id"),
+        Index("ix_consular_warnings_level_expiry", "threat_level", "expiry_date", "id"),
+    )
 
     locations = relationship("Location", secondary=warning_location_association)
\ No newline at end of file
@@ -7,6 +7,18 @@ from .evacuation_repository import EvacuationRepository
 from .stage_repository import StageRepository
 from .country_repository import CountryRepository
 from .city_repository import CityRepository
+from .location_repository import LocationRepository
+from .alert_job_repository import AlertJobRepository
+from .presence_repository import PresenceRepository
+from .data_version_repository import DataVersionRepository
+from .stage_change_repository import StageChangeRepository
+from .report_repository import ReportRepository
+from .trip_stats_repository import TripStatsRepository
+from .principal_repository import PrincipalRepository
+from .scheduler_lease_repository import SchedulerLeaseRepository
+from .warning_feed_repository import WarningFeedRepository
+from .warning_match_repository import WarningMatchRepository
+from .pagination import Paginator, PageParams, Page, PaginationError
 
 __all__ = [
     'TravelerRepository',
@@ -18,4 +30,19 @@ __all__ = [
     'StageRepository',
     'CountryRepository',
     'CityRepository',
+    'LocationRepository',
+    'AlertJobRepository',
+    'PresenceRepository',
+    'DataVersionRepository',
+    'StageChangeRepository',
+    'ReportRepository',
+    'TripStatsRepository',
+    'PrincipalRepository',
+    'SchedulerLeaseRepository',
+    'WarningFeedRepository',
+    'WarningMatchRepository',
+    'Paginator',
+    'PageParams',
+    'Page',
+    'PaginationError',
 ]
@@ -0,0 +1,109 @@
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+from app.models import AlertJob, AlertJobStatus
+from datetime import datetime, timedelta
+from typing import Optional, List
+
+
+class AlertJobRepository:
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def find_by_id(self, job_id: int) -> Optional[AlertJob]:
+        return self.db.query(AlertJob).filter_by(id=job_id).first()
+    
+    def find_by_status(self, status: AlertJobStatus) -> List[AlertJob]:
+        return self.db.query(AlertJob).filter_by(status=status).order_by(AlertJob.id).all()
+    
+    def claim(self, job_id: int, holder: str) -> bool:
+        """Atomowo przełącz zadanie QUEUED -> RUNNING (dzierżawa holder); False jeśli ktoś już je przejął"""
+        now = datetime.now()
+        result = self.db.execute(
+            update(AlertJob)
+            .where(AlertJob.id == job_id, AlertJob.status == AlertJobStatus.QUEUED)
+            .values(status=AlertJobStatus.RUNNING, started_at=now, claimed_by=holder, heartbeat_at=now)
+        )
+        return result.rowcount == 1
+    
+    def heartbeat(self, holder: str) -> int:
+        """Odnów dzierżawę wszystkich zadań wykonywanych przez holder"""
+        result = self.db.execute(
+            update(AlertJob)
+            .where(AlertJob.status == AlertJobStatus.RUNNING, AlertJob.claimed_by == holder)
+            .values(heartbeat_at=datetime.now())
+        )
+        return result.rowcount
+    
+    def requeue_expired(self, lease_seconds: float) -> int:
+        """
+        Zwróć do kolejki zadania RUNNING, których dzierżawa wygasła (wykonawca przestał
+        odnawiać heartbeat_at - np. proces zginął). Zadania żywych procesów zostają.
+        """
+        cutoff = datetime.now() - timedelta(seconds=lease_seconds)
+        # Zadania sprzed migracji nie mają heartbeat_at - liczy się wtedy started_at
+        expired = or_(
+            AlertJob.heartbeat_at < cutoff,
+            and_(AlertJob.heartbeat_at.is_(None), or_(AlertJob.started_at.is_(None), AlertJob.started_at < cutoff))
+        )
+        result = self.db.execute(
+            update(AlertJob)
+            .where(AlertJob.status == AlertJobStatus.RUNNING, expired)
+            .values(status=AlertJobStatus.QUEUED, started_at=None, claimed_by=None, heartbeat_at=None)
+        )
+        return result.rowcount
+    
+    def mark_written(self, job_id: int, holder: str, notifications_written: int, deliveries: str) -> bool:
+        """Powiadomienia zapisane, zostają wysyłki z planu deliveries; False = dzierżawa utracona"""
+        result = self.db.execute(
+            update(AlertJob)
+            .where(AlertJob.id == job_id, AlertJob.status == AlertJobStatus.RUNNING, AlertJob.claimed_by == holder)
+            .values(notifications_written=notifications_written, written_at=datetime.now(),
+                    deliveries=deliveries, heartbeat_at=datetime.now())
+        )
+        return result.rowcount == 1
+    
+    def retry_delivery(self, job_id: int, holder: str, deliveries: str, error: str) -> bool:
+        """Zwróć zadanie do kolejki z niewysłaną częścią planu (kolejna próba wysyłki)"""
+        result = self.db.execute(
+            update(AlertJob)
+            .where(AlertJob.id == job_id, AlertJob.status == AlertJobStatus.RUNNING, AlertJob.claimed_by == holder)
+            .values(status=AlertJobStatus.QUEUED, started_at=None, claimed_by=None, heartbeat_at=None,
+                    deliveries=deliveries, error=error,
+                    delivery_attempts=func.coalesce(AlertJob.delivery_attempts, 0) + 1)
+        )
+        return result.rowcount == 1
+    
+    def finish(self, job_id: int, holder: str, error: Optional[str] = None) -> bool:
+        """
+        RUNNING -> DONE (po wysyłce) tylko dla właściciela dzierżawy; False = dzierżawa utracona.
+        error - opis wysyłek, których nie udało się dostarczyć w limicie prób.
+        """
+        return self._close(job_id, holder, AlertJobStatus.DONE, error=error)
+    
+    def fail(self, job_id: int, holder: str, error: str) -> bool:
+        return self._close(job_id, holder, AlertJobStatus.FAILED, error=error)
+    
+    def set_recipients_resolved(self, job_id: int, holder: str, count: int) -> None:
+        self.db.execute(
+            update(AlertJob)
+            .where(AlertJob.id == job_id, AlertJob.claimed_by == holder)
+            .values(recipients_resolved=count, heartbeat_at=datetime.now())
+        )
+    
+    def create(self, job: AlertJob) -> AlertJob:
+        self.db.add(job)
+        self.db.flush()
+        return job
+    
+    def update(self, job: AlertJob) -> AlertJob:
+        self.db.flush()
+        return job
+    
+    def _close(self, job_id: int, holder: str, status: AlertJobStatus, **values) -> bool:
+        result = self.db.execute(
+            update(AlertJob)
+            .where(AlertJob.id == job_id, AlertJob.status == AlertJobStatus.RUNNING, AlertJob.claimed_by == holder)
+            .values(status=status, finished_at=datetime.now(), **values)
+        )
+        return result.rowcount == 1
@@ -1,10 +1,18 @@
 from sqlalchemy.orm import Session
 from app.models import Companion, Traveler
-from typing import Optional, List
+from typing import Iterator, Optional, List
+from app.repositories.pagination import Paginator, PageParams, Page
 
 
 class CompanionRepository:
     
+    paginator = Paginator(
+        key=Companion.id,
+        sortable={"id": Companion.id, "last_name": Companion.last_name},
+        filterable={"added_by_pesel": Companion.added_by_pesel, "pesel": Companion.pesel},
+        default_sort="id"
+    )
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -17,6 +25,12 @@ class CompanionRepository:
     def get_all(self) -> List[Companion]:
         return self.db.query(Companion).all()
     
+    def find_page(self, params: PageParams) -> Page:
+        return self.paginator.paginate(self.db.query(Companion), params)
+    
+    def iter_rows(self, params: PageParams) -> Iterator[Companion]:
+        return self.paginator.iterate(self.db.query(Companion), params)
+    
     def create(self, companion: Companion) -> Companion:
         self.db.add(companion)
         self.db.flush()
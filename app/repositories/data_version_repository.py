@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models import DataVersion
+
+
+class DataVersionRepository:
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get(self, name: str) -> int:
+        version = self.db.query(DataVersion.version).filter_by(name=name).scalar()
+        return version or 0
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        """{nazwa: (wersja, updated_at)} jednym zapytaniem; brak wiersza = (0, None)"""
+        names = list(names)
+        rows = self.db.execute(
+            select(DataVersion.name, DataVersion.version, DataVersion.updated_at)
+            .where(DataVersion.name.in_(names))
+        )
+        versions = {name: (0, None) for name in names}
+        versions.update({name: (version or 0, updated_at) for name, version, updated_at in rows})
+        return versions
+    
+    def bump(self, name: str) -> int:
+        """Zwiększ licznik w bieżącej transakcji i zwróć nową wartość"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        result = self.db.execute(
+            update(DataVersion)
+            .where(DataVersion.name == name)
+            .values(version=DataVersion.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            self.db.add(DataVersion(name=name, version=1, updated_at=now))
+            self.db.flush()
+        return self.get(name)
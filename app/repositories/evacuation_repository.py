@@ -1,5 +1,5 @@
-from sqlalchemy.orm import Session
-from app.models import Evacuation
+from sqlalchemy.orm import Session, selectinload
+from app.models import Evacuation, EvacuationArea, City
 from typing import Optional, List
 
 
@@ -14,6 +14,18 @@ class EvacuationRepository:
     def get_all(self) -> List[Evacuation]:
         return self.db.query(Evacuation).all()
     
+    def find_by_id_with_areas(self, evacuation_id: int) -> Optional[Evacuation]:
+        return self.db.query(Evacuation).options(self._areas_option()).filter_by(id=evacuation_id).first()
+    
+    def get_all_with_areas(self) -> List[Evacuation]:
+        """Wszystkie ewakuacje z obszarami, miastami i krajami - stała liczba zapytań (4)"""
+        return self.db.query(Evacuation).options(self._areas_option()).order_by(Evacuation.id).all()
+    
+    def _areas_option(self):
+        return selectinload(Evacuation.evacuation_areas)\
+            .selectinload(EvacuationArea.city)\
+            .selectinload(City.country)
+    
     def create(self, evacuation: Evacuation) -> Evacuation:
         self.db.add(evacuation)
         self.db.flush()
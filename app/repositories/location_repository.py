@@ -0,0 +1,21 @@
+"""
+Repository dla Location - operacje na bazie danych
+"""
+from sqlalchemy.orm import Session
+from app.models import Location
+from typing import Iterable, Optional, List
+
+
+class LocationRepository:
+    """Repository do zarządzania Location w bazie danych"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_by_id(self, location_id: int) -> Optional[Location]:
+        """Znajdź lokalizację po ID"""
+        return self.db.query(Location).filter_by(id=location_id).first()
+
+    def find_by_ids(self, location_ids: Iterable[int]) -> List[Location]:
+        """Znajdź lokalizacje o podanych ID jednym zapytaniem"""
+        return self.db.query(Location).filter(Location.id.in_(list(location_ids))).all()
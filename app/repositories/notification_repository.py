@@ -1,10 +1,20 @@
+from sqlalchemy import insert, select, literal, false, Select, DateTime
 from sqlalchemy.orm import Session
 from app.models import Notification
-from typing import Optional, List
+from datetime import datetime
+from typing import Iterator, Optional, List
+from app.repositories.pagination import Paginator, PageParams, Page
 
 
 class NotificationRepository:
     
+    paginator = Paginator(
+        key=Notification.id,
+        sortable={"id": Notification.id, "created_at": Notification.created_at},
+        filterable={"traveler_pesel": Notification.traveler_pesel, "is_read": Notification.is_read},
+        default_sort="-created_at"
+    )
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -18,11 +28,57 @@ class NotificationRepository:
     def get_all(self) -> List[Notification]:
         return self.db.query(Notification).order_by(Notification.created_at.desc()).all()
     
+    def find_page(self, params: PageParams) -> Page:
+        return self.paginator.paginate(self.db.query(Notification), params)
+    
+    def iter_rows(self, params: PageParams) -> Iterator[Notification]:
+        return self.paginator.iterate(self.db.query(Notification), params)
+    
     def create(self, notification: Notification) -> Notification:
         self.db.add(notification)
         self.db.flush()
         return notification
     
+    def create_for_recipients(self, recipients: Select, message: str, created_at: datetime) -> int:
+        """
+        Wstaw jedno powiadomienie dla każdego PESEL-u zwracanego przez `recipients`
+        jednym INSERT ... SELECT, bez tworzenia obiektów ORM. Zwraca liczbę wierszy.
+        """
+        recipients = recipients.subquery()
+        rows = select(
+            recipients.c[0],
+            literal(message),
+            literal(created_at, DateTime),
+            false()
+        )
+        result = self.db.execute(
+            insert(Notification).from_select(
+                ["traveler_pesel", "message", "created_at", "is_read"],
+                rows
+            )
+        )
+        return result.rowcount
+    
+    def create_messages(self, rows: Select, created_at: datetime) -> int:
+        """
+        Jak create_for_recipients, ale z treścią per wiersz: `rows` zwraca kolumny
+        traveler_pesel i message. Jeden INSERT ... SELECT. Zwraca liczbę wierszy.
+        """
+        rows = rows.subquery()
+        result = self.db.execute(
+            insert(Notification).from_select(
+                ["traveler_pesel", "message", "created_at", "is_read"],
+                select(rows.c.traveler_pesel, rows.c.message, literal(created_at, DateTime), false())
+            )
+        )
+        return result.rowcount
+    
+    def select_recipients(self, created_at: datetime, message: str) -> Select:
+        """PESEL-e podróżnych, którym w chwili created_at zapisano powiadomienie o tej treści"""
+        return select(Notification.traveler_pesel)\
+            .where(Notification.created_at == created_at, Notification.message == message)\
+            .distinct()
+    
     def update(self, notification: Notification) -> Notification:
         self.db.flush()
         return notification
@@ -0,0 +1,188 @@
+"""
+Wspólna paginacja list (keyset): nieprzezroczyste kursory, limit, filtry pól i sortowanie
+"""
+import base64
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+RESERVED_ARGS = ("limit", "cursor", "sort", "stream")
+
+
+class PaginationError(ValueError):
+    """Nieprawidłowy kursor, limit, filtr lub sortowanie"""
+    pass
+
+
+class PageParams:
+    """Parametry strony: limit, kursor, sortowanie ("pole" / "-pole") i filtry równościowe"""
+
+    def __init__(self, limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None,
+                 sort: Optional[str] = None, filters: Optional[Dict[str, str]] = None):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.filters = filters or {}
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> "PageParams":
+        """Parametry z query stringa (request.args); pozostałe argumenty traktowane są jako filtry"""
+        try:
+            limit = int(args.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            raise PaginationError("limit musi być liczbą")
+        if limit < 1:
+            raise PaginationError("limit musi być większy od zera")
+
+        return cls(
+            limit=min(limit, MAX_LIMIT),
+            cursor=args.get("cursor") or None,
+            sort=args.get("sort") or None,
+            filters={key: value for key, value in args.items() if key not in RESERVED_ARGS}
+        )
+
+
+class Page:
+
+    def __init__(self, items: List, next_cursor: Optional[str], limit: int):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+
+    def to_dict(self, serialize: Callable[[Any], Dict]) -> Dict:
+        return {
+            "items": [serialize(item) for item in self.items],
+            "next_cursor": self.next_cursor,
+            "limit": self.limit
+        }
+
+
+class Paginator:
+    """
+    Opis listy: kolumna-klucz (unikalna, rozstrzyga remisy sortowania) oraz pola,
+    po których wolno sortować i filtrować. Kolumny sortowania nie mogą zawierać NULL.
+    """
+
+    def __init__(self, key, sortable: Dict[str, Any], filterable: Dict[str, Any], default_sort: str):
+        self.key = key
+        self.sortable = sortable
+        self.filterable = filterable
+        self.default_sort = default_sort
+
+    def paginate(self, query: Query, params: PageParams) -> Page:
+        sort, descending, column = self._sort(params)
+        query = self._filter(query, params)
+
+        if params.cursor:
+            cursor = _decode_cursor(params.cursor)
+            if cursor.get("s") != sort:
+                raise PaginationError("Kursor dotyczy innego sortowania")
+            value = _from_json(column, cursor["v"])
+            key = _from_json(self.key, cursor["k"])
+            after = (lambda c, v: c < v) if descending else (lambda c, v: c > v)
+            if column is self.key:
+                query = query.filter(after(self.key, key))
+            else:
+                query = query.filter(or_(after(column, value), and_(column == value, after(self.key, key))))
+
+        items = query.order_by(*self._order(column, descending)).limit(params.limit + 1).all()
+
+        next_cursor = None
+        if len(items) > params.limit:
+            items = items[:params.limit]
+            last = items[-1]
+            next_cursor = _encode_cursor({
+                "s": sort,
+                "v": _to_json(getattr(last, column.key)),
+                "k": _to_json(getattr(last, self.key.key))
+            })
+        return Page(items, next_cursor, params.limit)
+
+    def iterate(self, query: Query, params: PageParams, chunk_size: int = 1000) -> Iterator:
+        """Wszystkie pasujące wiersze (filtry i sortowanie jak w paginate, bez limitu i kursora) strumieniowo"""
+        _, descending, column = self._sort(params)
+        return iter(self._filter(query, params).order_by(*self._order(column, descending)).yield_per(chunk_size))
+
+    def _sort(self, params: PageParams):
+        sort = params.sort or self.default_sort
+        descending = sort.startswith("-")
+        field = sort.lstrip("-")
+        if field not in self.sortable:
+            raise PaginationError(f"Nie można sortować po '{field}'. Dozwolone: {sorted(self.sortable)}")
+        return sort, descending, self.sortable[field]
+
+    def _filter(self, query: Query, params: PageParams) -> Query:
+        for name, value in params.filters.items():
+            if name not in self.filterable:
+                raise PaginationError(f"Nie można filtrować po '{name}'. Dozwolone: {sorted(self.filterable)}")
+            query = query.filter(self.filterable[name] == _parse_filter(self.filterable[name], value))
+        return query
+
+    def _order(self, column, descending: bool) -> List:
+        order = [column.desc() if descending else column.asc()]
+        if column is not self.key:
+            order.append(self.key.desc() if descending else self.key.asc())
+        return order
+
+
+def _encode_cursor(data: Dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if not isinstance(data, dict) or not {"s", "v", "k"} <= data.keys():
+            raise ValueError
+        return data
+    except ValueError:
+        raise PaginationError("Nieprawidłowy kursor")
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def _from_json(column, value):
+    python_type = column.type.python_type
+    try:
+        if value is None:
+            return None
+        if issubclass(python_type, Enum):
+            return python_type[value]
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        return python_type(value)
+    except (KeyError, ValueError, TypeError):
+        raise PaginationError("Nieprawidłowy kursor")
+
+
+def _parse_filter(column, value: str):
+    python_type = column.type.python_type
+    try:
+        if python_type is bool:
+            if value.lower() not in ("1", "0", "true", "false"):
+                raise ValueError
+            return value.lower() in ("1", "true")
+        if issubclass(python_type, Enum):
+            return python_type(value)
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        return python_type(value)
+    except ValueError:
+        raise PaginationError(f"Nieprawidłowa wartość filtra '{column.key}': {value}")
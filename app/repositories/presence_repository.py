@@ -0,0 +1,109 @@
+"""
+Repository dla projekcji TravelerPresence - operacje zbiorowe (INSERT ... SELECT / DELETE)
+"""
+from sqlalchemy import select, insert, delete, Select
+from sqlalchemy.orm import Session
+from app.models import TravelerPresence, Stage, Trip, Country, TripStatus
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.stage_repository import StageRepository
+from datetime import datetime
+from typing import Iterable, Optional
+
+# Licznik w data_versions: > 0 = projekcja kompletna (po rebuild(), potem utrzymywana przez StageProjections)
+PRESENCE_VERSION = "presence"
+
+
+class PresenceRepository:
+    """
+    Repository do utrzymywania i odpytywania tabeli traveler_presence. Dopóki projekcja
+    nie jest kompletna (istniejąca baza przed rebuild()), zapytania o odbiorców alertów
+    liczone są ze złączenia etapów - alert nigdy nie trafia do pustej projekcji.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def refresh_stages(self, stage_ids: Iterable[int]) -> None:
+        """Przelicz wiersze dla podanych etapów (po ich zapisaniu / flush)"""
+        stage_ids = list(stage_ids)
+        if not stage_ids:
+            return
+        self.delete_for_stages(stage_ids)
+        self._insert_from_stages(Stage.id.in_(stage_ids))
+    
+    def refresh_trip(self, trip_id: int) -> None:
+        """Przelicz wiersze wszystkich etapów podróży (np. po zmianie statusu lub podróżnego)"""
+        self.delete_for_trip(trip_id)
+        self._insert_from_stages(Stage.trip_id == trip_id)
+    
+    def delete_for_stages(self, stage_ids: Iterable[int]) -> None:
+        self.db.execute(delete(TravelerPresence).where(TravelerPresence.stage_id.in_(list(stage_ids))))
+    
+    def delete_for_trip(self, trip_id: int) -> None:
+        self.db.execute(delete(TravelerPresence).where(TravelerPresence.trip_id == trip_id))
+    
+    def expire(self, before: datetime) -> int:
+        """Usuń wiersze etapów zakończonych przed `before`"""
+        result = self.db.execute(delete(TravelerPresence).where(TravelerPresence.end_date < before))
+        return result.rowcount
+    
+    def rebuild(self) -> int:
+        """Odbuduj całą projekcję z tabeli stages i oznacz ją jako kompletną"""
+        self.db.execute(delete(TravelerPresence))
+        count = self._insert_from_stages(Stage.end_date >= datetime.now())
+        DataVersionRepository(self.db).bump(PRESENCE_VERSION)
+        return count
+    
+    def is_complete(self) -> bool:
+        return DataVersionRepository(self.db).get(PRESENCE_VERSION) > 0
+    
+    def select_pesels_in_city(self, city_id: int, at: datetime) -> Select:
+        """Zapytanie o PESEL-e podróżnych przebywających w mieście w danej chwili"""
+        presence = self._source()
+        return select(presence.c.traveler_pesel)\
+            .where(presence.c.city_id == city_id)\
+            .where(presence.c.start_date <= at, presence.c.end_date >= at)\
+            .distinct()
+    
+    def select_pesels_in_country(self, country_name: str, at: datetime,
+                                 trip_status: Optional[TripStatus] = None) -> Select:
+        """Zapytanie o PESEL-e podróżnych przebywających w kraju (nazwa dopasowana częściowo)"""
+        presence = self._source()
+        query = select(presence.c.traveler_pesel)\
+            .where(presence.c.country_id.in_(
+                select(Country.id).where(Country.name.ilike(f"%{country_name}%"))
+            ))\
+            .where(presence.c.start_date <= at, presence.c.end_date >= at)
+        if trip_status is not None:
+            query = query.where(presence.c.trip_status == trip_status)
+        return query.distinct()
+    
+    def _source(self):
+        """Tabela traveler_presence albo - przed pierwszym rebuild() - te same kolumny ze złączenia etapów"""
+        if self.is_complete():
+            return TravelerPresence.__table__
+        stages = StageRepository(self.db).select_denormalized()\
+            .where(Trip.traveler_pesel.is_not(None))\
+            .subquery()
+        return select(
+            stages.c.traveler_pesel,
+            stages.c.city_id,
+            stages.c.country_id,
+            stages.c.status.label("trip_status"),
+            stages.c.start_date,
+            stages.c.end_date
+        ).subquery("presence")
+    
+    def _insert_from_stages(self, condition) -> int:
+        rows = StageRepository(self.db).select_denormalized()\
+            .where(condition)\
+            .where(Trip.traveler_pesel.is_not(None))\
+            .where(Stage.end_date >= datetime.now())
+        result = self.db.execute(
+            insert(TravelerPresence).from_select(
+                ["stage_id", "trip_id", "traveler_pesel", "city_id", "country_id",
+                 "trip_status", "start_date", "end_date"],
+                rows
+            )
+        )
+        return result.rowcount
@@ -0,0 +1,51 @@
+from sqlalchemy import desc, literal, null, select, union_all
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.models import Traveler, Employee, Consulate
+
+
+class PrincipalRepository:
+    """
+    Dane zalogowanego użytkownika dla Flask-Login. Podróżny (po pesel) i pracownik
+    (po login) są wyszukiwani jednym zapytaniem UNION ALL - obie gałęzie to wyszukiwanie
+    po kluczu głównym, bez drugiego zapytania "awaryjnego" dla pracowników.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find(self, user_id: str) -> Optional[dict]:
+        travelers = select(
+            literal("traveler").label("kind"),
+            Traveler.pesel.label("pesel"),
+            Traveler.login.label("login"),
+            Traveler.first_name.label("first_name"),
+            Traveler.last_name.label("last_name"),
+            Traveler.email.label("email"),
+            Traveler.pref_sms.label("pref_sms"),
+            Traveler.pref_email.label("pref_email"),
+            Traveler.pref_push.label("pref_push"),
+            null().label("role"),
+            null().label("consulate_name")
+        ).where(Traveler.pesel == user_id)
+
+        employees = select(
+            literal("employee").label("kind"),
+            Employee.pesel,
+            Employee.login,
+            Employee.first_name,
+            Employee.last_name,
+            Employee.email,
+            null(),
+            null(),
+            null(),
+            Employee.role,
+            Consulate.name
+        ).outerjoin(Consulate, Employee.consulate_id == Consulate.id)\
+            .where(Employee.login == user_id)
+
+        # Podróżny ma pierwszeństwo, gdy login pracownika równa się czyjemuś peselowi
+        row = self.db.execute(
+            union_all(travelers, employees).order_by(desc("kind")).limit(1)
+        ).mappings().first()
+        return dict(row) if row else None
@@ -0,0 +1,161 @@
+"""
+Repository dla raportów konsularnych - lekkie zapytania wierszowe zamiast grafów ORM
+"""
+from sqlalchemy import select, func, and_, distinct, Select
+from sqlalchemy.orm import Session
+from app.models import Trip, Traveler, Stage, Location, City, Country, TripStatus
+from typing import Dict, Iterator, List, Optional
+
+
+class ReportRepository:
+    """Repository do zapytań raportowych o podróże"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def select_matching_trip_ids(self, country: Optional[str], date_from: Optional[str],
+                                 date_to: Optional[str], status: Optional[TripStatus]) -> Select:
+        """ID podróży, których któryś etap pasuje do filtrów kraju i zakresu dat"""
+        query = select(Stage.trip_id)\
+            .join(Location, Location.id == Stage.location_id)\
+            .join(City, City.id == Location.city_id)\
+            .join(Country, Country.id == City.country_id)
+        
+        if country:
+            query = query.where(Country.name.ilike(f"%{country}%"))
+        
+        if status:
+            query = query.join(Trip, Trip.id == Stage.trip_id).where(Trip.status == status)
+        
+        if date_from and date_to:
+            query = query.where(
+                and_(
+                    func.date(Stage.start_date) <= date_to,
+                    func.date(Stage.end_date) >= date_from
+                )
+            )
+        
+        return query
+    
+    def select_trip_rows(self) -> Select:
+        """
+        Wiersze raportu, po jednym na podróż (od najnowszej):
+        (id, first_name, last_name, start_date, end_date, status)
+        """
+        return select(
+            Trip.id,
+            Traveler.first_name,
+            Traveler.last_name,
+            func.min(Stage.start_date).label("start_date"),
+            func.max(Stage.end_date).label("end_date"),
+            Trip.status
+        )\
+            .outerjoin(Traveler, Traveler.pesel == Trip.traveler_pesel)\
+            .join(Stage, Stage.trip_id == Trip.id)\
+            .group_by(Trip.id, Traveler.first_name, Traveler.last_name, Trip.status)\
+            .order_by(Trip.id.desc())
+    
+    def iter_trip_rows(self, condition, chunk_size: int = 1000) -> Iterator:
+        """Strumieniowo zwracaj wiersze raportu spełniające warunek (yield_per)"""
+        query = self.select_trip_rows().where(condition).execution_options(yield_per=chunk_size)
+        return iter(self.db.execute(query))
+    
+    def page_trip_ids(self, matching: Select, after_id: Optional[int], limit: int) -> List[int]:
+        """Kolejna strona ID podróży (keyset po Trip.id malejąco)"""
+        query = select(Trip.id).where(Trip.id.in_(matching))
+        if after_id is not None:
+            query = query.where(Trip.id < after_id)
+        return list(self.db.execute(query.order_by(Trip.id.desc()).limit(limit)).scalars())
+    
+    def page_rows(self, trip_ids: List[int]) -> List[Dict]:
+        """
+        Wiersze strony raportu jako słowniki (dwa zapytania niezależnie od liczby podróży):
+        dane podróży i podróżnego oraz etapy z miastem i krajem
+        """
+        if not trip_ids:
+            return []
+        
+        rows = {}
+        trips = select(
+            Trip.id,
+            Trip.traveler_pesel,
+            Trip.status,
+            Traveler.first_name,
+            Traveler.last_name,
+            Traveler.email
+        )\
+            .outerjoin(Traveler, Traveler.pesel == Trip.traveler_pesel)\
+            .where(Trip.id.in_(trip_ids))\
+            .order_by(Trip.id.desc())
+        for trip_id, pesel, status, first_name, last_name, email in self.db.execute(trips):
+            rows[trip_id] = {
+                "id": trip_id,
+                "traveler_pesel": pesel,
+                "status": status.name,
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": email,
+                "start_date": None,
+                "end_date": None,
+                "countries": [],
+                "stages": []
+            }
+        
+        stages = select(
+            Stage.trip_id,
+            Stage.start_date,
+            Stage.end_date,
+            Location.address,
+            City.name,
+            Country.name
+        )\
+            .join(Location, Location.id == Stage.location_id)\
+            .join(City, City.id == Location.city_id)\
+            .join(Country, Country.id == City.country_id)\
+            .where(Stage.trip_id.in_(trip_ids))\
+            .order_by(Stage.trip_id, Stage.id)
+        for trip_id, start_date, end_date, address, city_name, country_name in self.db.execute(stages):
+            row = rows[trip_id]
+            row["stages"].append({
+                "start_date": start_date,
+                "end_date": end_date,
+                "address": address,
+                "city": city_name,
+                "country": country_name
+            })
+            if country_name not in row["countries"]:
+                row["countries"].append(country_name)
+            if row["start_date"] is None or start_date < row["start_date"]:
+                row["start_date"] = start_date
+            if row["end_date"] is None or end_date > row["end_date"]:
+                row["end_date"] = end_date
+        
+        return list(rows.values())
+    
+    def summary(self, matching: Select) -> Dict:
+        """Liczby podróży: łącznie, per status i per kraj (same agregaty, bez wierszy)"""
+        by_status = {
+            status.name: count
+            for status, count in self.db.execute(
+                select(Trip.status, func.count(Trip.id))
+                .where(Trip.id.in_(matching))
+                .group_by(Trip.status)
+            )
+        }
+        by_country = [
+            (name, count)
+            for name, count in self.db.execute(
+                select(Country.name, func.count(distinct(Stage.trip_id)))
+                .join(Location, Location.id == Stage.location_id)
+                .join(City, City.id == Location.city_id)
+                .join(Country, Country.id == City.country_id)
+                .where(Stage.trip_id.in_(matching))
+                .group_by(Country.name)
+                .order_by(func.count(distinct(Stage.trip_id)).desc())
+            )
+        ]
+        return {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_country": by_country
+        }
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import SchedulerLease
+
+
+class SchedulerLeaseRepository:
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def acquire(self, name: str, holder: str, ttl_seconds: float) -> bool:
+        """
+        Przejmij lub przedłuż dzierżawę name. Udaje się, gdy dzierżawa należy już do holder,
+        wygasła albo jeszcze nie istnieje. Wywołujący zatwierdza transakcję
+        (dzierżawę warto brać we własnej, krótkiej sesji).
+        """
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        result = self.db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == name)
+            .where(or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now))
+            .values(holder=holder, expires_at=expires_at)
+        )
+        if result.rowcount == 1:
+            return True
+
+        if self.find(name) is not None:
+            return False
+        # Pierwsza dzierżawa o tej nazwie; wyścig z innym procesem wycofuje transakcję
+        try:
+            self.db.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at))
+            self.db.flush()
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return True
+
+    def release(self, name: str, holder: str) -> None:
+        self.db.execute(
+            delete(SchedulerLease)
+            .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+        )
+
+    def find(self, name: str):
+        return self.db.query(SchedulerLease).filter_by(name=name).first()
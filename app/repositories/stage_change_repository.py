@@ -0,0 +1,40 @@
+"""
+Repository dla StageChange - dziennik zmian etapów dla indeksów w pamięci
+"""
+from sqlalchemy import select, insert, delete
+from sqlalchemy.orm import Session
+from app.models import StageChange
+from typing import Iterable, Optional, Set, Tuple
+
+# Ile ostatnich wersji trzymać w dzienniku; proces, który został dalej w tyle, przeładowuje indeks
+STAGE_CHANGES_KEPT = 1000
+
+
+class StageChangeRepository:
+    """Repository do zapisu i odczytu dziennika zmian etapów"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(self, version: int, stage_ids: Iterable[int], trip_ids: Iterable[int]) -> None:
+        """Zapisz zmiany transakcji (w tej samej transakcji co podbicie licznika) i usuń najstarsze"""
+        rows = [{"version": version, "stage_id": stage_id, "trip_id": None} for stage_id in stage_ids]
+        rows += [{"version": version, "stage_id": None, "trip_id": trip_id} for trip_id in trip_ids]
+        # Wiersz także dla pustej zmiany - inaczej wersja wyglądałaby na lukę w dzienniku
+        self.db.execute(insert(StageChange), rows or [{"version": version, "stage_id": None, "trip_id": None}])
+        self.db.execute(delete(StageChange).where(StageChange.version <= version - STAGE_CHANGES_KEPT))
+
+    def changed_since(self, after_version: int, up_to_version: int) -> Optional[Tuple[Set[int], Set[int]]]:
+        """
+        (stage_ids, trip_ids) zmienione w wersjach (after_version, up_to_version];
+        None, gdy dziennik nie obejmuje wszystkich tych wersji.
+        """
+        rows = self.db.execute(
+            select(StageChange.version, StageChange.stage_id, StageChange.trip_id)
+            .where(StageChange.version > after_version, StageChange.version <= up_to_version)
+        ).all()
+        if len({version for version, _, _ in rows}) != up_to_version - after_version:
+            return None
+        stage_ids = {stage_id for _, stage_id, _ in rows if stage_id is not None}
+        trip_ids = {trip_id for _, _, trip_id in rows if trip_id is not None}
+        return stage_ids, trip_ids
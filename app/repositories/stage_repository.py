@@ -1,10 +1,19 @@
+from sqlalchemy import select, Select
 from sqlalchemy.orm import Session
-from app.models import Stage
+from app.models import Stage, Trip, Location, City
 from typing import Optional, List
+from app.repositories.pagination import Paginator, PageParams, Page
 
 
 class StageRepository:
 
+    paginator = Paginator(
+        key=Stage.id,
+        sortable={"id": Stage.id, "start_date": Stage.start_date, "end_date": Stage.end_date},
+        filterable={"trip_id": Stage.trip_id, "location_id": Stage.location_id},
+        default_sort="id"
+    )
+
     def __init__(self, db: Session):
         self.db = db
     
@@ -17,6 +26,28 @@ class StageRepository:
     def get_all(self) -> List[Stage]:
         return self.db.query(Stage).all()
     
+    def find_page(self, params: PageParams) -> Page:
+        return self.paginator.paginate(self.db.query(Stage), params)
+    
+    def select_denormalized(self) -> Select:
+        """
+        Zapytanie o etapy z danymi podróży i miejsca:
+        (stage_id, trip_id, traveler_pesel, city_id, country_id, trip_status, start_date, end_date)
+        """
+        return select(
+            Stage.id,
+            Stage.trip_id,
+            Trip.traveler_pesel,
+            Location.city_id,
+            City.country_id,
+            Trip.status,
+            Stage.start_date,
+            Stage.end_date
+        )\
+            .join(Trip, Trip.id == Stage.trip_id)\
+            .join(Location, Location.id == Stage.location_id)\
+            .join(City, City.id == Location.city_id)
+    
     def create(self, stage: Stage) -> Stage:
         self.db.add(stage)
         self.db.flush()
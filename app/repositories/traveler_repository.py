@@ -1,10 +1,19 @@
+from sqlalchemy import select, Select
 from sqlalchemy.orm import Session
 from app.models import Traveler
-from typing import Optional, List
+from typing import Iterator, Optional, List
+from app.repositories.pagination import Paginator, PageParams, Page
 
 
 class TravelerRepository:
     
+    paginator = Paginator(
+        key=Traveler.pesel,
+        sortable={"pesel": Traveler.pesel, "last_name": Traveler.last_name, "login": Traveler.login},
+        filterable={"last_name": Traveler.last_name, "login": Traveler.login, "email": Traveler.email},
+        default_sort="pesel"
+    )
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -20,6 +29,37 @@ class TravelerRepository:
     def get_all(self) -> List[Traveler]:
         return self.db.query(Traveler).all()
     
+    def find_page(self, params: PageParams) -> Page:
+        return self.paginator.paginate(self.db.query(Traveler), params)
+    
+    def iter_rows(self, params: PageParams) -> Iterator[Traveler]:
+        return self.paginator.iterate(self.db.query(Traveler), params)
+    
+    def select_push_recipients(self, present_in: Optional[Select] = None) -> Select:
+        """
+        Zapytanie o PESEL-e podróżnych z preferencją push, opcjonalnie zawężone
+        do PESEL-i zwracanych przez `present_in`
+        """
+        query = select(Traveler.pesel).where(Traveler.pref_push == True)
+        if present_in is not None:
+            query = query.where(Traveler.pesel.in_(present_in))
+        return query
+    
+    def iter_contacts(self, recipients: Select, chunk_size: int = 1000) -> Iterator:
+        """
+        Strumieniowo zwracaj dane kontaktowe i preferencje odbiorców:
+        (pesel, email, phone_number, pref_sms, pref_email, pref_push)
+        """
+        query = select(
+            Traveler.pesel,
+            Traveler.email,
+            Traveler.phone_number,
+            Traveler.pref_sms,
+            Traveler.pref_email,
+            Traveler.pref_push
+        ).where(Traveler.pesel.in_(recipients)).execution_options(yield_per=chunk_size)
+        return iter(self.db.execute(query))
+    
     def create(self, traveler: Traveler) -> Traveler:
         self.db.add(traveler)
         self.db.flush()
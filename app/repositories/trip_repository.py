@@ -1,10 +1,22 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from app.models import Trip, Traveler
-from typing import Optional, List
+from typing import Iterator, Optional, List
+from app.repositories.pagination import Paginator, PageParams, Page
 
 
 class TripRepository:
     
+    paginator = Paginator(
+        key=Trip.id,
+        sortable={"id": Trip.id},
+        filterable={
+            "status": Trip.status,
+            "traveler_pesel": Trip.traveler_pesel,
+            "evacuation_id": Trip.evacuation_id
+        },
+        default_sort="id"
+    )
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -17,6 +29,26 @@ class TripRepository:
     def get_all(self) -> List[Trip]:
         return self.db.query(Trip).all()
     
+    def find_by_traveler_pesel_with_details(self, traveler_pesel: str) -> List[Trip]:
+        return self.db.query(Trip).options(*self._details_options())\
+            .filter_by(traveler_pesel=traveler_pesel).all()
+    
+    def get_all_with_details(self) -> List[Trip]:
+        """Podróże z etapami i companionami - stała liczba zapytań (3) zamiast 2N + 1"""
+        return self.db.query(Trip).options(*self._details_options()).all()
+    
+    def find_page(self, params: PageParams) -> Page:
+        return self.paginator.paginate(self.db.query(Trip).options(*self._details_options()), params)
+    
+    def iter_rows(self, params: PageParams) -> Iterator[Trip]:
+        return self.paginator.iterate(self.db.query(Trip).options(*self._details_options()), params)
+    
+    def _details_options(self):
+        return (
+            selectinload(Trip.stages),
+            selectinload(Trip.companions)
+        )
+    
     def create(self, trip: Trip) -> Trip:
         self.db.add(trip)
         self.db.flush()
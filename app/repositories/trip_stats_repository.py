@@ -0,0 +1,214 @@
+"""
+Repository kostki TripStat - komórki (obszar x dzień x status) zmieniane o różnice liczników
+przy zapisie etapów, odbudowa całości z tabeli stages
+"""
+from itertools import groupby
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from app.models import TripStat, TripStatus, Stage, Trip, Location, City
+
+
+SCOPE_CITY = "city"
+SCOPE_COUNTRY = "country"
+
+INSERT_CHUNK_SIZE = 1000
+
+
+class TripStatsRepository:
+    """Repository do utrzymywania i odpytywania tabeli trip_stats"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def select_stage_images(self, condition) -> Dict[int, Tuple]:
+        """
+        Obraz etapów liczonych w kostce: {stage_id: (trip_id, traveler_pesel, status, city_id,
+        country_id, start_date, end_date)}; etapy bez podróży lub miasta nie są liczone
+        """
+        rows = self.db.execute(
+            select(Stage.id, Stage.trip_id, Trip.traveler_pesel, Trip.status,
+                   Location.city_id, City.country_id, Stage.start_date, Stage.end_date)
+            .join(Trip, Trip.id == Stage.trip_id)
+            .join(Location, Location.id == Stage.location_id)
+            .join(City, City.id == Location.city_id)
+            .where(condition)
+        )
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def apply_changes(self, before: Dict[int, Tuple], stage_ids: Iterable[int]) -> int:
+        """
+        Nanieś na kostkę zmiany etapów: before - obrazy etapów sprzed zmiany (select_stage_images),
+        stage_ids - etapy zmienione lub dodane w tej transakcji (po flush). Stan przed i po
+        liczony jest tylko dla dotkniętych podróży i wszystkich etapów ich podróżnych;
+        różnice liczników (+/-) trafiają do komórek (obszar, dzień, status). Zwraca liczbę
+        zmienionych komórek.
+        """
+        touched = set(before) | set(stage_ids)
+        if not touched:
+            return 0
+        changed = self.select_stage_images(Stage.id.in_(touched))
+        images = list(before.values()) + list(changed.values())
+        trip_ids = {image[0] for image in images}
+        pesels = {image[1] for image in images if image[1] is not None}
+
+        # Pozostałe etapy tych podróży i podróżnych nie zmieniły się - są w obu stanach
+        condition = Stage.trip_id.in_(trip_ids)
+        if pesels:
+            condition = or_(condition, Trip.traveler_pesel.in_(pesels))
+        after = self.select_stage_images(condition)
+        unchanged = [image for stage_id, image in after.items() if stage_id not in touched]
+        deltas = _deltas(
+            _cells(unchanged + list(before.values())),
+            _cells(list(after.values()))
+        )
+        return self._write_deltas(deltas)
+
+    def rebuild(self) -> int:
+        """Odbuduj całą kostkę z tabeli stages (strumieniowo, obszar po obszarze)"""
+        self.db.execute(delete(TripStat))
+        written = 0
+        for scope in (SCOPE_CITY, SCOPE_COUNTRY):
+            column = self._scope_column(scope)
+            query = self._select_stage_rows(scope)\
+                .where(column.is_not(None))\
+                .order_by(column)\
+                .execution_options(yield_per=5000)
+            for scope_id, rows in groupby(self.db.execute(query), key=lambda row: row[0]):
+                written += self._insert(scope, scope_id, _aggregate(row[1:] for row in rows))
+        return written
+
+    def summarize(self, scope: str, scope_ids: Iterable[int], day_from: date, day_to: date,
+                  statuses: Optional[Iterable[TripStatus]] = None) -> List[Tuple[date, TripStatus, int, int]]:
+        """Sumy (day, status, trips, travelers) dla podanych obszarów i zakresu dni"""
+        query = select(
+            TripStat.day,
+            TripStat.status,
+            func.sum(TripStat.trips),
+            func.sum(TripStat.travelers)
+        )\
+            .where(TripStat.scope == scope, TripStat.scope_id.in_(list(scope_ids)))\
+            .where(TripStat.day >= day_from, TripStat.day <= day_to)\
+            .group_by(TripStat.day, TripStat.status)\
+            .order_by(TripStat.day)
+        if statuses is not None:
+            query = query.where(TripStat.status.in_(list(statuses)))
+        return [tuple(row) for row in self.db.execute(query)]
+
+    def _write_deltas(self, deltas: Dict) -> int:
+        """Komórki z różnicami: nowe - INSERT, zmienione - UPDATE po kluczu, opróżnione - DELETE"""
+        inserts, updates, deletes = [], [], {}
+        for (scope, scope_id), cells in deltas.items():
+            days = [day for day, _ in cells]
+            existing = {
+                (day, status): (trips, travelers)
+                for day, status, trips, travelers in self.db.execute(
+                    select(TripStat.day, TripStat.status, TripStat.trips, TripStat.travelers)
+                    .where(TripStat.scope == scope, TripStat.scope_id == scope_id)
+                    .where(TripStat.day >= min(days), TripStat.day <= max(days))
+                )
+            }
+            for (day, status), (trips_delta, travelers_delta) in cells.items():
+                trips, travelers = existing.get((day, status), (0, 0))
+                values = {
+                    "scope": scope,
+                    "scope_id": scope_id,
+                    "day": day,
+                    "status": status,
+                    "trips": trips + trips_delta,
+                    "travelers": travelers + travelers_delta
+                }
+                if values["trips"] <= 0:
+                    deletes.setdefault((scope, scope_id, status), []).append(day)
+                elif (day, status) in existing:
+                    updates.append(values)
+                else:
+                    inserts.append(values)
+
+        for (scope, scope_id, status), days in deletes.items():
+            self.db.execute(
+                delete(TripStat)
+                .where(TripStat.scope == scope, TripStat.scope_id == scope_id, TripStat.status == status)
+                .where(TripStat.day.in_(days))
+            )
+        for i in range(0, len(updates), INSERT_CHUNK_SIZE):
+            self.db.execute(update(TripStat), updates[i:i + INSERT_CHUNK_SIZE])
+        for i in range(0, len(inserts), INSERT_CHUNK_SIZE):
+            self.db.execute(insert(TripStat), inserts[i:i + INSERT_CHUNK_SIZE])
+        return len(inserts) + len(updates) + sum(len(days) for days in deletes.values())
+
+    def _scope_column(self, scope: str):
+        return Location.city_id if scope == SCOPE_CITY else City.country_id
+
+    def _select_stage_rows(self, scope: str):
+        # (scope_id, trip_id, traveler_pesel, status, start_date, end_date)
+        return select(
+            self._scope_column(scope),
+            Stage.trip_id,
+            Trip.traveler_pesel,
+            Trip.status,
+            Stage.start_date,
+            Stage.end_date
+        )\
+            .join(Trip, Trip.id == Stage.trip_id)\
+            .join(Location, Location.id == Stage.location_id)\
+            .join(City, City.id == Location.city_id)
+
+    def _insert(self, scope: str, scope_id: int, cells: Dict) -> int:
+        values = [
+            {
+                "scope": scope,
+                "scope_id": scope_id,
+                "day": day,
+                "status": status,
+                "trips": len(trip_ids),
+                "travelers": len(pesels)
+            }
+            for (day, status), (trip_ids, pesels) in cells.items()
+        ]
+        for i in range(0, len(values), INSERT_CHUNK_SIZE):
+            self.db.execute(insert(TripStat), values[i:i + INSERT_CHUNK_SIZE])
+        return len(values)
+
+
+def _aggregate(rows) -> Dict:
+    """
+    Rozłóż etapy (trip_id, traveler_pesel, status, start_date, end_date) na dni:
+    {(day, status): (zbiór trip_id, zbiór PESEL-i)}
+    """
+    cells: Dict = {}
+    for trip_id, pesel, status, start_date, end_date in rows:
+        day = start_date.date()
+        while day <= end_date.date():
+            trip_ids, pesels = cells.setdefault((day, status), (set(), set()))
+            trip_ids.add(trip_id)
+            if pesel is not None:
+                pesels.add(pesel)
+            day += timedelta(days=1)
+    return cells
+
+
+def _cells(images) -> Dict:
+    """Obrazy etapów (select_stage_images) rozłożone na obszary: {(scope, scope_id): _aggregate(...)}"""
+    by_area: Dict = {}
+    for trip_id, pesel, status, city_id, country_id, start_date, end_date in images:
+        for area in ((SCOPE_CITY, city_id), (SCOPE_COUNTRY, country_id)):
+            if area[1] is not None:
+                by_area.setdefault(area, []).append((trip_id, pesel, status, start_date, end_date))
+    return {area: _aggregate(rows) for area, rows in by_area.items()}
+
+
+def _deltas(before: Dict, after: Dict) -> Dict:
+    """Różnice liczników: {(scope, scope_id): {(day, status): (trips, travelers)}} bez zerowych"""
+    deltas: Dict = {}
+    empty = (set(), set())
+    for area in set(before) | set(after):
+        cells_before, cells_after = before.get(area, {}), after.get(area, {})
+        for cell in set(cells_before) | set(cells_after):
+            trips_before, pesels_before = cells_before.get(cell, empty)
+            trips_after, pesels_after = cells_after.get(cell, empty)
+            delta = (len(trips_after) - len(trips_before), len(pesels_after) - len(pesels_before))
+            if delta != (0, 0):
+                deltas.setdefault(area, {})[cell] = delta
+    return deltas
@@ -0,0 +1,23 @@
+from sqlalchemy.orm import Session
+from app.models import WarningFeed
+from typing import List
+
+
+class WarningFeedRepository:
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_or_create(self, source: str) -> WarningFeed:
+        feed = self.db.get(WarningFeed, source)
+        if feed is None:
+            feed = WarningFeed(source=source, consecutive_failures=0)
+            self.db.add(feed)
+            self.db.flush()
+        return feed
+
+    def find_all(self, sources: List[str]) -> List[WarningFeed]:
+        return self.db.query(WarningFeed)\
+            .filter(WarningFeed.source.in_(sources))\
+            .order_by(WarningFeed.source)\
+            .all()
@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Iterable, List
+from sqlalchemy import DateTime, Select, String, and_, case, cast, exists, insert, literal, select
+from sqlalchemy.orm import Session
+from app.models import (
+    ConsularWarning, Stage, ThreatLevel, Trip, TripStatus,
+    WarningNotification, warning_location_association
+)
+
+CHUNK_SIZE = 1000
+
+# Kolejność poziomów zagrożenia - eskalacja to wzrost rangi
+THREAT_RANKS = {level: rank for rank, level in enumerate(ThreatLevel)}
+ACTIVE_TRIP_STATUSES = (TripStatus.PLANNED, TripStatus.IN_PROGRESS)
+
+
+def threat_rank():
+    return case(
+        {level.name: rank for level, rank in THREAT_RANKS.items()},
+        value=cast(ConsularWarning.threat_level, String)
+    )
+
+
+class WarningMatchRepository:
+    """
+    Dopasowanie ostrzeżeń do podróżnych: lokalizacje ostrzeżenia (warning_location)
+    złączone z trwającymi i przyszłymi etapami w tych lokalizacjach. Całość to zapytania
+    zbiorowe (INSERT ... SELECT), bez iterowania po etapach w Pythonie.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_with_locations(self, external_ids: Iterable[str]) -> List[int]:
+        """ID ostrzeżeń z podanych external_id, które mają przypisane lokalizacje"""
+        external_ids = list(external_ids)
+        warning_ids = []
+        for i in range(0, len(external_ids), CHUNK_SIZE):
+            warning_ids.extend(self.db.execute(
+                select(ConsularWarning.id)
+                .where(ConsularWarning.external_id.in_(external_ids[i:i + CHUNK_SIZE]))
+                .where(exists().where(warning_location_association.c.warning_id == ConsularWarning.id))
+            ).scalars())
+        return sorted(warning_ids)
+
+    def select_matches(self, warning_ids: List[int], at: datetime) -> Select:
+        """
+        Trójki (warning_id, traveler_pesel, threat_rank) do powiadomienia: podróżny ma etap
+        w lokalizacji ważnego ostrzeżenia, który jeszcze się nie skończył, i nie dostał
+        powiadomienia o tym ostrzeżeniu na tym samym lub wyższym poziomie.
+        DISTINCT - kilka etapów w tej samej lokalizacji to jedno powiadomienie.
+        """
+        rank = threat_rank()
+        already_notified = exists().where(and_(
+            WarningNotification.warning_id == ConsularWarning.id,
+            WarningNotification.traveler_pesel == Trip.traveler_pesel,
+            WarningNotification.threat_rank >= rank
+        ))
+        return select(
+            ConsularWarning.id.label("warning_id"),
+            Trip.traveler_pesel.label("traveler_pesel"),
+            rank.label("threat_rank")
+        )\
+            .distinct()\
+            .join(warning_location_association, warning_location_association.c.warning_id == ConsularWarning.id)\
+            .join(Stage, Stage.location_id == warning_location_association.c.location_id)\
+            .join(Trip, Trip.id == Stage.trip_id)\
+            .where(ConsularWarning.id.in_(warning_ids))\
+            .where(ConsularWarning.expiry_date > at)\
+            .where(Stage.end_date >= at)\
+            .where(Trip.status.in_(ACTIVE_TRIP_STATUSES))\
+            .where(~already_notified)
+
+    def record(self, matches: Select, at: datetime) -> int:
+        """Zapisz dopasowania w rejestrze - kolejne przebiegi ich nie powtórzą"""
+        matches = matches.subquery()
+        result = self.db.execute(
+            insert(WarningNotification).from_select(
+                ["warning_id", "traveler_pesel", "threat_rank", "notified_at"],
+                select(matches.c.warning_id, matches.c.traveler_pesel, matches.c.threat_rank, literal(at, DateTime))
+            )
+        )
+        return result.rowcount
+
+    def select_recorded(self, warning_ids: List[int], at: datetime) -> Select:
+        """
+        Wpisy rejestru z przebiegu z chwili at jako (traveler_pesel, message) - powiadomienia
+        i wysyłki wynikają z tych samych wierszy co rejestr. Poziom w treści to poziom z rejestru.
+        """
+        level = case(
+            {rank: level.name for level, rank in THREAT_RANKS.items()},
+            value=WarningNotification.threat_rank
+        )
+        message = literal("Ostrzeżenie konsularne (") + level + literal("): ") + ConsularWarning.name
+        return select(
+            WarningNotification.traveler_pesel.label("traveler_pesel"),
+            message.label("message")
+        )\
+            .join(ConsularWarning, ConsularWarning.id == WarningNotification.warning_id)\
+            .where(WarningNotification.warning_id.in_(warning_ids))\
+            .where(WarningNotification.notified_at == at)
+
+    def recorded_messages(self, warning_ids: List[int], at: datetime) -> List[str]:
+        """Treści powiadomień z przebiegu z chwili at (jedna wysyłka kanałami na treść)"""
+        recorded = self.select_recorded(warning_ids, at).subquery()
+        return list(self.db.execute(select(recorded.c.message).distinct().order_by(recorded.c.message)).scalars())
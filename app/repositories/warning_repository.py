@@ -1,26 +1,146 @@
 # repositories/warning_repository.py
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import Column, MetaData, String, Table, exists, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
 from app.models import ConsularWarning
 from app.database.database import SessionLocal
+from app.repositories.pagination import Paginator, PageParams, Page, PaginationError
+
+UPSERT_CHUNK_SIZE = 1000
+
+# Kolumny nadpisywane przy aktualizacji (publication_date zostaje z pierwszego importu)
+UPSERT_COLUMNS = ("name", "content", "warning_type", "threat_level", "expiry_date", "content_hash", "source")
+
+# Identyfikatory widziane w bieżącym imporcie; tabela tymczasowa (per połączenie), poza Base.metadata
+seen_warnings = Table(
+    "warning_import_seen",
+    MetaData(),
+    Column("external_id", String, nullable=False, index=True),
+    prefixes=["TEMPORARY"]
+)
+
+
+# Filtr statusu (względem bieżącej chwili) obsługiwany poza Paginatorem
+WARNING_STATUSES = ("active", "expired")
+
 
 class WarningRepository:
+
+    paginator = Paginator(
+        key=ConsularWarning.id,
+        sortable={"id": ConsularWarning.id, "expiry_date": ConsularWarning.expiry_date},
+        filterable={"threat_level": ConsularWarning.threat_level, "warning_type": ConsularWarning.warning_type},
+        default_sort="-expiry_date"
+    )
+
     def get_all(self):
 
-        with SessionLocal() as session:
+        with SessionLocal.session_factory() as session:
             return session.query(ConsularWarning).all()
 
     def find_by_external_id(self, ext_id):
-        with SessionLocal() as session:
+        with SessionLocal.session_factory() as session:
             return session.query(ConsularWarning).filter_by(external_id=ext_id).first()
 
     def add(self, data):
-        with SessionLocal() as session:
+        with SessionLocal.session_factory() as session:
             new_w = ConsularWarning(**data)
             session.add(new_w)
             session.commit()
 
     def update(self, ext_id, data):
-        with SessionLocal() as session:
+        with SessionLocal.session_factory() as session:
             session.query(ConsularWarning).filter_by(external_id=ext_id).update(data)
             session.commit()
 
-warning_repo = WarningRepository()
\ No newline at end of file
+    def find_page(self, session: Session, params: PageParams, at: datetime) -> Page:
+        """Strona ostrzeżeń; filtr status=active|expired porównuje expiry_date z chwilą at"""
+        filters = dict(params.filters)
+        status = filters.pop("status", None)
+        query = session.query(ConsularWarning)
+        if status == "active":
+            query = query.filter(ConsularWarning.expiry_date > at)
+        elif status == "expired":
+            query = query.filter(ConsularWarning.expiry_date <= at)
+        elif status is not None:
+            raise PaginationError(f"Nieprawidłowy status '{status}'. Dozwolone: {list(WARNING_STATUSES)}")
+        return self.paginator.paginate(query, PageParams(params.limit, params.cursor, params.sort, filters))
+
+    # --- Import hurtowy: operacje w transakcji przekazanej przez wywołującego ---
+
+    def fetch_hashes(self, session: Session, external_ids: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """{external_id: (content_hash, source)} istniejących ostrzeżeń z podanej paczki, jednym zapytaniem"""
+        rows = session.execute(
+            select(ConsularWarning.external_id, ConsularWarning.content_hash, ConsularWarning.source)
+            .where(ConsularWarning.external_id.in_(list(external_ids)))
+        )
+        return {external_id: (content_hash, source) for external_id, content_hash, source in rows}
+
+    def upsert_many(self, session: Session, rows: List[Dict]) -> None:
+        """
+        INSERT ... ON CONFLICT (external_id) DO UPDATE w paczkach. Konflikt może się zdarzyć
+        mimo wcześniejszego porównania, jeśli równolegle działa drugi import.
+        """
+        dialect = session.get_bind().dialect.name
+        for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[i:i + UPSERT_CHUNK_SIZE]
+            if dialect in ("sqlite", "postgresql"):
+                dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+                stmt = dialect_insert(ConsularWarning)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[ConsularWarning.external_id],
+                    set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS}
+                )
+                session.execute(stmt, chunk)
+            else:
+                self._insert_or_update(session, chunk)
+
+    def create_seen_table(self, session: Session) -> None:
+        connection = session.connection()
+        # W SQLite DDL nie jest wycofywany - po przerwanym imporcie tabela może już istnieć
+        seen_warnings.create(connection, checkfirst=True)
+        connection.execute(seen_warnings.delete())
+
+    def mark_seen(self, session: Session, external_ids: Iterable[str]) -> None:
+        session.execute(insert(seen_warnings), [{"external_id": ext_id} for ext_id in external_ids])
+
+    def drop_seen_table(self, session: Session) -> None:
+        seen_warnings.drop(session.connection())
+
+    def expire_unseen(self, session: Session, source: str, at: datetime) -> int:
+        """
+        Ostrzeżenia feedu source ważne, a nieobecne w feedzie, wygasają teraz zamiast znikać
+        (zostają w historii). Jeden UPDATE z antyzłączeniem do tabeli widzianych identyfikatorów.
+        Skrót treści jest zerowany - ostrzeżenie, które wróci do feedu bez zmian, zostanie
+        zaktualizowane (z datą ważności z feedu), a nie uznane za niezmienione.
+        """
+        result = session.execute(
+            update(ConsularWarning)
+            .where(ConsularWarning.source == source)
+            .where(ConsularWarning.expiry_date > at)
+            .where(~exists().where(seen_warnings.c.external_id == ConsularWarning.external_id))
+            .values(expiry_date=at, content_hash=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def _insert_or_update(self, session: Session, rows: List[Dict]) -> None:
+        """Dialekty bez ON CONFLICT: nowe wiersze INSERT, istniejące UPDATE po kluczu głównym"""
+        ids = dict(session.execute(
+            select(ConsularWarning.external_id, ConsularWarning.id)
+            .where(ConsularWarning.external_id.in_([row["external_id"] for row in rows]))
+        ).all())
+        new_rows = [row for row in rows if row["external_id"] not in ids]
+        changed = [
+            {"id": ids[row["external_id"]], **{column: row[column] for column in UPSERT_COLUMNS}}
+            for row in rows if row["external_id"] in ids
+        ]
+        if new_rows:
+            session.execute(insert(ConsularWarning), new_rows)
+        if changed:
+            session.execute(update(ConsularWarning), changed)
+
+
+warning_repo = WarningRepository()
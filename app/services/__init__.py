@@ -7,6 +7,7 @@ from .notification_service import NotificationService
 from .evacuation_service import EvacuationService
 from .stage_service import StageService
 from .country_service import CountryService, CityService
+from .trip_stats_service import TripStatsService
 
 __all__ = [
     'TravelerService',
@@ -19,4 +20,5 @@ __all__ = [
     'StageService',
     'CountryService',
     'CityService',
+    'TripStatsService',
 ]
@@ -0,0 +1,234 @@
+"""
+Kolejka zadań wysyłki alertów - trwała (tabela alert_jobs) z pulą wątków roboczych
+"""
+import json
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+from app.database.database import SessionLocal
+from app.models import AlertJob, AlertJobStatus
+from app.repositories.alert_job_repository import AlertJobRepository
+from app.services.notification_service import NotificationService
+
+
+class AlertJobNotFoundError(Exception):
+    pass
+
+
+JOB_EVACUATION = "evacuation"
+JOB_PUSH = "push"
+JOB_WARNING = "warning"
+
+
+class AlertDispatcher:
+    """
+    Zadania zapisywane są w bazie przed zleceniem ich puli wątków, więc po restarcie
+    serwera niedokończone zadania są wznawiane (recover). ALERT_WORKERS = 0 oznacza
+    wykonanie synchroniczne w wątku żądania (przydatne lokalnie i w testach).
+    Wykonywane zadanie jest dzierżawione przez proces (claimed_by + heartbeat_at odnawiany
+    co lease_seconds / 3); wznawiane są tylko zadania z wygasłą dzierżawą, więc kilka
+    workerów lub restart obok działającego procesu nie wysyła tego samego alertu dwa razy.
+    Zadanie ma dwa etapy: zapis powiadomień (written_at + plan wysyłek) i wysyłkę kanałami
+    zewnętrznymi. Zakończone jest dopiero po wysyłce; nieudane kanały wracają do kolejki
+    (najwyżej ALERT_DELIVERY_ATTEMPTS prób) bez ponownego zapisu powiadomień.
+    """
+
+    def __init__(self):
+        self.workers = 0
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.session_factory = SessionLocal.session_factory
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = 120.0
+        self.delivery_attempts = 5
+        self.submitted: Set[int] = set()
+        self.lock = threading.Lock()
+        self.heartbeat_thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+
+    def init_app(self, app):
+        app.config.setdefault("ALERT_WORKERS", int(os.environ.get("ALERT_WORKERS", 4)))
+        app.config.setdefault("ALERT_JOB_LEASE_SECONDS", float(os.environ.get("ALERT_JOB_LEASE_SECONDS", 120)))
+        app.config.setdefault("ALERT_DELIVERY_ATTEMPTS", int(os.environ.get("ALERT_DELIVERY_ATTEMPTS", 5)))
+        self.workers = app.config["ALERT_WORKERS"]
+        self.lease_seconds = app.config["ALERT_JOB_LEASE_SECONDS"]
+        self.delivery_attempts = app.config["ALERT_DELIVERY_ATTEMPTS"]
+        if self.workers > 0 and self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="alert-worker")
+        self.recover()
+        # Również w trybie synchronicznym: zadanie wykonywane w wątku żądania musi odnawiać dzierżawę
+        if self.heartbeat_thread is None:
+            self.stop_event.clear()
+            self.heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="alert-heartbeat", daemon=True)
+            self.heartbeat_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.heartbeat_thread is not None:
+            self.heartbeat_thread.join()
+            self.heartbeat_thread = None
+
+    def enqueue(self, db: Session, kind: str, payload: Dict) -> int:
+        job = AlertJob(kind=kind, payload=json.dumps(payload), status=AlertJobStatus.QUEUED)
+        AlertJobRepository(db).create(job)
+        db.commit()
+        job_id = job.id
+        self._submit(job_id)
+        return job_id
+
+    def recover(self) -> int:
+        """Wznów zadania z wygasłą dzierżawą (proces wykonawcy zginął) i zadania czekające w kolejce"""
+        db = self.session_factory()
+        try:
+            repository = AlertJobRepository(db)
+            repository.requeue_expired(self.lease_seconds)
+            db.commit()
+            job_ids = [job.id for job in repository.find_by_status(AlertJobStatus.QUEUED)]
+        finally:
+            db.close()
+
+        # Zadania już zleconej puli (jeszcze nie rozpoczęte) nie są zlecane ponownie
+        with self.lock:
+            job_ids = [job_id for job_id in job_ids if job_id not in self.submitted]
+        for job_id in job_ids:
+            self._submit(job_id)
+        if job_ids:
+            print(f"Wznowiono {len(job_ids)} zadań wysyłki alertów")
+        return len(job_ids)
+
+    def get_job(self, db: Session, job_id: int) -> Dict:
+        job = AlertJobRepository(db).find_by_id(job_id)
+        if not job:
+            raise AlertJobNotFoundError("Zadanie nie zostało znalezione")
+        return self._job_to_dict(job)
+
+    def _submit(self, job_id: int):
+        if self.executor is None:
+            self._run(job_id)
+        else:
+            with self.lock:
+                self.submitted.add(job_id)
+            self.executor.submit(self._run, job_id)
+
+    def _heartbeat_loop(self):
+        interval = self.lease_seconds / 3
+        while not self.stop_event.wait(interval):
+            try:
+                db = self.session_factory()
+                try:
+                    AlertJobRepository(db).heartbeat(self.holder)
+                    db.commit()
+                finally:
+                    db.close()
+                # Przy okazji przejmij zadania procesów, które przestały odnawiać dzierżawę;
+                # bez puli wątków przejęte zadanie wykonałoby się tutaj i wstrzymało odnawianie
+                if self.executor is not None:
+                    self.recover()
+            except Exception as e:
+                # Np. baza chwilowo zablokowana - spróbujemy przy następnym obiegu
+                print(f"Błąd odnawiania dzierżawy zadań alertów: {e}")
+
+    def _run(self, job_id: int):
+        with self.lock:
+            self.submitted.discard(job_id)
+        # Własna sesja (poza scoped_session), niezależna od sesji żądania HTTP
+        db = self.session_factory()
+        repository = AlertJobRepository(db)
+        deliveries = None
+        attempts = 0
+        try:
+            if not repository.claim(job_id, self.holder):
+                db.rollback()
+                return
+            db.commit()
+
+            job = repository.find_by_id(job_id)
+            service = NotificationService(db)
+            attempts = job.delivery_attempts or 0
+            if job.written_at is not None:
+                # Powiadomienia zapisał poprzedni przebieg - zostały tylko wysyłki
+                deliveries = json.loads(job.deliveries or "[]")
+            else:
+                written = self._write_notifications(db, repository, service, job)
+                # Powiadomienia, plan wysyłek i dzierżawa w jednej transakcji; jeśli dzierżawa
+                # wygasła i zadanie przejął inny proces, powiadomienia tego przebiegu są wycofywane
+                plan = service.delivery_plan()
+                if not repository.mark_written(job_id, self.holder, written, json.dumps(plan)):
+                    db.rollback()
+                    print(f"Zadanie wysyłki {job_id}: dzierżawa utracona, wynik odrzucony")
+                    return
+                db.commit()
+                deliveries = plan
+
+            # Kanały zewnętrzne (SMS / e-mail / push) dopiero po zapisaniu powiadomień;
+            # zadanie kończy się po wysyłce, więc awaria w jej trakcie nie gubi wiadomości
+            remaining, stats = service.deliver_plan(deliveries)
+            print(f"Zadanie wysyłki {job_id}: dostarczono {stats}")
+            self._close_delivery(db, repository, job_id, remaining, attempts,
+                                 f"Niedostarczone kanały: {[item['channels'] for item in remaining]}")
+        except Exception as e:
+            db.rollback()
+            if deliveries is not None:
+                self._close_delivery(db, repository, job_id, deliveries, attempts, str(e))
+            elif repository.fail(job_id, self.holder, str(e)):
+                db.commit()
+            print(f"Błąd zadania wysyłki {job_id}: {e}")
+        finally:
+            db.close()
+
+    def _write_notifications(self, db: Session, repository: AlertJobRepository,
+                             service: NotificationService, job: AlertJob) -> int:
+        kind, payload = job.kind, json.loads(job.payload)
+
+        def on_resolved(count: int):
+            repository.set_recipients_resolved(job.id, self.holder, count)
+            db.commit()
+
+        if kind == JOB_EVACUATION:
+            return service.fan_out_evacuation(payload["city_id"], payload["description"], on_resolved)
+        if kind == JOB_PUSH:
+            return service.send_push(payload["message"], payload.get("country_name"), on_resolved)
+        if kind == JOB_WARNING:
+            return service.notify_warning_matches(payload["warning_ids"], on_resolved)
+        raise ValueError(f"Nieznany typ zadania: {kind}")
+
+    def _close_delivery(self, db: Session, repository: AlertJobRepository, job_id: int,
+                        remaining: List[Dict], attempts: int, error: str) -> None:
+        """Zakończ zadanie albo oddaj niewysłaną część planu do ponowienia (recover)"""
+        if not remaining:
+            closed = repository.finish(job_id, self.holder)
+        elif attempts + 1 < self.delivery_attempts:
+            closed = repository.retry_delivery(job_id, self.holder, json.dumps(remaining), error)
+        else:
+            closed = repository.finish(job_id, self.holder, error=error)
+        if closed:
+            db.commit()
+        else:
+            db.rollback()
+
+    def _job_to_dict(self, job: AlertJob) -> Dict:
+        throughput = None
+        if job.started_at and job.finished_at:
+            elapsed = (job.finished_at - job.started_at).total_seconds()
+            throughput = round(job.notifications_written / elapsed, 1) if elapsed > 0 else None
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status.value,
+            "recipients_resolved": job.recipients_resolved,
+            "notifications_written": job.notifications_written,
+            "notifications_per_second": throughput,
+            "error": job.error,
+            "claimed_by": job.claimed_by,
+            "written_at": job.written_at.isoformat() if job.written_at else None,
+            "delivery_attempts": job.delivery_attempts or 0,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+
+
+alert_dispatcher = AlertDispatcher()
@@ -2,10 +2,11 @@
 Service dla Companion - logika biznesowa
 """
 from sqlalchemy.orm import Session
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List
 from app.models import Companion, Traveler
 from app.repositories.companion_repository import CompanionRepository
 from app.repositories.traveler_repository import TravelerRepository
+from app.repositories.pagination import PageParams
 
 
 class CompanionServiceError(Exception):
@@ -67,6 +68,12 @@ class CompanionService:
         companions = self.repository.get_all()
         return [self._companion_to_dict(c) for c in companions]
     
+    def get_companions_page(self, params: PageParams) -> Dict:
+        return self.repository.find_page(params).to_dict(self._companion_to_dict)
+    
+    def iter_companions(self, params: PageParams) -> Iterator[Dict]:
+        return (self._companion_to_dict(c) for c in self.repository.iter_rows(params))
+    
     def get_companions_by_traveler_pesel(self, traveler_pesel: str) -> Dict:
         traveler = self.traveler_repository.find_by_pesel(traveler_pesel)
         if not traveler:
@@ -5,8 +5,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import Dict, Optional, List
 from app.models import Country, City
+from app.cache.reference_cache import reference_cache, REFERENCE_VERSION, CountryRef
+from app.cache.version_clock import version_clock
 from app.repositories.country_repository import CountryRepository
 from app.repositories.city_repository import CityRepository
+from app.repositories.data_version_repository import DataVersionRepository
 
 
 class CountryServiceError(Exception):
@@ -55,8 +58,9 @@ class CountryService:
         if not country_data or "name" not in country_data:
             raise ValueError("Field 'name' is required")
         
-        # Sprawdzenie czy kraj już istnieje
-        existing = self.repository.find_by_name(country_data["name"])
+        # Sprawdzenie czy kraj już istnieje (kraj dodany przed chwilą w innym procesie
+        # może jeszcze nie być w pamięci - wtedy zatrzyma go unikalność nazwy w bazie)
+        existing = reference_cache.country_by_name(self.db, country_data["name"])
         if existing:
             raise CountryAlreadyExistsError("Kraj z tą nazwą już istnieje")
         
@@ -65,7 +69,10 @@ class CountryService:
         
         try:
             self.repository.create(new_country)
+            DataVersionRepository(self.db).bump(REFERENCE_VERSION)
             self.db.commit()
+            reference_cache.invalidate()
+            version_clock.invalidate()
             return {
                 "id": new_country.id,
                 "name": new_country.name
@@ -79,27 +86,21 @@ class CountryService:
     
     def get_country_by_id(self, country_id: int) -> Optional[Dict]:
         """Pobierz kraj po ID z miastami"""
-        country = self.repository.find_by_id(country_id)
+        country = reference_cache.country(self.db, country_id)
         if not country:
             return None
-        
+        return self._country_to_dict(country)
+    
+    def get_all_countries(self) -> List[Dict]:
+        """Pobierz wszystkie kraje z miastami (z pamięci danych referencyjnych)"""
+        return [self._country_to_dict(country) for country in reference_cache.countries(self.db)]
+    
+    def _country_to_dict(self, country: CountryRef) -> Dict:
         return {
             "id": country.id,
             "name": country.name,
             "cities": [{"id": c.id, "name": c.name} for c in country.cities]
         }
-    
-    def get_all_countries(self) -> List[Dict]:
-        """Pobierz wszystkie kraje z miastami"""
-        countries = self.repository.get_all()
-        return [
-            {
-                "id": country.id,
-                "name": country.name,
-                "cities": [{"id": c.id, "name": c.name} for c in country.cities]
-            }
-            for country in countries
-        ]
 
 
 class CityService:
@@ -135,7 +136,10 @@ class CityService:
         
         try:
             self.city_repository.create(new_city)
+            DataVersionRepository(self.db).bump(REFERENCE_VERSION)
             self.db.commit()
+            reference_cache.invalidate()
+            version_clock.invalidate()
             return {
                 "id": new_city.id,
                 "name": new_city.name,
@@ -147,7 +151,7 @@ class CityService:
     
     def get_all_cities(self) -> List[Dict]:
         """Pobierz wszystkie miasta"""
-        cities = self.city_repository.get_all()
+        cities = reference_cache.cities(self.db)
         return [
             {
                 "id": city.id,
@@ -4,6 +4,10 @@ from app.models import Evacuation, EvacuationArea, City, Country
 from app.repositories.evacuation_repository import EvacuationRepository
 
 
+# Licznik w data_versions zwiększany przy każdej zmianie ewakuacji lub ich obszarów
+EVACUATIONS_VERSION = "evacuations"
+
+
 class EvacuationServiceError(Exception):
     pass
 
@@ -19,28 +23,27 @@ class EvacuationService:
         self.repository = EvacuationRepository(db)
     
     def get_evacuation_by_id(self, evacuation_id: int) -> Optional[Dict]:
-        evacuation = self.repository.find_by_id(evacuation_id)
+        evacuation = self.repository.find_by_id_with_areas(evacuation_id)
         if not evacuation:
             return None
         return self._evacuation_to_dict(evacuation)
     
     def get_all_evacuations(self) -> List[Dict]:
-        evacuations = self.repository.get_all()
+        evacuations = self.repository.get_all_with_areas()
         return [self._evacuation_to_dict(e) for e in evacuations]
     
     def _evacuation_to_dict(self, evacuation: Evacuation) -> Dict:
-        # Pobierz obszary ewakuacji
-        areas = self.db.query(EvacuationArea).filter_by(evacuation_id=evacuation.id).all()
+        # Obszary, miasta i kraje są już załadowane (selectinload w repository)
         cities = []
-        countries = []
+        countries = {}
         
-        for area in areas:
-            city = self.db.query(City).filter_by(id=area.city_id).first()
+        for area in sorted(evacuation.evacuation_areas, key=lambda a: a.id):
+            city = area.city
             if city:
                 cities.append({"id": city.id, "name": city.name})
-                country = self.db.query(Country).filter_by(id=city.country_id).first()
-                if country and country.id not in [c["id"] for c in countries]:
-                    countries.append({"id": country.id, "name": country.name})
+                country = city.country
+                if country and country.id not in countries:
+                    countries[country.id] = {"id": country.id, "name": country.name}
         
         return {
             "id": evacuation.id,
@@ -50,5 +53,5 @@ class EvacuationService:
             "end_date": evacuation.end_date.isoformat() if evacuation.end_date else None,
             "status": evacuation.status.value if evacuation.status else None,
             "cities": cities,
-            "countries": countries
+            "countries": list(countries.values())
         }
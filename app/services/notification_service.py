@@ -1,10 +1,20 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import select, func, Select
 from datetime import datetime
-from typing import Dict, Optional, List
-from app.models import Notification, Traveler, Trip, Stage, Location, City, Evacuation, EvacuationArea
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
+from app.models import Notification, Evacuation, EvacuationArea, TripStatus
 from app.repositories.notification_repository import NotificationRepository
 from app.repositories.traveler_repository import TravelerRepository
+from app.repositories.presence_repository import PresenceRepository
+from app.repositories.warning_match_repository import WarningMatchRepository
+from app.repositories.pagination import PageParams
+from app.cache.user_cache import user_cache
+from app.cache.version_clock import version_clock
+from app.cache.reference_cache import reference_cache
+from app.repositories.data_version_repository import DataVersionRepository
+from app.services.evacuation_service import EVACUATIONS_VERSION
+from app.delivery import DeliveryEngine, get_delivery_engine
+from app.delivery.engine import CHANNELS
 
 
 class NotificationServiceError(Exception):
@@ -21,10 +31,15 @@ class TravelerNotFoundError(NotificationServiceError):
 
 class NotificationService:
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, delivery_engine: Optional[DeliveryEngine] = None):
         self.db = db
         self.repository = NotificationRepository(db)
         self.traveler_repository = TravelerRepository(db)
+        self.presence_repository = PresenceRepository(db)
+        self.delivery_engine = delivery_engine
+        # Wysyłki kanałami zewnętrznymi czekają na commit powiadomień (deliver_pending);
+        # plan to dane JSON - odbiorcy wynikają z zapisanych powiadomień (created_at + treść)
+        self._pending_deliveries: List[Dict] = []
     
     def create_notification(self, notification_data: Dict) -> Dict:
         required_fields = ["traveler_pesel", "message"]
@@ -49,7 +64,8 @@ class NotificationService:
         
         return self._notification_to_dict(notification)
     
-    def create_evacuation_notifications(self, evacuation_data: Dict) -> Dict:
+    def create_evacuation(self, evacuation_data: Dict) -> Evacuation:
+        """Utwórz ewakuację wraz z obszarem (bez wysyłki powiadomień)"""
         required_fields = ["city_id", "description"]
         missing_fields = [field for field in required_fields if field not in evacuation_data]
         if missing_fields:
@@ -71,32 +87,113 @@ class NotificationService:
         # Utworzenie obszaru ewakuacji
         area = EvacuationArea(evacuation_id=new_evacuation.id, city_id=city_id)
         self.db.add(area)
+        DataVersionRepository(self.db).bump(EVACUATIONS_VERSION)
+        self.db.commit()
+        version_clock.invalidate()
         
-        # Znajdź podróżnych w tym mieście
-        current_time = datetime.now()
-        affected_travelers = self.db.query(Traveler).join(Trip).join(Stage).join(Location).join(City)\
-            .filter(City.id == city_id)\
-            .filter(and_(Stage.start_date <= current_time, Stage.end_date >= current_time))\
-            .all()
-        
+        return new_evacuation
+    
+    def fan_out_evacuation(self, city_id: int, description: str,
+                           on_resolved: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Utwórz powiadomienia dla podróżnych przebywających teraz w mieście.
+        Zapis odbywa się jednym INSERT ... SELECT; commit należy do wywołującego.
+        """
         # Pobierz nazwę miasta
-        city_obj = self.db.query(City).filter(City.id == city_id).first()
+        city_obj = reference_cache.city(self.db, city_id)
         city_name = city_obj.name if city_obj else "Twojej lokalizacji"
         
-        # Utworzenie powiadomień
-        notified_count = 0
-        for traveler in affected_travelers:
-            msg = f"ALERT: W {city_name} wystąpiło zagrożenie: {description}. Postępuj zgodnie z instrukcjami."
-            
-            notification = Notification(
-                traveler_pesel=traveler.pesel,
-                message=msg,
-                created_at=current_time
-            )
-            self.db.add(notification)
-            notified_count += 1
+        current_time = datetime.now()
+        msg = f"ALERT: W {city_name} wystąpiło zagrożenie: {description}. Postępuj zgodnie z instrukcjami."
+        recipients = self.presence_repository.select_pesels_in_city(city_id, current_time)
+        count = self._notify_recipients(recipients, msg, current_time, on_resolved)
+        self._plan_delivery(current_time, msg, f"ALERT: {city_name}", CHANNELS)
+        return count
+    
+    def send_push(self, message: str, country_name: Optional[str] = None,
+                  on_resolved: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Wyślij komunikat PUSH do podróżnych z włączoną preferencją push,
+        opcjonalnie tylko do przebywających teraz w danym kraju. Commit należy do wywołującego.
+        """
+        if not message:
+            raise ValueError("Brak treści wiadomości")
         
+        current_time = datetime.now()
+        present_in = None
+        if country_name:
+            present_in = self.presence_repository.select_pesels_in_country(
+                country_name, current_time, TripStatus.IN_PROGRESS
+            )
+        recipients = self.traveler_repository.select_push_recipients(present_in)
+        count = self._notify_recipients(recipients, message, current_time, on_resolved)
+        self._plan_delivery(current_time, message, "Odyseusz - komunikat", ("push",))
+        return count
+    
+    def notify_warning_matches(self, warning_ids: List[int],
+                               on_resolved: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Powiadom podróżnych z etapami w lokalizacjach nowych lub podniesionych ostrzeżeń.
+        Każdy podróżny dostaje jedno powiadomienie na ostrzeżenie i poziom zagrożenia -
+        ponownie dopiero po eskalacji. Commit należy do wywołującego.
+        """
+        current_time = datetime.now()
+        match_repository = WarningMatchRepository(self.db)
+        # Dopasowanie liczone raz: najpierw rejestr, powiadomienia i wysyłki z jego wierszy
+        # (etap zatwierdzony w międzyczasie nie rozjedzie rejestru z powiadomieniami)
+        count = match_repository.record(match_repository.select_matches(warning_ids, current_time), current_time)
+        if on_resolved is not None:
+            on_resolved(count)
+        self.repository.create_messages(match_repository.select_recorded(warning_ids, current_time), current_time)
+
+        # Kanały zewnętrzne: jedna wysyłka na treść (ostrzeżenie i poziom), do podróżnych z tego przebiegu
+        for message in match_repository.recorded_messages(warning_ids, current_time):
+            self._plan_delivery(current_time, message, "Ostrzeżenie konsularne", CHANNELS)
+        return count
+    
+    def delivery_plan(self) -> List[Dict]:
+        """Oczekujące wysyłki jako dane JSON - do zapisania w zadaniu przed ich wykonaniem"""
+        return list(self._pending_deliveries)
+    
+    def deliver_pending(self) -> Dict[str, Dict[str, int]]:
+        """
+        Dostarcz zatwierdzone powiadomienia kanałami SMS / e-mail / push zgodnie
+        z preferencjami podróżnych. Wywoływać po commit. Zwraca statystyki per kanał.
+        """
+        pending, self._pending_deliveries = self._pending_deliveries, []
+        _, totals = self.deliver_plan(pending)
+        return totals
+    
+    def deliver_plan(self, plan: List[Dict]) -> Tuple[List[Dict], Dict[str, Dict[str, int]]]:
+        """
+        Wykonaj wysyłki z planu. Odbiorcy to podróżni z powiadomieniami o tej treści
+        zapisanymi w chwili created_at. Zwraca (część planu z kanałami, w których paczki
+        się nie powiodły, statystyki per kanał).
+        """
+        engine = self.delivery_engine or get_delivery_engine()
+        remaining: List[Dict] = []
+        totals: Dict[str, Dict[str, int]] = {}
+        for item in plan:
+            recipients = self.repository.select_recipients(datetime.fromisoformat(item["created_at"]), item["message"])
+            contacts = self.traveler_repository.iter_contacts(recipients)
+            stats = engine.deliver(contacts, item["message"], item["subject"], item["channels"])
+            failed = [channel for channel, counts in stats.items() if counts["failed"]]
+            if failed:
+                remaining.append(dict(item, channels=failed))
+            for channel, counts in stats.items():
+                total = totals.setdefault(channel, {"sent": 0, "failed": 0, "batches": 0})
+                for key, value in counts.items():
+                    total[key] += value
+        return remaining, totals
+    
+    def create_evacuation_notifications(self, evacuation_data: Dict) -> Dict:
+        new_evacuation = self.create_evacuation(evacuation_data)
+        notified_count = self.fan_out_evacuation(
+            int(evacuation_data["city_id"]),
+            evacuation_data["description"]
+        )
         self.db.commit()
+        self.deliver_pending()
         
         return {
             "message": "Alarm ogłoszony pomyślnie",
@@ -114,6 +211,12 @@ class NotificationService:
         notifications = self.repository.get_all()
         return [self._notification_to_dict(n) for n in notifications]
     
+    def get_notifications_page(self, params: PageParams) -> Dict:
+        return self.repository.find_page(params).to_dict(self._notification_to_dict)
+    
+    def iter_notifications(self, params: PageParams) -> Iterator[Dict]:
+        return (self._notification_to_dict(n) for n in self.repository.iter_rows(params))
+    
     def get_notifications_by_traveler_pesel(self, traveler_pesel: str) -> List[Dict]:
         notifications = self.repository.find_by_traveler_pesel(traveler_pesel)
         return [self._notification_to_dict(n) for n in notifications]
@@ -151,9 +254,22 @@ class NotificationService:
         
         self.traveler_repository.update(traveler)
         self.db.commit()
+        user_cache.invalidate(traveler_pesel)
         
         return {"message": "Zapisano preferencje"}
     
+    def _plan_delivery(self, created_at: datetime, message: str, subject: str, channels) -> None:
+        item = {"created_at": created_at.isoformat(), "message": message, "subject": subject,
+                "channels": list(channels)}
+        if item not in self._pending_deliveries:
+            self._pending_deliveries.append(item)
+    
+    def _notify_recipients(self, recipients: Select, message: str, created_at: datetime,
+                           on_resolved: Optional[Callable[[int], None]]) -> int:
+        if on_resolved is not None:
+            on_resolved(self.db.execute(select(func.count()).select_from(recipients.subquery())).scalar())
+        return self.repository.create_for_recipients(recipients, message, created_at)
+    
     def _notification_to_dict(self, notification: Notification) -> Dict:
         """Konwertuj obiekt Notification na słownik"""
         return {
@@ -0,0 +1,80 @@
+"""
+Projekcje utrzymywane przy każdym zapisie etapów i podróży:
+tabela traveler_presence, kostka trip_stats, licznik wersji "stages" z dziennikiem stage_changes
+i indeks etapów w pamięci
+"""
+from typing import Dict, Iterable, Set, Tuple
+from sqlalchemy.orm import Session
+from app.cache.stage_index import stage_index, STAGES_VERSION
+from app.repositories.presence_repository import PresenceRepository
+from app.repositories.data_version_repository import DataVersionRepository
+from app.repositories.stage_change_repository import StageChangeRepository
+from app.repositories.trip_stats_repository import TripStatsRepository
+from app.models import Stage
+
+
+class StageProjections:
+    """
+    Serwisy zgłaszają zmiany przed commitem (po flush), a następnie wołają commit(),
+    który zatwierdza transakcję i nanosi zmiany na indeks w pamięci.
+    Kostka trip_stats zmieniana jest o różnice między stanem przed i po zmianie, dlatego
+    przed zmianą istniejącego etapu trzeba wywołać stages_changing(), a przed zmianą
+    statusu lub podróżnego podróży - trip_changing() (zapamiętują obraz sprzed zmiany).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.presence_repository = PresenceRepository(db)
+        self.version_repository = DataVersionRepository(db)
+        self.change_repository = StageChangeRepository(db)
+        self.stats_repository = TripStatsRepository(db)
+        self.stage_ids: Set[int] = set()
+        self.trip_ids: Set[int] = set()
+        # Obrazy etapów sprzed zmiany i etapy zapisane w tej transakcji (dla trip_stats)
+        self.stat_images: Dict[int, Tuple] = {}
+        self.stat_stage_ids: Set[int] = set()
+
+    def stages_changing(self, stage_ids: Iterable[int]) -> None:
+        self._remember_stats(Stage.id.in_(list(stage_ids)))
+
+    def stages_saved(self, stage_ids: Iterable[int]) -> None:
+        stage_ids = list(stage_ids)
+        self.presence_repository.refresh_stages(stage_ids)
+        self.stat_stage_ids.update(stage_ids)
+        self.stage_ids.update(stage_ids)
+
+    def stages_deleted(self, stage_ids: Iterable[int]) -> None:
+        stage_ids = list(stage_ids)
+        self.presence_repository.delete_for_stages(stage_ids)
+        self._remember_stats(Stage.id.in_(stage_ids))
+        self.stage_ids.update(stage_ids)
+
+    def trip_changing(self, trip_id: int) -> None:
+        self._remember_stats(Stage.trip_id == trip_id)
+
+    def trip_saved(self, trip_id: int) -> None:
+        self.presence_repository.refresh_trip(trip_id)
+        self.stat_stage_ids.update(stage_id for stage_id, in self.db.query(Stage.id).filter(Stage.trip_id == trip_id))
+        self.trip_ids.add(trip_id)
+
+    def trip_deleted(self, trip_id: int) -> None:
+        self.presence_repository.delete_for_trip(trip_id)
+        self._remember_stats(Stage.trip_id == trip_id)
+        self.trip_ids.add(trip_id)
+
+    def commit(self) -> None:
+        # Sesje mają autoflush=False - bez flush usunięcia (db.delete) nie dotarłyby
+        # do bazy przed naniesieniem zmian na kostkę i usunięte etapy/podróże nadal by się liczyły
+        self.db.flush()
+        self.stats_repository.apply_changes(self.stat_images, self.stat_stage_ids)
+        self.stat_images, self.stat_stage_ids = {}, set()
+        version = self.version_repository.bump(STAGES_VERSION)
+        self.change_repository.record(version, self.stage_ids, self.trip_ids)
+        self.db.commit()
+        stage_index.apply(self.db, self.stage_ids, self.trip_ids, version)
+        self.stage_ids, self.trip_ids = set(), set()
+
+    def _remember_stats(self, condition) -> None:
+        """Obraz etapów sprzed zmiany; pierwszy zapamiętany obraz etapu wygrywa"""
+        for stage_id, image in self.stats_repository.select_stage_images(condition).items():
+            self.stat_images.setdefault(stage_id, image)
@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Dict, Optional, List
-from app.models import Stage, Trip, Location
+from app.models import Stage, Trip
+from app.cache.reference_cache import reference_cache
 from app.repositories.stage_repository import StageRepository
+from app.repositories.pagination import PageParams
+from app.services.stage_projections import StageProjections
 
 
 class StageServiceError(Exception):
@@ -26,6 +29,7 @@ class StageService:
     def __init__(self, db: Session):
         self.db = db
         self.repository = StageRepository(db)
+        self.projections = StageProjections(db)
     
     def create_stage(self, stage_data: Dict) -> Dict:
         required_fields = ["start_date", "end_date", "trip_id", "location_id"]
@@ -46,7 +50,7 @@ class StageService:
             raise TripNotFoundError("Podróż nie została znaleziona")
         
         # Sprawdzenie czy lokalizacja istnieje
-        location = self.db.query(Location).filter_by(id=stage_data["location_id"]).first()
+        location = reference_cache.location(self.db, stage_data["location_id"])
         if not location:
             raise LocationNotFoundError("Lokalizacja nie została znaleziona")
         
@@ -55,11 +59,12 @@ class StageService:
             start_date=start_date,
             end_date=end_date,
             trip_id=stage_data["trip_id"],
-            location_id=stage_data["location_id"]
+            location_id=location.id
         )
         
         self.repository.create(stage)
-        self.db.commit()
+        self.projections.stages_saved([stage.id])
+        self.projections.commit()
         self.db.refresh(stage)
         
         return self._stage_to_dict(stage)
@@ -74,11 +79,16 @@ class StageService:
         stages = self.repository.get_all()
         return [self._stage_to_dict(s) for s in stages]
     
+    def get_stages_page(self, params: PageParams) -> Dict:
+        return self.repository.find_page(params).to_dict(self._stage_to_dict)
+    
     def update_stage(self, stage_id: int, stage_data: Dict) -> Dict:
         stage = self.repository.find_by_id(stage_id)
         if not stage:
             raise StageNotFoundError("Etap nie został znaleziony")
         
+        self.projections.stages_changing([stage.id])
+        
         if "start_date" in stage_data:
             try:
                 stage.start_date = datetime.fromisoformat(stage_data["start_date"])
@@ -98,13 +108,14 @@ class StageService:
             stage.trip_id = stage_data["trip_id"]
         
         if "location_id" in stage_data:
-            location = self.db.query(Location).filter_by(id=stage_data["location_id"]).first()
+            location = reference_cache.location(self.db, stage_data["location_id"])
             if not location:
                 raise LocationNotFoundError("Lokalizacja nie została znaleziona")
-            stage.location_id = stage_data["location_id"]
+            stage.location_id = location.id
         
         self.repository.update(stage)
-        self.db.commit()
+        self.projections.stages_saved([stage.id])
+        self.projections.commit()
         self.db.refresh(stage)
         
         return self._stage_to_dict(stage)
@@ -114,8 +125,9 @@ class StageService:
         if not stage:
             raise StageNotFoundError("Etap nie został znaleziony")
         
+        self.projections.stages_deleted([stage.id])
         self.repository.delete(stage)
-        self.db.commit()
+        self.projections.commit()
     
     def _stage_to_dict(self, stage: Stage) -> Dict:
         return {
@@ -3,7 +3,8 @@ from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash
 from app.models import Traveler
 from app.repositories.traveler_repository import TravelerRepository
-from typing import Dict, Optional, List
+from app.repositories.pagination import PageParams
+from typing import Dict, Iterator, Optional, List
 
 
 class TravelerServiceError(Exception):
@@ -76,14 +77,20 @@ class TravelerService:
     
     def get_all_travelers(self) -> List[Dict]:
         travelers = self.repository.get_all()
-        return [
-            {
-                "pesel": t.pesel,
-                "first_name": t.first_name,
-                "last_name": t.last_name,
-                "email": t.email,
-                "login": t.login,
-                "age": t.age
-            }
-            for t in travelers
-        ]
+        return [self._traveler_to_dict(t) for t in travelers]
+    
+    def get_travelers_page(self, params: PageParams) -> Dict:
+        return self.repository.find_page(params).to_dict(self._traveler_to_dict)
+    
+    def iter_travelers(self, params: PageParams) -> Iterator[Dict]:
+        return (self._traveler_to_dict(t) for t in self.repository.iter_rows(params))
+    
+    def _traveler_to_dict(self, traveler: Traveler) -> Dict:
+        return {
+            "pesel": traveler.pesel,
+            "first_name": traveler.first_name,
+            "last_name": traveler.last_name,
+            "email": traveler.email,
+            "login": traveler.login,
+            "age": traveler.age
+        }
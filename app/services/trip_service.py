@@ -1,9 +1,12 @@
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Dict, Optional, List
-from app.models import Trip, Traveler, Stage, Location, Companion, TripStatus
+from typing import Dict, Iterator, Optional, List
+from app.models import Trip, Traveler, Stage, Companion, TripStatus
+from app.cache.reference_cache import reference_cache
 from app.repositories.trip_repository import TripRepository
 from app.repositories.traveler_repository import TravelerRepository
+from app.repositories.pagination import PageParams
+from app.services.stage_projections import StageProjections
 
 
 class TripServiceError(Exception):
@@ -24,6 +27,7 @@ class TripService:
         self.db = db
         self.trip_repository = TripRepository(db)
         self.traveler_repository = TravelerRepository(db)
+        self.projections = StageProjections(db)
     
     def create_trip(self, trip_data: Dict) -> Dict:
         required_fields = ["status", "traveler_pesel"]
@@ -49,18 +53,18 @@ class TripService:
         )
         self.trip_repository.create(trip)
         
-        # Dodanie etapów
+        # Dodanie etapów; lokalizacje wszystkich etapów sprawdzane naraz (z pamięci lub jednym zapytaniem)
         stages_data = trip_data.get("stages", [])
+        locations = reference_cache.locations(self.db, [stage_data.get("location_id") for stage_data in stages_data])
         for stage_data in stages_data:
             try:
                 start_date = datetime.fromisoformat(stage_data["start_date"])
                 end_date = datetime.fromisoformat(stage_data["end_date"])
-                location_id = stage_data["location_id"]
-            except (KeyError, ValueError):
+                location_id = int(stage_data["location_id"])
+            except (KeyError, ValueError, TypeError):
                 continue
             
-            location = self.db.query(Location).filter_by(id=location_id).first()
-            if not location:
+            if location_id not in locations:
                 continue
             
             stage = Stage(
@@ -78,7 +82,9 @@ class TripService:
             if companion:
                 trip.companions.append(companion)
         
-        self.db.commit()
+        self.db.flush()
+        self.projections.trip_saved(trip.id)
+        self.projections.commit()
         self.db.refresh(trip)
         
         return self._trip_to_dict(trip)
@@ -90,15 +96,21 @@ class TripService:
         return self._trip_to_dict(trip)
     
     def get_all_trips(self) -> List[Dict]:
-        trips = self.trip_repository.get_all()
+        trips = self.trip_repository.get_all_with_details()
         return [self._trip_to_dict(trip) for trip in trips]
     
+    def get_trips_page(self, params: PageParams) -> Dict:
+        return self.trip_repository.find_page(params).to_dict(self._trip_to_dict)
+    
+    def iter_trips(self, params: PageParams) -> Iterator[Dict]:
+        return (self._trip_to_dict(trip) for trip in self.trip_repository.iter_rows(params))
+    
     def get_trips_by_traveler_pesel(self, traveler_pesel: str) -> Dict:
         traveler = self.traveler_repository.find_by_pesel(traveler_pesel)
         if not traveler:
             raise TravelerNotFoundError("Podróżny nie został znaleziony")
         
-        trips = self.trip_repository.find_by_traveler_pesel(traveler_pesel)
+        trips = self.trip_repository.find_by_traveler_pesel_with_details(traveler_pesel)
         return {
             "traveler_pesel": traveler_pesel,
             "trips": [self._trip_to_dict(trip) for trip in trips]
@@ -109,6 +121,8 @@ class TripService:
         if not trip:
             raise TripNotFoundError("Podróż nie została znaleziona")
         
+        self.projections.trip_changing(trip.id)
+        
         if "status" in trip_data:
             try:
                 trip.status = TripStatus(trip_data["status"])
@@ -133,7 +147,8 @@ class TripService:
                 trip.evacuation_id = None
         
         self.trip_repository.update(trip)
-        self.db.commit()
+        self.projections.trip_saved(trip.id)
+        self.projections.commit()
         self.db.refresh(trip)
         
         return self._trip_to_dict(trip)
@@ -143,8 +158,9 @@ class TripService:
         if not trip:
             raise TripNotFoundError("Podróż nie została znaleziona")
         
+        self.projections.trip_deleted(trip.id)
         self.trip_repository.delete(trip)
-        self.db.commit()
+        self.projections.commit()
     
     def add_companions_to_trip(self, trip_id: int, companions_data: List[Dict], traveler_pesel: str) -> Dict:
         if not companions_data:
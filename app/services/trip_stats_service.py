@@ -0,0 +1,79 @@
+"""
+Service dla statystyk podróży - odpowiedzi dashboardów z kostki trip_stats
+"""
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Dict, Optional
+from app.models import Country, TripStatus
+from app.repositories.trip_stats_repository import TripStatsRepository, SCOPE_CITY, SCOPE_COUNTRY
+
+
+DEFAULT_RANGE_DAYS = 7
+MAX_RANGE_DAYS = 366
+
+
+class TripStatsService:
+    """
+    Liczby dotyczą obecności danego dnia: podróżny przebywający w kraju przez cały
+    tydzień liczony jest w każdym z siedmiu dni. `peak` to maksimum dzienne w zakresie.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = TripStatsRepository(db)
+
+    def get_stats(self, params: Dict) -> Dict:
+        day_from = self._parse_day(params.get("date_from"), date.today(), "date_from")
+        day_to = self._parse_day(params.get("date_to"), day_from + timedelta(days=DEFAULT_RANGE_DAYS - 1), "date_to")
+        if day_to < day_from:
+            raise ValueError("date_to nie może być wcześniejsza niż date_from")
+        if (day_to - day_from).days >= MAX_RANGE_DAYS:
+            raise ValueError(f"Zakres dat nie może przekraczać {MAX_RANGE_DAYS} dni")
+
+        statuses = None
+        if params.get("status"):
+            try:
+                statuses = [TripStatus(value) for value in params["status"].split(",")]
+            except ValueError:
+                raise ValueError(f"Nieprawidłowy status. Musi być jednym z: {[s.value for s in TripStatus]}")
+
+        if params.get("city_id"):
+            try:
+                scope, scope_ids = SCOPE_CITY, [int(params["city_id"])]
+            except ValueError:
+                raise ValueError("city_id musi być liczbą")
+        elif params.get("country"):
+            scope = SCOPE_COUNTRY
+            scope_ids = [country_id for country_id, in self.db.query(Country.id)
+                         .filter(Country.name.ilike(f"%{params['country']}%"))]
+        else:
+            raise ValueError("Wymagany parametr country lub city_id")
+
+        rows = self.repository.summarize(scope, scope_ids, day_from, day_to, statuses) if scope_ids else []
+
+        by_status: Dict[str, Dict] = {}
+        for day, status, trips, travelers in rows:
+            summary = by_status.setdefault(status.value, {"peak_trips": 0, "peak_travelers": 0, "traveler_days": 0})
+            summary["peak_trips"] = max(summary["peak_trips"], trips)
+            summary["peak_travelers"] = max(summary["peak_travelers"], travelers)
+            summary["traveler_days"] += travelers
+
+        return {
+            "scope": scope,
+            "scope_ids": scope_ids,
+            "date_from": day_from.isoformat(),
+            "date_to": day_to.isoformat(),
+            "by_status": by_status,
+            "days": [
+                {"day": day.isoformat(), "status": status.value, "trips": trips, "travelers": travelers}
+                for day, status, trips, travelers in rows
+            ]
+        }
+
+    def _parse_day(self, value: Optional[str], default: date, name: str) -> date:
+        if not value:
+            return default
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Data {name} musi być w formacie ISO (RRRR-MM-DD)")
@@ -1,46 +1,229 @@
+import hashlib
+import os
+import time
 import xml.etree.ElementTree as ET
 from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy.orm import Session
+from app.database.database import SessionLocal
+from app.database.routing import RoutingSession
+from app.cache.versioned_cache import VersionedCache
+from app.cache.version_clock import version_clock
+from app.repositories.pagination import PageParams
+from app.repositories.data_version_repository import DataVersionRepository
 from app.repositories.warning_repository import warning_repo
-from app.models import ThreatLevel
+from app.repositories.warning_match_repository import WarningMatchRepository
+from app.services.alert_dispatcher import alert_dispatcher, JOB_WARNING
+from app.models import ConsularWarning, ThreatLevel
+
+
+# Licznik w data_versions zwiększany przy każdym imporcie, który coś zmienił
+WARNINGS_VERSION = "warnings"
+
+# Jak długo strona listy może być nieaktualna względem bieżącej chwili (flaga "aktywne")
+WARNING_CACHE_TTL = float(os.environ.get("WARNING_CACHE_TTL", 30))
+
+# Strony listy ostrzeżeń; czyszczone po imporcie (ten proces) lub zmianie licznika (inne procesy)
+warning_list_cache = VersionedCache(
+    WARNINGS_VERSION,
+    ttl=WARNING_CACHE_TTL,
+    max_size=int(os.environ.get("WARNING_CACHE_MAX_SIZE", 512))
+)
+
+# Ile ostrzeżeń z feedu trzymamy w pamięci naraz (jedna paczka = jedno porównanie i upsert)
+IMPORT_BATCH_SIZE = 1000
+
+
+def content_hash(warning_data: Dict) -> str:
+    """Skrót wszystkich pól pochodzących z feedu - zmiana dowolnego z nich oznacza aktualizację"""
+    fields = (
+        warning_data["name"],
+        warning_data["content"],
+        warning_data["warning_type"],
+        warning_data["threat_level"].name,
+        warning_data["expiry_date"].isoformat()
+    )
+    return hashlib.sha256("\x1f".join(fields).encode("utf-8")).hexdigest()
+
 
 class WarningService:
-    def run_import_cycle(self, xml_path):
-        try:
-            tree = ET.parse(xml_path)
-            root = tree.getroot()
-        except Exception as e:
-            print(f"Błąd krytyczny pliku: {e}")
-            return False
 
-        for item in root.findall('warning'):
-            id_tag = item.find('idZewnetrzne')
-            nazwa_tag = item.find('nazwa')
-            
-            # Jeśli nie ma kluczowych pól, pomiń ten element 
-            if id_tag is None or nazwa_tag is None:
-                print("Pominięto element: Brak idZewnetrzne lub nazwy w XML")
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or SessionLocal.session_factory
+
+    def get_warnings_page(self, db: Session, params: PageParams) -> Dict:
+        """Strona listy ostrzeżeń (filtry status / threat_level / warning_type) z pamięci podręcznej"""
+        key = (params.limit, params.cursor, params.sort, tuple(sorted(params.filters.items())))
+        return warning_list_cache.get(
+            db, key,
+            lambda: warning_repo.find_page(db, params, datetime.now()).to_dict(self._warning_to_dict)
+        )
+
+    def iter_warnings(self, xml_path, counters: Dict, source: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Strumieniowe czytanie feedu (iterparse): każdy <warning> jest mapowany i usuwany
+        z drzewa zaraz po przeczytaniu, więc pamięć nie rośnie z rozmiarem pliku.
+        Pominięte elementy zlicza counters["skipped"].
+        """
+        root = None
+        for event, element in ET.iterparse(xml_path, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag != 'warning':
                 continue
+            warning_data = self._parse_item(element, source)
+            # Przetworzone elementy odpinamy od korzenia - inaczej drzewo i tak rośnie
+            root.clear()
+            if warning_data is None:
+                counters["skipped"] += 1
+                continue
+            yield warning_data
+
+    def _parse_item(self, item, source: Optional[str] = None) -> Optional[Dict]:
+        id_tag = item.find('idZewnetrzne')
+        nazwa_tag = item.find('nazwa')
+
+        # Jeśli nie ma kluczowych pól, pomiń ten element
+        if id_tag is None or nazwa_tag is None:
+            print("Pominięto element: Brak idZewnetrzne lub nazwy w XML")
+            return None
+
+        ext_id = id_tag.text
 
-            ext_id = id_tag.text
-            
-            # Mapowanie XML 
+        try:
+            # Mapowanie XML
             warning_data = {
                 "external_id": ext_id,
                 "name": nazwa_tag.text,
-                "content": item.find('tresc').text if item.find('tresc') is not None else "",
-                "warning_type": item.find('typ').text if item.find('typ') is not None else "Inne",
-                "threat_level": ThreatLevel[item.find('poziomZagrozenia').text] if item.find('poziomZagrozenia') is not None else ThreatLevel.LOW,
-                "expiry_date": datetime.strptime(item.find('dataWaznosci').text, '%Y-%m-%d')
+                "content": item.findtext('tresc') or "",
+                "warning_type": item.findtext('typ', "Inne"),
+                "threat_level": ThreatLevel[item.findtext('poziomZagrozenia')] if item.find('poziomZagrozenia') is not None else ThreatLevel.LOW,
+                "expiry_date": datetime.strptime(item.findtext('dataWaznosci'), '%Y-%m-%d')
             }
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Pominięto element {ext_id}: niepoprawne dane ({e})")
+            return None
+
+        warning_data["content_hash"] = content_hash(warning_data)
+        warning_data["source"] = source
+        return warning_data
+
+    def run_import_cycle(self, xml_path, expire_missing: bool = True, batch_size: int = IMPORT_BATCH_SIZE,
+                         source: Optional[str] = None, notify: bool = True):
+        """
+        Import feedu w jednej transakcji, w paczkach po batch_size ostrzeżeń: dla każdej
+        paczki skróty istniejących wierszy pobiera jedno zapytanie, różnice liczone są
+        na zbiorach, a zmiany zapisywane hurtowo (upsert). Identyfikatory z feedu trafiają
+        do tabeli tymczasowej; ostrzeżenia spoza feedu wygasają jednym UPDATE (expire_missing).
+        source identyfikuje feed (domyślnie ścieżka pliku) - wygasają tylko jego ostrzeżenia.
+        Nowe i zmienione ostrzeżenia z przypisanymi lokalizacjami trafiają po zatwierdzeniu
+        do kolejki dopasowania podróżnych (notify).
+        Zwraca raport z licznikami i czasami etapów albo False, gdy pliku nie da się wczytać.
+        """
+        source = source or str(xml_path)
+        started = time.perf_counter()
+        counters = {"received": 0, "skipped": 0, "inserted": 0, "updated": 0, "expired": 0}
+        timings = {"parse": 0.0, "apply": 0.0}
+        matchable = []
+
+        now = datetime.now()
+        session = self.session_factory()
+        if isinstance(session, RoutingSession):
+            # Porównanie ze stanem bazy głównej, nie z opóźnioną repliką
+            session.use_primary()
+        try:
+            warning_repo.create_seen_table(session)
+            warnings = self.iter_warnings(xml_path, counters, source)
+            while True:
+                mark = time.perf_counter()
+                batch = {}
+                for warning_data in islice(warnings, batch_size):
+                    # Powtórzony external_id w obrębie paczki: wygrywa ostatni
+                    batch[warning_data["external_id"]] = warning_data
+                timings["parse"] += time.perf_counter() - mark
+                if not batch:
+                    break
+
+                mark = time.perf_counter()
+                matchable.extend(self._apply_batch(session, batch, counters))
+                timings["apply"] += time.perf_counter() - mark
+
+            mark = time.perf_counter()
+            if expire_missing:
+                counters["expired"] = warning_repo.expire_unseen(session, source, now)
+            if counters["inserted"] or counters["updated"] or counters["expired"]:
+                DataVersionRepository(session).bump(WARNINGS_VERSION)
+            warning_repo.drop_seen_table(session)
+            session.commit()
+            timings["apply"] += time.perf_counter() - mark
+        except (ET.ParseError, OSError) as e:
+            # Uszkodzony lub niedostępny plik - nic z tego cyklu nie zostaje zapisane
+            session.rollback()
+            print(f"Błąd krytyczny pliku: {e}")
+            return False
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
 
-            existing = warning_repo.find_by_external_id(ext_id)
-            
-            if existing is None:
-                warning_repo.add(warning_data)
-                print(f"Dodano nowe ostrzeżenie: {ext_id}")
-            else:
-                if existing.name != warning_data["name"] or existing.content != warning_data["content"]:
-                    warning_repo.update(ext_id, warning_data)
-                    print(f"Zaktualizowano ostrzeżenie: {ext_id}")
-        
-        return True
\ No newline at end of file
+        if counters["inserted"] or counters["updated"] or counters["expired"]:
+            warning_list_cache.invalidate()
+            version_clock.invalidate()
+        matching_job_id = self._enqueue_matching(matchable) if notify and matchable else None
+
+        report = {
+            **counters,
+            "matched_warnings": len(matchable),
+            "matching_job_id": matching_job_id,
+            "unchanged": counters["received"] - counters["inserted"] - counters["updated"],
+            "parse_seconds": round(timings["parse"], 3),
+            "apply_seconds": round(timings["apply"], 3),
+            "total_seconds": round(time.perf_counter() - started, 3)
+        }
+        print(f"Import ostrzeżeń: {report}")
+        return report
+
+    def _apply_batch(self, session, batch: Dict[str, Dict], counters: Dict) -> List[int]:
+        """Zapisz paczkę; zwraca ID zmienionych ostrzeżeń, które mają lokalizacje"""
+        existing = warning_repo.fetch_hashes(session, batch.keys())
+        changed = [
+            warning_data for ext_id, warning_data in batch.items()
+            if existing.get(ext_id) != (warning_data["content_hash"], warning_data["source"])
+        ]
+        inserted = len(batch.keys() - existing.keys())
+
+        warning_repo.mark_seen(session, batch.keys())
+        if changed:
+            warning_repo.upsert_many(session, changed)
+
+        counters["received"] += len(batch)
+        counters["inserted"] += inserted
+        counters["updated"] += len(changed) - inserted
+
+        if not changed:
+            return []
+        return WarningMatchRepository(session).find_with_locations(w["external_id"] for w in changed)
+
+    def _warning_to_dict(self, warning: ConsularWarning) -> Dict:
+        return {
+            "id": warning.id,
+            "external_id": warning.external_id,
+            "name": warning.name,
+            "content": warning.content,
+            "warning_type": warning.warning_type,
+            "threat_level": warning.threat_level.value,
+            "publication_date": warning.publication_date.isoformat() if warning.publication_date else None,
+            "expiry_date": warning.expiry_date.isoformat(),
+            "active": warning.expiry_date > datetime.now()
+        }
+
+    def _enqueue_matching(self, warning_ids: List[int]) -> int:
+        db = self.session_factory()
+        try:
+            return alert_dispatcher.enqueue(db, JOB_WARNING, {"warning_ids": warning_ids})
+        finally:
+            db.close()
@@ -0,0 +1,347 @@
+"""
+Cykliczna synchronizacja ostrzeżeń konsularnych z feedów XML (pliki lokalne lub URL-e).
+Działa w procesie aplikacji (WARNING_SYNC_ENABLED=1) albo jako osobny worker
+(python -m scripts.warning_sync_trigger). Importuje tylko proces trzymający dzierżawę
+lidera, niezmienione feedy są pomijane bez parsowania, a błędy wydłużają odstęp (backoff).
+"""
+import hashlib
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import requests
+from sqlalchemy.orm import Session
+from app.database.database import SessionLocal
+from app.models import WarningFeed
+from app.repositories.scheduler_lease_repository import SchedulerLeaseRepository
+from app.repositories.warning_feed_repository import WarningFeedRepository
+from app.services.warning_service import WarningService
+
+
+LEASE_NAME = "warning-sync"
+DEFAULT_FEEDS = "external_data/warnings_v2.xml"
+CHUNK_SIZE = 1024 * 1024
+
+STATUS_IMPORTED = "imported"
+STATUS_UNCHANGED = "unchanged"
+STATUS_FAILED = "failed"
+
+
+class FeedError(Exception):
+    pass
+
+
+class FeedSnapshot:
+    """Wynik sprawdzenia feedu: albo unchanged_by (etag/mtime/checksum), albo plik do importu"""
+
+    def __init__(self, path: Optional[str] = None, unchanged_by: Optional[str] = None,
+                 etag=None, last_modified=None, mtime=None, size=None, checksum=None, temporary=False):
+        self.path = path
+        self.unchanged_by = unchanged_by
+        self.etag = etag
+        self.last_modified = last_modified
+        self.mtime = mtime
+        self.size = size
+        self.checksum = checksum
+        self.temporary = temporary
+
+
+class WarningSync:
+    """
+    Każdy feed ma własny stan w tabeli warning_feeds (skróty, next_run_at, licznik błędów),
+    więc decyzje o pominięciu i backoffie przetrwają restart i przejęcie roli lidera.
+    """
+
+    def __init__(self):
+        self.feeds: List[str] = DEFAULT_FEEDS.split(",")
+        self.interval = 60.0
+        self.jitter = 0.1
+        self.max_backoff = 3600.0
+        self.lease_seconds = 300.0
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.session_factory = SessionLocal.session_factory
+        self.is_leader = False
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.runs = deque(maxlen=100)
+        self.totals = {STATUS_IMPORTED: 0, STATUS_UNCHANGED: 0, STATUS_FAILED: 0}
+        self.lock = threading.Lock()
+
+    def configure(self, feeds: Optional[List[str]] = None, interval: Optional[float] = None):
+        env_feeds = os.environ.get("WARNING_FEEDS", DEFAULT_FEEDS)
+        self.feeds = feeds or [feed.strip() for feed in env_feeds.split(",") if feed.strip()]
+        self.interval = interval or float(os.environ.get("WARNING_SYNC_INTERVAL", 60))
+        self.jitter = float(os.environ.get("WARNING_SYNC_JITTER", 0.1))
+        self.max_backoff = float(os.environ.get("WARNING_SYNC_MAX_BACKOFF", 3600))
+        self.lease_seconds = float(os.environ.get("WARNING_SYNC_LEASE_SECONDS", max(300, 3 * self.interval)))
+
+    def init_app(self, app):
+        app.config.setdefault("WARNING_SYNC_ENABLED", os.environ.get("WARNING_SYNC_ENABLED", "0") == "1")
+        self.configure()
+        if app.config["WARNING_SYNC_ENABLED"]:
+            self.start()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run_forever, name="warning-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self._release()
+
+    def run_forever(self):
+        print(f"Synchronizacja ostrzeżeń: {', '.join(self.feeds)} (co {self.interval:.0f} s, {self.holder})")
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                # Błąd bazy przy dzierżawie nie może zatrzymać pętli
+                print(f"Błąd synchronizacji ostrzeżeń: {e}")
+            self.stop_event.wait(self._jittered(self.interval))
+
+    def tick(self) -> List[Dict]:
+        """Jeden obieg: jeśli ten proces jest liderem, importuje feedy, których termin minął"""
+        runs = []
+        for source in self.feeds:
+            # Dzierżawa odnawiana przed każdym feedem - długi import nie oddaje jej innym
+            if not self._acquire():
+                break
+            if self._due(source):
+                runs.append(self.run_feed(source))
+        return runs
+
+    def run_feed(self, source: str) -> Dict:
+        started_at = datetime.now()
+        started = time.perf_counter()
+        run = {"source": source, "started_at": started_at.isoformat(), "holder": self.holder}
+        snapshot = None
+
+        db = self.session_factory()
+        try:
+            feed = WarningFeedRepository(db).get_or_create(source)
+            # Zatwierdź od razu: import pisze we własnej transakcji (SQLite ma jednego piszącego)
+            db.commit()
+            try:
+                snapshot = self._snapshot(source, feed)
+                if snapshot.unchanged_by:
+                    run["status"] = STATUS_UNCHANGED
+                    run["unchanged_by"] = snapshot.unchanged_by
+                else:
+                    with self._renewing_lease():
+                        report = WarningService(self.session_factory).run_import_cycle(snapshot.path, source=source)
+                    if report is False:
+                        raise FeedError("Nie udało się wczytać feedu")
+                    run["status"] = STATUS_IMPORTED
+                    run["report"] = report
+            except Exception as e:
+                # Każdy błąd (plik, sieć, XML, baza) liczy się do backoffu tego feedu
+                run["status"] = STATUS_FAILED
+                run["error"] = str(e)
+
+            run["duration_seconds"] = round(time.perf_counter() - started, 3)
+            # Stan feedu zapisuje tylko lider - jeśli dzierżawę przejął inny proces
+            # (np. odnowienie nie przeszło), to on odpowiada teraz za ten feed
+            if self._acquire():
+                self._record(feed, snapshot, run, started_at)
+                db.commit()
+            else:
+                run["lease_lost"] = True
+                db.rollback()
+        finally:
+            db.close()
+            if snapshot is not None and snapshot.temporary:
+                os.unlink(snapshot.path)
+
+        with self.lock:
+            self.runs.append(run)
+            self.totals[run["status"]] += 1
+        print(f"Synchronizacja ostrzeżeń {source}: {run['status']} ({run['duration_seconds']} s)")
+        return run
+
+    def stats(self, db: Session) -> Dict:
+        lease = SchedulerLeaseRepository(db).find(LEASE_NAME)
+        with self.lock:
+            recent = list(self.runs)[-20:]
+            totals = dict(self.totals)
+        return {
+            "holder": self.holder,
+            "is_leader": self.is_leader,
+            "leader": lease.holder if lease and lease.expires_at > datetime.now() else None,
+            "interval_seconds": self.interval,
+            "totals": totals,
+            "feeds": [self._feed_to_dict(feed) for feed in WarningFeedRepository(db).find_all(self.feeds)],
+            "recent_runs": recent
+        }
+
+    # --- Sprawdzanie zmian ---
+
+    def _snapshot(self, source: str, feed: WarningFeed) -> FeedSnapshot:
+        if source.startswith(("http://", "https://")):
+            return self._snapshot_url(source, feed)
+        return self._snapshot_file(source, feed)
+
+    def _snapshot_file(self, path: str, feed: WarningFeed) -> FeedSnapshot:
+        stat = os.stat(path)
+        if feed.mtime == stat.st_mtime and feed.size == stat.st_size:
+            return FeedSnapshot(unchanged_by="mtime", mtime=stat.st_mtime, size=stat.st_size, checksum=feed.checksum)
+
+        # Plik dotknięty, ale treść może być ta sama - skrót jest tańszy niż parsowanie
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        checksum = digest.hexdigest()
+        unchanged_by = "checksum" if checksum == feed.checksum else None
+        return FeedSnapshot(path=path, unchanged_by=unchanged_by, mtime=stat.st_mtime,
+                            size=stat.st_size, checksum=checksum)
+
+    def _snapshot_url(self, url: str, feed: WarningFeed) -> FeedSnapshot:
+        headers = {}
+        if feed.etag:
+            headers["If-None-Match"] = feed.etag
+        if feed.last_modified:
+            headers["If-Modified-Since"] = feed.last_modified
+
+        with requests.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304:
+                return FeedSnapshot(unchanged_by="etag", etag=feed.etag,
+                                    last_modified=feed.last_modified, checksum=feed.checksum)
+            if response.status_code != 200:
+                raise FeedError(f"HTTP {response.status_code}")
+
+            # Zapis na dysk w kawałkach - feed nie musi mieścić się w pamięci
+            digest = hashlib.sha256()
+            size = 0
+            handle, path = tempfile.mkstemp(prefix="warnings-", suffix=".xml")
+            try:
+                with os.fdopen(handle, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        digest.update(chunk)
+                        size += len(chunk)
+                        f.write(chunk)
+            except Exception:
+                os.unlink(path)
+                raise
+
+        checksum = digest.hexdigest()
+        snapshot = FeedSnapshot(path=path, etag=response.headers.get("ETag"),
+                                last_modified=response.headers.get("Last-Modified"),
+                                size=size, checksum=checksum, temporary=True)
+        if checksum == feed.checksum:
+            snapshot.unchanged_by = "checksum"
+        return snapshot
+
+    # --- Stan feedów, dzierżawa, terminy ---
+
+    def _record(self, feed: WarningFeed, snapshot: Optional[FeedSnapshot], run: Dict, started_at: datetime):
+        feed.last_status = run["status"]
+        feed.last_run_at = started_at
+        feed.last_duration_seconds = run["duration_seconds"]
+        feed.last_report = json.dumps(run.get("report")) if run.get("report") else feed.last_report
+
+        if run["status"] == STATUS_FAILED:
+            # Wykładniczy backoff: interval * 2^n, z limitem i losowym rozrzutem
+            feed.consecutive_failures = (feed.consecutive_failures or 0) + 1
+            feed.last_error = run["error"]
+            delay = min(self.interval * 2 ** feed.consecutive_failures, self.max_backoff)
+            feed.next_run_at = started_at + timedelta(seconds=self._jittered(delay))
+            return
+
+        # Skróty zapisujemy dopiero po udanym imporcie - nieudany będzie powtórzony
+        feed.etag = snapshot.etag
+        feed.last_modified = snapshot.last_modified
+        feed.mtime = snapshot.mtime
+        feed.size = snapshot.size
+        feed.checksum = snapshot.checksum
+        feed.consecutive_failures = 0
+        feed.last_error = None
+        feed.last_success_at = started_at
+        feed.next_run_at = None
+
+    def _due(self, source: str) -> bool:
+        db = self.session_factory()
+        try:
+            feed = db.get(WarningFeed, source)
+            return feed is None or feed.next_run_at is None or feed.next_run_at <= datetime.now()
+        finally:
+            db.close()
+
+    def _acquire(self) -> bool:
+        db = self.session_factory()
+        try:
+            self.is_leader = SchedulerLeaseRepository(db).acquire(LEASE_NAME, self.holder, self.lease_seconds)
+            db.commit()
+        finally:
+            db.close()
+        return self.is_leader
+
+    @contextmanager
+    def _renewing_lease(self):
+        """
+        Odnawiaj dzierżawę co lease_seconds / 3, dopóki trwa import - import dłuższy niż
+        dzierżawa nie oddaje feedu drugiemu procesowi. (SQLite: zapis dzierżawy czeka
+        na koniec transakcji importu, ale wtedy inny proces też nie może jej przejąć.)
+        """
+        done = threading.Event()
+
+        def renew():
+            while not done.wait(self.lease_seconds / 3):
+                try:
+                    if not self._acquire():
+                        print("Synchronizacja ostrzeżeń: dzierżawa lidera utracona w trakcie importu")
+                except Exception as e:
+                    print(f"Błąd odnawiania dzierżawy synchronizacji ostrzeżeń: {e}")
+
+        thread = threading.Thread(target=renew, name="warning-sync-lease", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def _release(self):
+        if not self.is_leader:
+            return
+        db = self.session_factory()
+        try:
+            SchedulerLeaseRepository(db).release(LEASE_NAME, self.holder)
+            db.commit()
+            self.is_leader = False
+        finally:
+            db.close()
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _feed_to_dict(self, feed: WarningFeed) -> Dict:
+        return {
+            "source": feed.source,
+            "last_status": feed.last_status,
+            "last_error": feed.last_error,
+            "last_report": json.loads(feed.last_report) if feed.last_report else None,
+            "last_duration_seconds": feed.last_duration_seconds,
+            "last_run_at": feed.last_run_at.isoformat() if feed.last_run_at else None,
+            "last_success_at": feed.last_success_at.isoformat() if feed.last_success_at else None,
+            "consecutive_failures": feed.consecutive_failures,
+            "next_run_at": feed.next_run_at.isoformat() if feed.next_run_at else None,
+            "etag": feed.etag,
+            "checksum": feed.checksum
+        }
+
+
+warning_sync = WarningSync()
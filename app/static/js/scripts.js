@@ -1,5 +1,11 @@
 const API_BASE = 'http://127.0.0.1:5000';
 
+// GET danych referencyjnych: przeglądarka rewaliduje kopię (If-None-Match),
+// a niezmienione dane wracają jako 304 bez ponownego pobierania treści
+async function getCached(url) {
+  return fetch(url, { cache: 'no-cache' });
+}
+
 // Dodaj Travelera
 document.getElementById('travelerForm').onsubmit = async (e) => {
   e.preventDefault();
@@ -53,7 +59,7 @@ document.getElementById('cityForm').onsubmit = async (e) => {
 // Pobierz Kraj z Miastami
 document.getElementById('getCountryBtn').onclick = async () => {
   const id = document.getElementById('getCountryId').value;
-  const res = await fetch(`${API_BASE}/countries/${id}`);
+  const res = await getCached(`${API_BASE}/countries/${id}`);
   const json = await res.json();
   document.getElementById('countryWithCities').textContent = JSON.stringify(json, null, 2);
 };
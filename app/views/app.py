@@ -1,17 +1,32 @@
-from flask import Blueprint, render_template, request, g, flash, make_response, redirect, url_for
+from flask import Blueprint, render_template, request, g, flash, redirect, url_for, Response, stream_with_context
 
-from app.database.database import SessionLocal
-from app.models import Trip, Stage, Location, City, Country, TripStatus, Traveler, Notification
+from app.database.routing import read_only
+from app.models import Trip, Country, TripStatus, ThreatLevel
 from flask_login import login_required, current_user
-from app.repositories.warning_repository import warning_repo
-from sqlalchemy import or_, and_, cast, Date, func
-from sqlalchemy.orm import joinedload
+from app.repositories.pagination import PageParams, PaginationError
+from app.services.warning_service import WarningService, WARNINGS_VERSION, WARNING_CACHE_TTL
+from app.views.http_cache import conditional
+from app.services.alert_dispatcher import alert_dispatcher, JOB_PUSH
+from app.cache.stage_index import stage_index
+from app.cache.reference_cache import reference_cache
+from app.repositories.report_repository import ReportRepository
+import codecs
 import csv
+import heapq
 import io
-from datetime import date, datetime
+from datetime import date, datetime, time
 
 app_bp = Blueprint("app_bp", __name__)
 
+REPORT_PAGE_SIZE = 50
+REPORT_STATUS_LABELS = {
+    "PLANNED": "Planowana",
+    "IN_PROGRESS": "W trakcie",
+    "COMPLETED": "Zakończona",
+    "CANCELED": "Anulowana"
+}
+CSV_FLUSH_ROWS = 1000
+
 @app_bp.route("/")
 def index_page():
     return render_template("index.html")
@@ -25,13 +40,23 @@ def register_employee_page():
     return render_template("register_employee.html")
 
 @app_bp.route("/warning_list_page")
+@conditional(WARNINGS_VERSION, period=max(WARNING_CACHE_TTL, 1))
 def warning_list_page():
-    db_alerts = warning_repo.get_all() 
-    
+    # Puste pola formularza filtrów nie są filtrami
+    args = {key: value for key, value in request.args.items() if value}
+    try:
+        params = PageParams.from_args(args)
+        page = WarningService().get_warnings_page(g.db, params)
+    except PaginationError as e:
+        return str(e), 400
+
+    filters = {key: value for key, value in args.items() if key != "cursor"}
     return render_template(
-        'warning_list.html', 
-        alerts=db_alerts, 
-        now=datetime.now()
+        'warning_list.html',
+        alerts=page["items"],
+        next_cursor=page["next_cursor"],
+        filters=filters,
+        threat_levels=list(ThreatLevel)
     )
 
 @app_bp.route("/warning_edit_page")
@@ -99,34 +124,99 @@ def travelers_trips_page():
     return render_template("travelers_trips.html", traveler=traveler, trips=trips)
 
 
-def get_filtered_trips(db, country, date_from, date_to, status):
+def parse_trip_status(status):
+    """Status z formularza raportów (nazwa enuma; 'CANCELLED' jako alias CANCELED)"""
+    if not status:
+        return None
+    if status == "CANCELLED":
+        return TripStatus.CANCELED
+    return TripStatus.__members__.get(status)
 
-    query = db.query(Trip).options(
-        joinedload(Trip.traveler),
-        joinedload(Trip.stages).joinedload(Stage.location).joinedload(Location.city).joinedload(City.country)
-    ).join(Trip.stages).join(Stage.location).join(Location.city).join(City.country)
 
+def _report_from_index(db, country, date_from, date_to, status, after_id):
+    """
+    Strona ID i podsumowanie z jednego przejścia po indeksie etapów - bez zapytań
+    dopasowujących podróże. Zwraca (ID strony od najnowszej, podsumowanie).
+    """
+    # Zakres dat jak w SQL: przecięcie dni [date_from, date_to]
+    start, end = datetime.min, datetime.max
+    if date_from and date_to:
+        start = datetime.combine(date.fromisoformat(date_from), time.min)
+        end = datetime.combine(date.fromisoformat(date_to), time.max)
+
+    country_ids = None
     if country:
-        query = query.filter(Country.name.ilike(f"%{country}%"))
+        country_ids = [c.id for c in db.query(Country.id).filter(Country.name.ilike(f"%{country}%"))]
 
-    if status:
-        query = query.filter(Trip.status == status)
+    trips = stage_index.trip_statuses_overlapping(
+        db, start, end, country_ids=country_ids, trip_status=parse_trip_status(status)
+    )
+    trip_ids = heapq.nlargest(
+        REPORT_PAGE_SIZE + 1,
+        (trip_id for trip_id in trips if after_id is None or trip_id < after_id)
+    )
 
-    if date_from and date_to:
-        query = query.filter(
-            and_(
-                func.date(Stage.start_date) <= date_to,
-                func.date(Stage.end_date) >= date_from
-            )
-        )
+    by_status = {}
+    for trip_status in trips.values():
+        by_status[trip_status.name] = by_status.get(trip_status.name, 0) + 1
+    by_country = {}
+    for country_id, count in stage_index.trips_per_country(trips).items():
+        country_ref = reference_cache.country(db, country_id)
+        if country_ref is not None:
+            by_country[country_ref.name] = by_country.get(country_ref.name, 0) + count
+    summary = {
+        "total": len(trips),
+        "by_status": by_status,
+        "by_country": sorted(by_country.items(), key=lambda item: (-item[1], item[0]))
+    }
+    return trip_ids, summary
+
+
+def iter_report_rows(db, country, date_from, date_to, status):
+    """
+    Strumień lekkich wierszy raportu (id, first_name, last_name, start_date, end_date, status)
+    bez ładowania grafów ORM - pamięć stała niezależnie od liczby podróży.
+    Zawsze z SQL (yield_per): indeks etapów wymagałby zebrania wszystkich pasujących ID w pamięci.
+    """
+    if status and parse_trip_status(status) is None:
+        return
+
+    repository = ReportRepository(db)
+    matching = repository.select_matching_trip_ids(
+        country, date_from, date_to, parse_trip_status(status)
+    )
+    yield from repository.iter_trip_rows(Trip.id.in_(matching))
+
+
+def get_report_page(db, country, date_from, date_to, status, after_id=None):
+    """
+    Strona raportu (keyset po Trip.id malejąco) i podsumowanie.
+    Zwraca (wiersze, after_id następnej strony lub None, podsumowanie).
+    """
+    empty_summary = {"total": 0, "by_status": {}, "by_country": []}
+    if status and parse_trip_status(status) is None:
+        return [], None, empty_summary
 
-    return query.distinct().order_by(Trip.id.desc()).all()
+    repository = ReportRepository(db)
+    if stage_index.enabled:
+        trip_ids, summary = _report_from_index(db, country, date_from, date_to, status, after_id)
+    else:
+        matching = repository.select_matching_trip_ids(country, date_from, date_to, parse_trip_status(status))
+        trip_ids = repository.page_trip_ids(matching, after_id, REPORT_PAGE_SIZE + 1)
+        summary = repository.summary(matching)
+
+    next_after_id = trip_ids[REPORT_PAGE_SIZE - 1] if len(trip_ids) > REPORT_PAGE_SIZE else None
+    rows = repository.page_rows(trip_ids[:REPORT_PAGE_SIZE])
+    return rows, next_after_id, summary
 
 
 @app_bp.route("/reports", methods=["GET", "POST"])
+@read_only
 def reports_page():
-    db = SessionLocal()
-    trips = []
+    db = g.db
+    rows = []
+    summary = None
+    next_after_id = None
     show_modal = False
 
     filter_country = ""
@@ -139,18 +229,22 @@ def reports_page():
         filter_date_from = request.form.get("date_from")
         filter_date_to = request.form.get("date_to")
         filter_status = request.form.get("status")
+        after_id = request.form.get("after_id", type=int)
 
         action = request.form.get("action")
         if action == "report":
             show_modal = True
 
-        trips = get_filtered_trips(db, filter_country, filter_date_from, filter_date_to, filter_status)
-
-    db.close()
+        rows, next_after_id, summary = get_report_page(
+            db, filter_country, filter_date_from, filter_date_to, filter_status, after_id
+        )
 
     return render_template(
         "reports.html",
-        trips=trips,
+        trips=rows,
+        summary=summary,
+        next_after_id=next_after_id,
+        status_labels=REPORT_STATUS_LABELS,
         show_modal=show_modal,
         f_country=filter_country,
         f_date_from=filter_date_from,
@@ -167,29 +261,29 @@ def download_report_csv():
     filter_date_to = request.args.get("date_to", "")
     filter_status = request.args.get("status", "")
 
-    db = SessionLocal
-    trips = get_filtered_trips(db, filter_country, filter_date_from, filter_date_to, filter_status)
-    db.close()
-
-    si = io.StringIO()
-    cw = csv.writer(si, delimiter=";")
-    cw.writerow(["ID", "Podrozny", "Data rozpoczecia", "Data zakonczenia", "Status"])
-
-    status_map = {
-        'PLANNED': 'Planowana',
-        'IN_PROGRESS': 'W trakcie',
-        'COMPLETED': 'Zakończona',
-        'CANCELLED': 'Anulowana'
-    }
-
-    for trip in trips:
-        start_d = trip.stages[0].start_date.strftime('%Y-%m-%d') if trip.stages else ""
-        end_d = trip.stages[-1].end_date.strftime('%Y-%m-%d') if trip.stages else ""
-        stat_name = status_map.get(trip.status.name, trip.status.name)
-
-        traveler_name = f"{trip.traveler.first_name} {trip.traveler.last_name}"
-
-        cw.writerow([trip.id, traveler_name, start_d, end_d, stat_name])
+    def generate():
+        # BOM na początku strumienia, żeby Excel rozpoznał UTF-8
+        yield codecs.BOM_UTF8
+
+        si = io.StringIO()
+        cw = csv.writer(si, delimiter=";")
+        cw.writerow(["ID", "Podrozny", "Data rozpoczecia", "Data zakonczenia", "Status"])
+
+        rows = iter_report_rows(g.db, filter_country, filter_date_from, filter_date_to, filter_status)
+        for count, (trip_id, first_name, last_name, start_date, end_date, status) in enumerate(rows, 1):
+            cw.writerow([
+                trip_id,
+                f"{first_name} {last_name}",
+                start_date.strftime('%Y-%m-%d') if start_date else "",
+                end_date.strftime('%Y-%m-%d') if end_date else "",
+                REPORT_STATUS_LABELS.get(status.name, status.name)
+            ])
+            if count % CSV_FLUSH_ROWS == 0:
+                yield si.getvalue().encode('utf-8')
+                si.seek(0)
+                si.truncate()
+
+        yield si.getvalue().encode('utf-8')
 
     if (filter_country == "" and filter_status == ""):
         file_name = f"{filter_date_from}_{filter_date_to}.csv"
@@ -200,9 +294,8 @@ def download_report_csv():
     else:
         file_name = f"{filter_country}_{filter_date_from}_{filter_date_to}_{filter_status}.csv"
 
-    output = make_response(si.getvalue().encode('utf-8-sig'))
+    output = Response(stream_with_context(generate()), mimetype="text/csv")
     output.headers["Content-Disposition"] = f"attachment; filename={file_name}"
-    output.headers["Content-type"] = "text/csv"
 
     return output
 
@@ -215,37 +308,16 @@ def send_push_page():
         target_type = request.form.get("target_type")
         target_country = request.form.get("country_name")
 
-        db = SessionLocal()
-
-        query = db.query(Traveler).filter(Traveler.pref_push == True)
-
-        if target_type == "country" and target_country:
-            today = date.today()
-            query = query.join(Trip).join(Stage).join(Location).join(City).join(Country)
-            query = query.filter(
-                Trip.status == 'IN_PROGRESS',
-                and_(Stage.start_date <= today, Stage.end_date >= today),
-                Country.name.ilike(f"%{target_country}%")
-            )
-
-        recipients = query.distinct().all()
-
-        count = 0
-        for traveler in recipients:
-            new_notification = Notification(
-                traveler_pesel=traveler.pesel,
-                message=message_body,
-
-                is_read=False,
-                created_at=datetime.now()
-            )
-            db.add(new_notification)
-            count += 1
+        if not message_body:
+            flash("Treść wiadomości jest wymagana.", "error")
+            return redirect(url_for("app_bp.send_push_page"))
 
-        db.commit()
-        db.close()
+        job_id = alert_dispatcher.enqueue(g.db, JOB_PUSH, {
+            "message": message_body,
+            "country_name": target_country if target_type == "country" else None
+        })
 
-        flash(f"Wysłano powiadomienie PUSH do {count} podróżnych.", "success")
+        flash(f"Zlecono wysyłkę powiadomienia PUSH (zadanie nr {job_id}, status: /alert_jobs/{job_id}).", "success")
         return redirect(url_for("app_bp.send_push_page"))
 
     return render_template("send_push.html")
\ No newline at end of file
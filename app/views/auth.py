@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, redirect, url_for, render_template, session, g
-from flask_login import login_user, logout_user
+from flask_login import login_user, logout_user, current_user
+from app.cache.user_cache import user_cache
 from app.services.auth_service import (
     AuthService,
     AuthServiceError,
@@ -50,6 +51,8 @@ def login_page():
 
 @auth_bp.route("/logout", methods=["GET", "POST"])
 def logout():
+    if current_user.is_authenticated:
+        user_cache.invalidate(current_user.get_id())
     logout_user()
     return redirect(url_for('auth.login_page'))
 
@@ -5,6 +5,8 @@ from app.services.companion_service import (
     CompanionNotFoundError,
     TravelerNotFoundError
 )
+from app.repositories.pagination import PageParams, PaginationError
+from app.views.streaming import wants_stream, stream_rows
 
 companions_bp = Blueprint("companions", __name__)
 
@@ -14,8 +16,12 @@ companions_bp = Blueprint("companions", __name__)
 def get_all_companions():
     try:
         service = CompanionService(g.db)
-        companions = service.get_all_companions()
-        return jsonify(companions)
+        params = PageParams.from_args(request.args)
+        if wants_stream():
+            return stream_rows(service.iter_companions(params))
+        return jsonify(service.get_companions_page(params))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
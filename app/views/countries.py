@@ -7,6 +7,8 @@ from app.services.country_service import (
     CountryNotFoundError,
     CityServiceError
 )
+from app.cache.reference_cache import REFERENCE_VERSION
+from app.views.http_cache import conditional
 
 countries_bp = Blueprint('countries', __name__)
 
@@ -52,6 +54,7 @@ def create_city():
 
 
 @countries_bp.route("/countries/<int:country_id>", methods=["GET"])
+@conditional(REFERENCE_VERSION)
 def get_country_with_cities(country_id):
     try:
         service = CountryService(g.db)
@@ -64,6 +67,7 @@ def get_country_with_cities(country_id):
 
 
 @countries_bp.route("/countries", methods=["GET"])
+@conditional(REFERENCE_VERSION)
 def get_all_countries():
     try:
         service = CountryService(g.db)
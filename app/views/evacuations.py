@@ -1,13 +1,15 @@
 from flask import Blueprint, jsonify, request, g, render_template
 from datetime import datetime
-from app.services.evacuation_service import EvacuationService
-from app.models import Country, City
+from app.services.evacuation_service import EvacuationService, EVACUATIONS_VERSION
+from app.cache.reference_cache import reference_cache, REFERENCE_VERSION
+from app.views.http_cache import conditional
 from app.mock_data import get_mock_evacuations, get_mock_countries, get_mock_cities
 
 evacuations_bp = Blueprint('evacuations', __name__)
 
 
 @evacuations_bp.route("/evacuation/all", methods=["GET"])
+@conditional(EVACUATIONS_VERSION, REFERENCE_VERSION)
 def get_evacuations():
     try:
         service = EvacuationService(g.db)
@@ -45,9 +47,9 @@ def edit_evacuation(id):
         # Określenie zakresu ewakuacji
         evacuation_scope = "city" if evacuation.get("cities") else "country"
         
-        # Pobranie krajów i miast z bazy (lub mock danych jeśli baza pusta)
-        countries = g.db.query(Country).all()
-        cities = g.db.query(City).all()
+        # Kraje i miasta z pamięci danych referencyjnych (lub mock danych jeśli baza pusta)
+        countries = reference_cache.countries(g.db)
+        cities = reference_cache.cities(g.db)
         
         # Jeśli baza pusta, użyj mock danych
         if not countries:
@@ -1,7 +1,37 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, jsonify, g
+from app.cache.user_cache import user_cache
+from app.cache.reference_cache import reference_cache
+from app.cache.stage_index import stage_index
+from app.services.warning_sync import warning_sync
+from app.views.http_cache import http_cache_stats
 
 home_bp = Blueprint('home', __name__)
 
 @home_bp.route("/")
 def index():
-    return render_template("index.html")
\ No newline at end of file
+    return render_template("index.html")
+
+
+@home_bp.route("/metrics/user_cache")
+def user_cache_metrics():
+    return jsonify(user_cache.stats())
+
+
+@home_bp.route("/metrics/warning_sync")
+def warning_sync_metrics():
+    return jsonify(warning_sync.stats(g.db))
+
+
+@home_bp.route("/metrics/http_cache")
+def http_cache_metrics():
+    return jsonify(http_cache_stats.to_dict())
+
+
+@home_bp.route("/metrics/reference_cache")
+def reference_cache_metrics():
+    return jsonify(reference_cache.stats())
+
+
+@home_bp.route("/metrics/stage_index")
+def stage_index_metrics():
+    return jsonify(stage_index.stats())
@@ -0,0 +1,107 @@
+"""
+Warunkowe GET dla widoków tylko do odczytu: mocny ETag i Last-Modified wyliczane z liczników
+data_versions, na których opiera się odpowiedź. Zgodny If-None-Match / If-Modified-Since
+kończy się 304 przed wywołaniem widoku - bez zapytań ORM i bez serializacji.
+    @conditional(REFERENCE_VERSION)
+    def get_all_countries(): ...
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Optional
+from flask import Response, g, make_response, request
+from app.cache.version_clock import version_clock
+
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+class HttpCacheStats:
+
+    def __init__(self):
+        self.not_modified = 0
+        self.full = 0
+        self.lock = threading.Lock()
+
+    def record(self, not_modified: bool) -> None:
+        with self.lock:
+            if not_modified:
+                self.not_modified += 1
+            else:
+                self.full += 1
+
+    def to_dict(self) -> Dict:
+        with self.lock:
+            total = self.not_modified + self.full
+            return {
+                "not_modified": self.not_modified,
+                "full": self.full,
+                "not_modified_ratio": round(self.not_modified / total, 4) if total else None,
+                "version_clock": version_clock.stats()
+            }
+
+
+http_cache_stats = HttpCacheStats()
+
+
+def conditional(*version_names: str, max_age: int = 0, period: Optional[float] = None):
+    """
+    version_names - liczniki data_versions, od których zależy treść odpowiedzi.
+    max_age - ile sekund przeglądarka może użyć odpowiedzi bez pytania (0 = zawsze rewalidacja).
+    period - dla treści zależnej od bieżącej chwili (np. "aktywne" ostrzeżenia): walidatory
+    zmieniają się co period sekund, nawet bez zmiany liczników.
+    """
+    cache_control = f"public, max-age={max_age}" if max_age else "no-cache"
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in CONDITIONAL_METHODS:
+                return view(*args, **kwargs)
+
+            # Liczniki czytane przed widokiem: ETag nigdy nie jest nowszy niż treść odpowiedzi
+            versions = version_clock.read(version_names, lambda: g.db)
+            etag, last_modified = _validators(versions, period)
+
+            if _not_modified(etag, last_modified):
+                http_cache_stats.record(not_modified=True)
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                http_cache_stats.record(not_modified=False)
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+
+def _validators(versions: Dict, period: Optional[float]):
+    parts = [request.full_path]
+    parts.extend(f"{name}={version}" for name, (version, _) in sorted(versions.items()))
+    changed = [updated_at for _, updated_at in versions.values()]
+    if period:
+        bucket = int(time.time() // period)
+        parts.append(f"period={bucket}")
+        changed.append(datetime.fromtimestamp(bucket * period, timezone.utc).replace(tzinfo=None))
+    etag = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:32]
+
+    # Last-Modified tylko gdy znamy chwilę każdej zmiany (liczniki sprzed migracji jej nie mają)
+    if not changed or any(updated_at is None for updated_at in changed):
+        return etag, None
+    return etag, max(changed).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    # If-None-Match ma pierwszeństwo - If-Modified-Since tylko bez niego (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
@@ -7,8 +7,11 @@ from app.services.notification_service import (
     TravelerNotFoundError
 )
 from app.services.traveler_service import TravelerService
+from app.services.alert_dispatcher import alert_dispatcher, AlertJobNotFoundError, JOB_EVACUATION
 from app.models import Traveler
 from flask_login import login_required, current_user
+from app.repositories.pagination import PageParams, PaginationError
+from app.views.streaming import wants_stream, stream_rows
 
 # Tworzymy Blueprint
 notifications_bp = Blueprint('notifications', __name__)
@@ -18,8 +21,12 @@ notifications_bp = Blueprint('notifications', __name__)
 def get_all_notifications():
     try:
         service = NotificationService(g.db)
-        notifications = service.get_all_notifications()
-        return jsonify(notifications), 200
+        params = PageParams.from_args(request.args)
+        if wants_stream():
+            return stream_rows(service.iter_notifications(params))
+        return jsonify(service.get_notifications_page(params)), 200
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
@@ -33,8 +40,18 @@ def create_evacuation():
     
     try:
         service = NotificationService(g.db)
-        result = service.create_evacuation_notifications(data)
-        return jsonify(result), 201
+        evacuation = service.create_evacuation(data)
+        # Wysyłka powiadomień trafia do kolejki - odpowiadamy od razu
+        job_id = alert_dispatcher.enqueue(g.db, JOB_EVACUATION, {
+            "city_id": int(data["city_id"]),
+            "description": data["description"]
+        })
+        return jsonify({
+            "message": "Alarm ogłoszony, trwa wysyłka powiadomień",
+            "evacuation_id": evacuation.id,
+            "job_id": job_id,
+            "status_url": f"/alert_jobs/{job_id}"
+        }), 202
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except NotificationServiceError as e:
@@ -43,6 +60,18 @@ def create_evacuation():
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
 
+# Postęp zadania wysyłki alertów
+@notifications_bp.route('/alert_jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_alert_job(job_id):
+    try:
+        return jsonify(alert_dispatcher.get_job(g.db, job_id))
+    except AlertJobNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+
 # --- ENDPOINT 2: Podróżny pobiera swoje powiadomienia (API JSON) ---
 @notifications_bp.route('/travelers/<pesel>/notifications', methods=['GET'])
 def get_notifications(pesel):
@@ -6,6 +6,7 @@ from app.services.stage_service import (
     TripNotFoundError,
     LocationNotFoundError
 )
+from app.repositories.pagination import PageParams, PaginationError
 
 stages_bp = Blueprint("stages", __name__)
 
@@ -15,8 +16,9 @@ stages_bp = Blueprint("stages", __name__)
 def get_stages():
     try:
         service = StageService(g.db)
-        stages = service.get_all_stages()
-        return jsonify(stages)
+        return jsonify(service.get_stages_page(PageParams.from_args(request.args)))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
@@ -0,0 +1,47 @@
+"""
+Strumieniowe odpowiedzi list (NDJSON lub tablica JSON) - stała pamięć niezależnie od liczby wierszy.
+Włączane przez ?stream=1 / nagłówek Accept: application/x-ndjson, albo ?stream=json.
+"""
+from typing import Dict, Iterable
+from flask import Response, current_app, request, stream_with_context
+
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Ile wierszy sklejać w jeden fragment odpowiedzi
+STREAM_BUFFER_ROWS = 100
+
+
+def wants_stream() -> bool:
+    if request.args.get("stream") in ("1", "json"):
+        return True
+    return any(mimetype == NDJSON_MIMETYPE for mimetype, _ in request.accept_mimetypes)
+
+
+def stream_rows(rows: Iterable[Dict]) -> Response:
+    dumps = current_app.json.dumps
+    as_array = request.args.get("stream") == "json"
+
+    def generate():
+        buffer = []
+        first = True
+        if as_array:
+            yield "["
+        for row in rows:
+            if as_array:
+                buffer.append(dumps(row) if first else "," + dumps(row))
+                first = False
+            else:
+                buffer.append(dumps(row) + "\n")
+            if len(buffer) >= STREAM_BUFFER_ROWS:
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            yield "".join(buffer)
+        if as_array:
+            yield "]"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/json" if as_array else NDJSON_MIMETYPE
+    )
@@ -4,6 +4,8 @@ from app.services.traveler_service import (
     TravelerServiceError,
     TravelerAlreadyExistsError
 )
+from app.repositories.pagination import PageParams, PaginationError
+from app.views.streaming import wants_stream, stream_rows
 
 travelers_bp = Blueprint('travelers', __name__)
 
@@ -34,7 +36,11 @@ def create_traveler():
 def get_travelers():
     try:
         service = TravelerService(g.db)
-        travelers = service.get_all_travelers()
-        return jsonify(travelers)
+        params = PageParams.from_args(request.args)
+        if wants_stream():
+            return stream_rows(service.iter_travelers(params))
+        return jsonify(service.get_travelers_page(params))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
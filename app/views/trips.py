@@ -5,6 +5,9 @@ from app.services.trip_service import (
     TripNotFoundError,
     TravelerNotFoundError
 )
+from app.services.trip_stats_service import TripStatsService
+from app.repositories.pagination import PageParams, PaginationError
+from app.views.streaming import wants_stream, stream_rows
 
 trips_bp = Blueprint("trips", __name__)
 
@@ -14,8 +17,25 @@ trips_bp = Blueprint("trips", __name__)
 def get_all_trips():
     try:
         service = TripService(g.db)
-        trips = service.get_all_trips()
-        return jsonify(trips)
+        params = PageParams.from_args(request.args)
+        if wants_stream():
+            return stream_rows(service.iter_trips(params))
+        return jsonify(service.get_trips_page(params))
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+
+
+# --- GET aggregated stats (kostka trip_stats) ---
+# np. /trips/stats?country=Francja&date_from=2026-10-19&date_to=2026-10-25&status=planned,in_progress
+@trips_bp.route("/trips/stats", methods=["GET"])
+def get_trip_stats():
+    try:
+        service = TripStatsService(g.db)
+        return jsonify(service.get_stats(request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
 
@@ -0,0 +1,120 @@
+"""
+Benchmark współbieżnego odczytu i zapisu SQLite: domyślna konfiguracja vs pragmy z app/database/config.py.
+  python -m scripts.benchmark_sqlite_concurrency [--writers 4] [--readers 8] [--seconds 5]
+Piszący wstawiają powiadomienia w małych transakcjach (jak wysyłka alertów),
+czytający liczą nieprzeczytane powiadomienia podróżnego (jak dashboardy).
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database.config import DatabaseSettings, build_engine
+from app.database.database import Base
+from app.models import Notification
+
+TRAVELERS = 1000
+ROWS_PER_WRITE = 20
+
+
+def baseline_settings(url: str) -> DatabaseSettings:
+    """Zachowanie sprzed konfiguracji: bez pragm (tylko domyślny 5 s timeout sterownika sqlite3)"""
+    return DatabaseSettings(url, journal_mode=None, synchronous=None, busy_timeout_ms=None,
+                            cache_size_kib=None, mmap_size=None, temp_store=None)
+
+
+def tuned_settings(url: str) -> DatabaseSettings:
+    """Konfiguracja aplikacji (pragmy z env), ale zawsze na pliku benchmarku"""
+    settings = DatabaseSettings.from_env(url)
+    settings.url = url
+    return settings
+
+
+def run(settings: DatabaseSettings, writers: int, readers: int, seconds: float) -> dict:
+    engine = build_engine(settings)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    counters = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def count(name: str):
+        with lock:
+            counters[name] += 1
+
+    def writer():
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.add_all([
+                    Notification(traveler_pesel=f"{random.randrange(TRAVELERS):011d}",
+                                 message="benchmark", created_at=datetime.now())
+                    for _ in range(ROWS_PER_WRITE)
+                ])
+                db.commit()
+                count("writes")
+            except OperationalError:
+                db.rollback()
+                count("locked")
+            finally:
+                db.close()
+
+    def reader():
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.query(func.count(Notification.id))\
+                    .filter(Notification.traveler_pesel == f"{random.randrange(TRAVELERS):011d}")\
+                    .filter(Notification.is_read == False)\
+                    .scalar()
+                count("reads")
+            except OperationalError:
+                count("locked")
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)] + \
+              [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "writes_per_s": counters["writes"] / seconds,
+        "reads_per_s": counters["reads"] / seconds,
+        "locked": counters["locked"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sqlite-bench-")
+    try:
+        for name, make in (("domyślna", baseline_settings), ("WAL + pragmy", tuned_settings)):
+            url = "sqlite:///" + os.path.join(workdir, f"{name.split()[0]}.db")
+            result = run(make(url), args.writers, args.readers, args.seconds)
+            print(f"{name:>14}: zapisy {result['writes_per_s']:8.1f}/s "
+                  f"({result['writes_per_s'] * ROWS_PER_WRITE:8.0f} wierszy/s), "
+                  f"odczyty {result['reads_per_s']:8.1f}/s, błędy blokady: {result['locked']}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
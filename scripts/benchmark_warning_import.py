@@ -0,0 +1,136 @@
+"""
+Benchmark importu ostrzeżeń konsularnych z dużego feedu XML: ET.parse (całe drzewo w pamięci)
+vs strumieniowy import WarningService (iterparse + paczki).
+  python -m scripts.benchmark_warning_import [--megabytes 512] [--skip-tree] [--keep FEED.xml]
+Feed jest generowany w formacie warnings_v1.xml/warnings_v2.xml; dla feedów wielogigabajtowych
+(np. --megabytes 4096) warto dodać --skip-tree - samo drzewo ET potrzebuje kilku GB RAM.
+Każdy tryb działa w osobnym procesie, żeby szczytowe zużycie pamięci (max RSS) było niezależne.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from sqlalchemy.orm import sessionmaker
+from app.database.config import DatabaseSettings, build_engine
+from app.database.database import Base
+from app.services.warning_service import WarningService
+
+LEVELS = ("LOW", "MEDIUM", "HIGH", "EXTREME")
+TYPES = ("Pogodowe", "Administracyjne", "Bezpieczeństwo", "Zdrowotne")
+CONTENT_WORDS = ("sytuacja", "region", "granica", "wjazd", "konsulat", "ewakuacja", "zalecenie",
+                 "podróżni", "lotnisko", "powódź", "protest", "wiza", "kontrola", "zagrożenie")
+
+
+def generate_feed(path: str, megabytes: int, seed: int = 7) -> int:
+    """Zapisuje feed o rozmiarze ok. megabytes MB; zwraca liczbę ostrzeżeń"""
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    written = 0
+    count = 0
+    with open(path, "w", encoding="utf-8") as feed:
+        feed.write("<warnings>\n")
+        while written < target:
+            content = " ".join(rng.choice(CONTENT_WORDS) for _ in range(rng.randint(40, 160)))
+            item = (
+                "    <warning>\n"
+                f"        <idZewnetrzne>{count}</idZewnetrzne>\n"
+                f"        <nazwa>Ostrzeżenie {count}</nazwa>\n"
+                f"        <tresc>{content}</tresc>\n"
+                f"        <typ>{rng.choice(TYPES)}</typ>\n"
+                f"        <poziomZagrozenia>{rng.choice(LEVELS)}</poziomZagrozenia>\n"
+                f"        <dataWaznosci>2030-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}</dataWaznosci>\n"
+                "    </warning>\n"
+            )
+            feed.write(item)
+            written += len(item.encode("utf-8"))
+            count += 1
+        feed.write("</warnings>\n")
+    return count
+
+
+def max_rss_mib() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KiB, macOS bajty
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def run_tree(feed_path: str) -> dict:
+    """Zachowanie sprzed importu strumieniowego: całe drzewo, potem przejście po elementach"""
+    root = ET.parse(feed_path).getroot()
+    return {"received": sum(1 for _ in root.findall("warning"))}
+
+
+def run_stream(feed_path: str, database_path: str) -> dict:
+    # Bez mmap: strony pliku bazy zmapowane w pamięci liczyłyby się do RSS procesu
+    engine = build_engine(DatabaseSettings("sqlite:///" + database_path, mmap_size=None))
+    Base.metadata.create_all(bind=engine)
+    service = WarningService(sessionmaker(bind=engine, autoflush=False))
+    first = service.run_import_cycle(feed_path)
+    # Drugi cykl na tym samym feedzie: tylko porównanie skrótów, bez zapisów
+    second = service.run_import_cycle(feed_path)
+    engine.dispose()
+    return {"received": first["received"], "first_cycle": first, "second_cycle": second}
+
+
+def child(mode: str, feed_path: str, database_path: str):
+    started = time.perf_counter()
+    result = run_tree(feed_path) if mode == "tree" else run_stream(feed_path, database_path)
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    result["max_rss_mib"] = round(max_rss_mib(), 1)
+    print(json.dumps(result))
+
+
+def measure(mode: str, feed_path: str, database_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "scripts.benchmark_warning_import", "--child", mode, feed_path, database_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    # Ostatnia linia to wynik; wcześniejsze to komunikaty importu
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=512)
+    parser.add_argument("--skip-tree", action="store_true")
+    parser.add_argument("--keep", help="zachowaj wygenerowany feed pod tą ścieżką")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "FEED", "DATABASE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="warning-bench-")
+    try:
+        feed_path = os.path.join(workdir, "feed.xml")
+        started = time.perf_counter()
+        count = generate_feed(feed_path, args.megabytes)
+        size_mib = os.path.getsize(feed_path) / 1024 / 1024
+        print(f"Feed: {count} ostrzeżeń, {size_mib:.0f} MiB (wygenerowano w {time.perf_counter() - started:.1f} s)")
+
+        modes = ["stream"] if args.skip_tree else ["tree", "stream"]
+        for mode in modes:
+            result = measure(mode, feed_path, os.path.join(workdir, f"{mode}.db"))
+            line = f"{mode:>6}: {result['seconds']:8.2f} s, max RSS {result['max_rss_mib']:8.1f} MiB"
+            if mode == "stream":
+                first, second = result["first_cycle"], result["second_cycle"]
+                line += (f", import {first['total_seconds']:.2f} s ({first['inserted']} nowych), "
+                         f"ponowny cykl {second['total_seconds']:.2f} s ({second['unchanged']} bez zmian)")
+            print(line)
+
+        if args.keep:
+            shutil.move(feed_path, args.keep)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import sys
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.models import Base
-from app.database.database import DATABASE_NAME
+from app.database.database import engine
+from app.repositories.presence_repository import PresenceRepository
 
 
 def print_usage():
@@ -12,9 +12,13 @@ def print_usage():
 
 
 def init_database():
-    engine = create_engine(f"sqlite:///{DATABASE_NAME}.db", echo=True)
+    # Baza z DATABASE_URL (domyślnie plik SQLite Database.db)
     Session = sessionmaker(bind=engine, autoflush=True)
     Base.metadata.create_all(engine)
+    # Projekcja traveler_presence zbudowana (i oznaczona jako kompletna) od początku
+    with Session() as db:
+        PresenceRepository(db).rebuild()
+        db.commit()
     return engine, Session
 
 
@@ -0,0 +1,86 @@
+"""
+Sprawdza (EXPLAIN QUERY PLAN), czy gorące zapytania korzystają z indeksów z app/models.py.
+Kończy się kodem 1, jeśli któreś zapytanie nie używa oczekiwanego indeksu.
+
+Uruchomienie: python -m scripts.explain_hot_queries
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import select, text
+from app.database.database import engine, SessionLocal
+from app.models import Trip, Stage, Location, City
+from app.models import TripStatus
+from app.repositories.traveler_repository import TravelerRepository
+from app.repositories.presence_repository import PresenceRepository
+
+
+def hot_queries(db):
+    now = datetime.now()
+    travelers = TravelerRepository(db)
+    presence = PresenceRepository(db)
+    return [
+        (
+            "Ewakuacja: podróżni w mieście teraz",
+            presence.select_pesels_in_city(1, now),
+            ["ix_traveler_presence_city"]
+        ),
+        (
+            "Push: podróżni w kraju teraz",
+            travelers.select_push_recipients(
+                presence.select_pesels_in_country("Francja", now, TripStatus.IN_PROGRESS)
+            ),
+            ["ix_traveler_presence_country"]
+        ),
+        (
+            "Etapy podróży",
+            select(Stage.id).where(Stage.trip_id == 1),
+            ["ix_stages_trip_id"]
+        ),
+        (
+            "Podróże podróżnego",
+            select(Trip.id).where(Trip.traveler_pesel == "00000000000"),
+            ["ix_trips_traveler_pesel"]
+        ),
+        (
+            "Raporty: podróże w kraju w zakresie dat",
+            select(Trip.id)
+                .join(Stage, Stage.trip_id == Trip.id)
+                .join(Location, Location.id == Stage.location_id)
+                .join(City, City.id == Location.city_id)
+                .where(City.country_id == 1)
+                .where(Stage.start_date <= now, Stage.end_date >= now)
+                .distinct(),
+            ["ix_cities_country_id", "ix_locations_city_id", "ix_stages_location_window"]
+        ),
+    ]
+
+
+def explain(db, query) -> str:
+    compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+    if engine.dialect.name == "sqlite":
+        rows = db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+        return "\n".join(row[-1] for row in rows)
+    # PostgreSQL: plan tekstowy, nazwy indeksów w liniach "Index Scan using ..."
+    rows = db.execute(text(f"EXPLAIN {compiled}")).fetchall()
+    return "\n".join(row[0] for row in rows)
+
+
+def main() -> int:
+    db = SessionLocal()
+    failures = 0
+    try:
+        for name, query, expected in hot_queries(db):
+            plan = explain(db, query)
+            missing = [index for index in expected if index not in plan]
+            status = "OK" if not missing else "BRAK: " + ", ".join(missing)
+            print(f"--- {name}: {status}")
+            print(plan)
+            if missing:
+                failures += 1
+    finally:
+        db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,43 +1,177 @@
 """
 Uniwersalny skrypt migracji bazy danych
-Dodaje brakujące kolumny do istniejących tabel
+Dodaje brakujące kolumny i indeksy do istniejących tabel.
+Działa na bazie z DATABASE_URL (SQLite lub PostgreSQL) - bez SQL zależnego od dialektu.
 """
-import sqlite3
-import os
+import sys
+from sqlalchemy import inspect, false, true, null, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+from app.database.database import engine, DATABASE_URL
+from app.models import Base
+from app.repositories.presence_repository import PresenceRepository
 
-DATABASE_NAME = "Database"
+
+# Kolumny preferencji powiadomień: (nazwa, wartość domyślna)
+PREFERENCE_COLUMNS = [
+    ("pref_sms", false()),
+    ("pref_email", false()),
+    ("pref_push", true()),
+]
+
+# Skrót treści i feed ostrzeżenia; NULL w istniejących wierszach = zaktualizuj przy najbliższym imporcie
+WARNING_HASH_COLUMNS = [
+    ("content_hash", null()),
+    ("source", null()),
+]
+
+# Chwila zmiany licznika (Last-Modified); NULL = nieznana do najbliższej zmiany
+DATA_VERSION_COLUMNS = [
+    ("updated_at", null()),
+]
+
+# Dzierżawa zadań wysyłki alertów; NULL = zadanie nie jest wykonywane
+ALERT_JOB_LEASE_COLUMNS = [
+    ("claimed_by", null()),
+    ("heartbeat_at", null()),
+]
+
+# Etap wysyłki zadań alertów; NULL = powiadomienia jeszcze niezapisane
+ALERT_JOB_DELIVERY_COLUMNS = [
+    ("written_at", null()),
+    ("deliveries", null()),
+    ("delivery_attempts", text("0")),
+]
+
+
+def add_missing_columns(connection: Connection, table_name: str, columns) -> bool:
+    """Dodaje do tabeli brakujące kolumny (typ z modelu, wartość domyślna z listy)"""
+    dialect = connection.dialect
+    existing = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    table = Base.metadata.tables[table_name]
+    added = False
+    for name, default in columns:
+        if name in existing:
+            continue
+        column_type = table.c[name].type.compile(dialect=dialect)
+        default_sql = default.compile(dialect=dialect)
+        connection.exec_driver_sql(
+            f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type} DEFAULT {default_sql}"
+        )
+        added = True
+    return added
+
+
+def add_preference_columns(connection: Connection) -> bool:
+    """Dodaje brakujące kolumny pref_sms, pref_email, pref_push do tabeli travelers"""
+    return add_missing_columns(connection, "travelers", PREFERENCE_COLUMNS)
+
+
+def missing_indexes(connection: Connection):
+    """Indeksy zadeklarowane w modelach, których brakuje w istniejącej bazie"""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
 
 
 def migrate_database():
     """Wykonuje migracje bazy danych"""
-    db_path = f"{DATABASE_NAME}.db"
-    
-    if not os.path.exists(db_path):
-        print(f"Baza danych {db_path} nie istnieje. Uruchom najpierw create_database.py")
+    inspector = inspect(engine)
+    if "travelers" not in inspector.get_table_names():
+        print(f"Baza danych {DATABASE_URL} nie ma tabel. Uruchom najpierw create_database.py")
         return False
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
     migrations_applied = []
     
     try:
-        # Sprawdź istniejące kolumny
-        cursor.execute("PRAGMA table_info(travelers)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        # Migracja 1: Dodaj kolumny preferencji jeśli nie istnieją
-        if 'pref_sms' not in columns:
-            print("Migracja 1: Dodawanie kolumn preferencji...")
-            cursor.execute("ALTER TABLE travelers ADD COLUMN pref_sms INTEGER DEFAULT 0")
-            cursor.execute("ALTER TABLE travelers ADD COLUMN pref_email INTEGER DEFAULT 0")
-            cursor.execute("ALTER TABLE travelers ADD COLUMN pref_push INTEGER DEFAULT 1")
-            migrations_applied.append("preferences_columns")
-            print("   ✅ Kolumny preferencji dodane")
-        else:
-            print("   ⏭️  Kolumny preferencji już istnieją")
-        
-        conn.commit()
+        with engine.begin() as connection:
+            # Migracja 1: Dodaj kolumny preferencji jeśli nie istnieją
+            if add_preference_columns(connection):
+                print("Migracja 1: Dodawanie kolumn preferencji...")
+                migrations_applied.append("preferences_columns")
+                print("   ✅ Kolumny preferencji dodane")
+            else:
+                print("   ⏭️  Kolumny preferencji już istnieją")
+            
+            # Migracja 2: Skrót treści ostrzeżeń konsularnych (import różnicowy)
+            if "consular_warnings" in inspector.get_table_names() and \
+                    add_missing_columns(connection, "consular_warnings", WARNING_HASH_COLUMNS):
+                print("Migracja 2: Dodawanie kolumn content_hash / source...")
+                migrations_applied.append("warning_import_columns")
+                print("   ✅ Kolumny ostrzeżeń dodane")
+            else:
+                print("   ⏭️  Kolumny content_hash / source już istnieją")
+
+            # Migracja 3: Chwila zmiany liczników data_versions (walidatory HTTP)
+            if "data_versions" in inspector.get_table_names() and \
+                    add_missing_columns(connection, "data_versions", DATA_VERSION_COLUMNS):
+                print("Migracja 3: Dodawanie kolumny data_versions.updated_at...")
+                migrations_applied.append("data_version_columns")
+                print("   ✅ Kolumna updated_at dodana")
+            else:
+                print("   ⏭️  Kolumna data_versions.updated_at już istnieje")
+
+            # Migracja 4: Dzierżawa zadań wysyłki alertów (wznawianie tylko porzuconych zadań)
+            if "alert_jobs" in inspector.get_table_names() and \
+                    add_missing_columns(connection, "alert_jobs", ALERT_JOB_LEASE_COLUMNS):
+                print("Migracja 4: Dodawanie kolumn claimed_by / heartbeat_at...")
+                migrations_applied.append("alert_job_lease_columns")
+                print("   ✅ Kolumny dzierżawy zadań dodane")
+            else:
+                print("   ⏭️  Kolumny claimed_by / heartbeat_at już istnieją")
+
+            # Migracja 5: Indeksy zadeklarowane w modelach (ścieżka "kto jest teraz w mieście X")
+            indexes = missing_indexes(connection)
+            if indexes:
+                print("Migracja 5: Tworzenie indeksów...")
+                for index in indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+                    print(f"   ✅ {index.name}")
+                connection.exec_driver_sql("ANALYZE")
+                migrations_applied.append("indexes")
+            else:
+                print("   ⏭️  Indeksy już istnieją")
+
+            # Migracja 6: Projekcja traveler_presence z istniejących etapów (odbiorcy alertów)
+            for table_name in ("data_versions", "traveler_presence"):
+                Base.metadata.tables[table_name].create(connection, checkfirst=True)
+            session = Session(bind=connection)
+            presence = PresenceRepository(session)
+            if not presence.is_complete():
+                print("Migracja 6: Odbudowa projekcji traveler_presence...")
+                count = presence.rebuild()
+                session.flush()
+                migrations_applied.append("traveler_presence")
+                print(f"   ✅ Wierszy obecności: {count}")
+            else:
+                print("   ⏭️  Projekcja traveler_presence jest aktualna")
+            session.close()
+
+            # Migracja 7: Dziennik zmian etapów (odświeżanie indeksu etapów w pamięci bez przeładowania)
+            if "stage_changes" not in inspector.get_table_names():
+                print("Migracja 7: Tworzenie tabeli stage_changes...")
+                Base.metadata.tables["stage_changes"].create(connection)
+                migrations_applied.append("stage_changes")
+                print("   ✅ Tabela stage_changes utworzona")
+            else:
+                print("   ⏭️  Tabela stage_changes już istnieje")
+
+            # Migracja 8: Etap wysyłki zadań alertów (ponawianie wysyłek bez ponownego zapisu powiadomień)
+            if "alert_jobs" in inspector.get_table_names() and \
+                    add_missing_columns(connection, "alert_jobs", ALERT_JOB_DELIVERY_COLUMNS):
+                print("Migracja 8: Dodawanie kolumn written_at / deliveries / delivery_attempts...")
+                migrations_applied.append("alert_job_delivery_columns")
+                print("   ✅ Kolumny etapu wysyłki dodane")
+            else:
+                print("   ⏭️  Kolumny written_at / deliveries / delivery_attempts już istnieją")
         
         if migrations_applied:
             print(f"\n✅ Zastosowano {len(migrations_applied)} migracji:")
@@ -48,16 +182,14 @@ def migrate_database():
         
         return True
         
-    except sqlite3.Error as e:
+    except SQLAlchemyError as e:
         print(f"❌ Błąd podczas migracji: {e}")
-        conn.rollback()
         return False
-    finally:
-        conn.close()
 
 
 if __name__ == "__main__":
     print("=" * 50)
     print("Migracja bazy danych")
     print("=" * 50)
-    migrate_database()
+    if not migrate_database():
+        sys.exit(1)
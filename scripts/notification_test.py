@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
 from app import create_app
 from app.database.database import SessionLocal
-from app.models import Country, City, Location, Traveler, Trip, Stage
+from app.models import Country, City, Location, Traveler, Trip, TripStatus
+from app.cache.reference_cache import REFERENCE_VERSION
+from app.repositories.data_version_repository import DataVersionRepository
+from app.services.trip_service import TripService
 from werkzeug.security import generate_password_hash
 
 app = create_app()
@@ -17,6 +20,7 @@ def setup_real_data():
         if not country:
             country = Country(name="Francja")
             session.add(country)
+            DataVersionRepository(session).bump(REFERENCE_VERSION)
             session.commit()
             print(f"[OK] Dodano kraj: Francja (ID: {country.id})")
         else:
@@ -27,6 +31,7 @@ def setup_real_data():
         if not city:
             city = City(name="Paryż", country_id=country.id)
             session.add(city)
+            DataVersionRepository(session).bump(REFERENCE_VERSION)
             session.commit()
             print(f"[OK] Dodano miasto: Paryż (ID: {city.id})")
         else:
@@ -37,6 +42,7 @@ def setup_real_data():
         if not location:
             location = Location(address="Place Vendôme 15, Paryż", city_id=city.id)
             session.add(location)
+            DataVersionRepository(session).bump(REFERENCE_VERSION)
             session.commit()
 
         # 4. Tworzenie Podróżnej: Anna Nowak
@@ -64,21 +70,19 @@ def setup_real_data():
         end_date = now + timedelta(days=5)  # Wyjeżdża za 5 dni
 
         # Sprawdzamy czy ta wycieczka już jest, żeby nie dublować
-        existing_trip = session.query(Trip).filter_by(traveler_pesel=pesel, status="IN_PROGRESS").first()
+        existing_trip = session.query(Trip).filter_by(traveler_pesel=pesel, status=TripStatus.IN_PROGRESS).first()
 
         if not existing_trip:
-            trip = Trip(status="IN_PROGRESS", traveler_pesel=pesel)
-            session.add(trip)
-            session.commit()
-
-            stage = Stage(
-                trip_id=trip.id,
-                location_id=location.id,  # Paryż
-                start_date=start_date,
-                end_date=end_date
-            )
-            session.add(stage)
-            session.commit()
+            # Przez TripService - etap trafia też do traveler_presence, trip_stats i dziennika zmian etapów
+            TripService(session).create_trip({
+                "status": TripStatus.IN_PROGRESS.value,
+                "traveler_pesel": pesel,
+                "stages": [{
+                    "location_id": location.id,  # Paryż
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat()
+                }]
+            })
             print(f"[OK] Utworzono podróż do Paryża (aktywna w tej chwili!)")
         else:
             print("[INFO] Anna Nowak ma już zaplanowaną podróż.")
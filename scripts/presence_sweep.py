@@ -0,0 +1,48 @@
+"""
+Utrzymanie projekcji traveler_presence:
+  python -m scripts.presence_sweep            # co godzinę usuwa wygasłe wiersze
+  python -m scripts.presence_sweep --rebuild  # jednorazowo odbudowuje projekcję z tabeli stages
+"""
+import sys
+import time
+from datetime import datetime
+from app.database.database import SessionLocal, Base, engine
+from app.repositories.presence_repository import PresenceRepository
+
+SWEEP_INTERVAL = 3600
+
+
+def rebuild_presence() -> int:
+    db = SessionLocal()
+    try:
+        count = PresenceRepository(db).rebuild()
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+def sweep_presence() -> int:
+    db = SessionLocal()
+    try:
+        count = PresenceRepository(db).expire(datetime.now())
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+def start_sweeping():
+    print(f"Uruchomiono czyszczenie traveler_presence (co {SWEEP_INTERVAL} s)...")
+    while True:
+        removed = sweep_presence()
+        print(f"[{datetime.now()}] Usunięto wygasłych wierszy: {removed}")
+        time.sleep(SWEEP_INTERVAL)
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    if "--rebuild" in sys.argv:
+        print(f"Odbudowano traveler_presence: {rebuild_presence()} wierszy")
+    else:
+        start_sweeping()
@@ -0,0 +1,26 @@
+"""
+Odbudowa kostki statystyk trip_stats z tabeli stages:
+  python -m scripts.rebuild_trip_stats
+Na bieżąco kostkę aktualizują StageService/TripService - skrypt służy do
+pierwszego wypełnienia i naprawy po zmianach wykonanych poza aplikacją.
+"""
+import time
+from app.database.database import SessionLocal, Base, engine
+from app.repositories.trip_stats_repository import TripStatsRepository
+
+
+def rebuild_trip_stats() -> int:
+    db = SessionLocal()
+    try:
+        count = TripStatsRepository(db).rebuild()
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    count = rebuild_trip_stats()
+    print(f"Odbudowano trip_stats: {count} komórek w {time.perf_counter() - started:.1f} s")
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
 from app.database.database import SessionLocal, Base, engine
 from app.models import Country, City, Location
+from app.cache.reference_cache import REFERENCE_VERSION
+from app.repositories.data_version_repository import DataVersionRepository
 
 # Tworzymy tabele jeśli jeszcze nie istnieją
 Base.metadata.create_all(bind=engine)
@@ -42,6 +44,8 @@ try:
     loc6 = Location(address="Rue de la République 12", city=lyon)
 
     db.add_all([loc1, loc2, loc3, loc4, loc5, loc6])
+    # Działające procesy aplikacji odświeżą pamięć danych referencyjnych
+    DataVersionRepository(db).bump(REFERENCE_VERSION)
     db.commit()
 
     print("Dane zostały dodane do bazy!")
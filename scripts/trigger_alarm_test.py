@@ -17,9 +17,10 @@ try:
     # Wysyłamy żądanie POST (tak jakby admin kliknął przycisk w formularzu)
     response = requests.post(URL, json=payload)
 
-    if response.status_code == 201:
+    if response.status_code == 202:
         print("SUKCES! Serwer odpowiedział:")
         print(response.json())
+        print(f"Postęp wysyłki: {URL.rsplit('/', 1)[0]}{response.json()['status_url']}")
         print("\nTeraz zaloguj się jako Anna (login: anna, hasło: test) i sprawdź powiadomienia.")
     else:
         print("BŁĄD. Serwer odpowiedział:")
@@ -1,17 +1,38 @@
-# sync_trigger.py
-from datetime import datetime
-import time
-from app.services.warning_service import WarningService
+"""
+Worker synchronizacji ostrzeżeń konsularnych (poza procesem aplikacji):
+  python -m scripts.warning_sync_trigger                      # feedy z WARNING_FEEDS, co WARNING_SYNC_INTERVAL s
+  python -m scripts.warning_sync_trigger feed1.xml https://... # własna lista feedów
+  python -m scripts.warning_sync_trigger --once               # jeden obieg i koniec
+Kilka workerów (i aplikacja z WARNING_SYNC_ENABLED=1) może działać równolegle -
+importuje tylko lider (tabela scheduler_leases).
+"""
+import argparse
+from app.database.database import Base, engine
+from app.services.warning_sync import warning_sync
 
-service = WarningService()
 
-def start_polling():
-    print("Uruchomiono cykl pobierania (co 15 min)...")
-    while True:
-        # ZMIANA NAZWY PLIKU XML W RAZIE POTRZEBY
-        success = service.run_import_cycle('external_data/warnings_v2.xml')
-        print(f"[{datetime.now()}] Import status: {success}")
-        time.sleep(900) # 15 minut
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("feeds", nargs="*", help="ścieżki lub URL-e feedów XML")
+    parser.add_argument("--interval", type=float, help="odstęp między obiegami w sekundach")
+    parser.add_argument("--once", action="store_true", help="wykonaj jeden obieg")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    warning_sync.configure(feeds=args.feeds or None, interval=args.interval)
+
+    if args.once:
+        warning_sync.tick()
+        if not warning_sync.is_leader:
+            print("Inny proces jest liderem synchronizacji - pominięto")
+        warning_sync.stop()
+        return
+
+    try:
+        warning_sync.run_forever()
+    except KeyboardInterrupt:
+        warning_sync.stop()
+
 
 if __name__ == "__main__":
-    start_polling()
\ No newline at end of file
+    main()
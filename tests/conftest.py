@@ -0,0 +1,52 @@
+"""
+Wspólne fikstury testów: osobna baza dla każdego testu, sesja jak w aplikacji (autoflush=False)
+i licznik wykonanych instrukcji SQL. TEST_DATABASE_URL wskazuje jednorazową bazę PostgreSQL
+(tabele tworzone i usuwane przy każdym teście); bez niej - plik SQLite w katalogu tymczasowym.
+"""
+import os
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from app.database.config import DatabaseSettings, build_engine
+from app.database.database import Base
+import app.models  # noqa: F401 - rejestracja tabel w Base.metadata
+
+
+@pytest.fixture
+def engine(tmp_path):
+    if os.environ.get("TEST_DATABASE_URL"):
+        engine = build_engine(DatabaseSettings.from_env(None, url_variable="TEST_DATABASE_URL"))
+        Base.metadata.drop_all(bind=engine)
+    else:
+        engine = build_engine(DatabaseSettings("sqlite:///" + str(tmp_path / "test.db"), mmap_size=None))
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    if os.environ.get("TEST_DATABASE_URL"):
+        Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def count_statements(engine):
+    """with count_statements() as statements: ... - lista instrukcji wykonanych w bloku"""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return counter
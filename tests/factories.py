@@ -0,0 +1,51 @@
+"""
+Minimalne dane testowe: podróżni, lokalizacje (kraj -> miasto -> lokalizacja), podróże z etapami,
+companioni i ewakuacje
+"""
+from datetime import datetime
+from app.models import City, Companion, Country, Evacuation, EvacuationArea, Location, Stage, Traveler, Trip, TripStatus
+
+
+def add_traveler(db, pesel: str) -> Traveler:
+    traveler = Traveler(pesel=pesel, first_name="Jan", last_name="Kowalski",
+                        login=f"login{pesel}", password_hash="x")
+    db.add(traveler)
+    return traveler
+
+
+def add_location(db, country_name: str, city_name: str) -> Location:
+    country = db.query(Country).filter_by(name=country_name).first() or Country(name=country_name)
+    city = City(name=city_name, country=country)
+    location = Location(address=f"{city_name} 1", city=city)
+    db.add(location)
+    db.flush()
+    return location
+
+
+def add_trip(db, traveler: Traveler, stages, status: TripStatus = TripStatus.PLANNED) -> Trip:
+    """stages: [(location, start, end)] z datami jako napisy ISO"""
+    trip = Trip(status=status, traveler=traveler)
+    db.add(trip)
+    db.flush()
+    for location, start, end in stages:
+        db.add(Stage(trip_id=trip.id, location_id=location.id,
+                     start_date=datetime.fromisoformat(start), end_date=datetime.fromisoformat(end)))
+    db.flush()
+    return trip
+
+
+def add_companion(db, trip: Trip, pesel: str) -> Companion:
+    companion = Companion(pesel=pesel, first_name="Anna", last_name="Nowak",
+                          added_by_pesel=trip.traveler_pesel)
+    companion.trips.append(trip)
+    db.add(companion)
+    db.flush()
+    return companion
+
+
+def add_evacuation(db, cities) -> Evacuation:
+    evacuation = Evacuation(action_name="Ewakuacja", event_description="Powódź")
+    evacuation.evacuation_areas = [EvacuationArea(city=city) for city in cities]
+    db.add(evacuation)
+    db.flush()
+    return evacuation
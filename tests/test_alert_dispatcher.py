@@ -0,0 +1,169 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from sqlalchemy.orm import sessionmaker
+from app.models import AlertJob, AlertJobStatus, Notification
+from app.delivery import DeliveryChannel, DeliveryEngine, set_delivery_engine
+from app.repositories.alert_job_repository import AlertJobRepository
+from app.services.alert_dispatcher import AlertDispatcher, JOB_PUSH
+from app.services.notification_service import NotificationService
+from tests.factories import add_traveler
+
+
+@pytest.fixture
+def dispatcher(engine):
+    dispatcher = AlertDispatcher()
+    dispatcher.session_factory = sessionmaker(bind=engine, autoflush=False)
+    dispatcher.lease_seconds = 60
+    return dispatcher
+
+
+def add_running_job(db, holder, heartbeat_age_seconds):
+    heartbeat = datetime.now() - timedelta(seconds=heartbeat_age_seconds)
+    job = AlertJob(kind=JOB_PUSH, payload='{"message": "test"}', status=AlertJobStatus.RUNNING,
+                   started_at=heartbeat, claimed_by=holder, heartbeat_at=heartbeat)
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def test_recover_leaves_jobs_with_live_lease(db, dispatcher):
+    job_id = add_running_job(db, "other-process", heartbeat_age_seconds=5)
+
+    assert dispatcher.recover() == 0
+
+    db.expire_all()
+    job = db.get(AlertJob, job_id)
+    assert job.status == AlertJobStatus.RUNNING
+    assert job.claimed_by == "other-process"
+
+
+def test_recover_runs_job_with_expired_lease_once(db, dispatcher):
+    add_traveler(db, "1")
+    job_id = add_running_job(db, "dead-process", heartbeat_age_seconds=600)
+
+    assert dispatcher.recover() == 1
+    assert dispatcher.recover() == 0
+
+    db.expire_all()
+    job = db.get(AlertJob, job_id)
+    assert job.status == AlertJobStatus.DONE
+    assert job.claimed_by == dispatcher.holder
+    assert db.query(Notification).count() == 1
+
+
+def test_finish_rejected_after_lease_was_taken_over(db):
+    repository = AlertJobRepository(db)
+    job = AlertJob(kind=JOB_PUSH, payload="{}", status=AlertJobStatus.QUEUED)
+    repository.create(job)
+    assert repository.claim(job.id, "first")
+    db.commit()
+
+    # "first" przestaje odnawiać dzierżawę, zadanie przejmuje "second"
+    db.query(AlertJob).filter_by(id=job.id).update({"heartbeat_at": datetime.now() - timedelta(hours=1)})
+    assert repository.requeue_expired(lease_seconds=60) == 1
+    assert repository.claim(job.id, "second")
+    db.commit()
+
+    assert not repository.finish(job.id, "first")
+    assert repository.finish(job.id, "second")
+
+
+class FlakyPush(DeliveryChannel):
+    name = "push"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.messages = []
+
+    def send_batch(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("bramka push niedostępna")
+        self.messages.extend(messages)
+        return len(messages)
+
+
+@pytest.fixture
+def push_channel():
+    channel = FlakyPush(failures=1)
+    set_delivery_engine(DeliveryEngine({"push": channel}))
+    yield channel
+    set_delivery_engine(None)
+
+
+def test_failed_delivery_is_retried_without_rewriting_notifications(db, dispatcher, push_channel):
+    add_traveler(db, "1")
+    db.commit()
+    job_id = dispatcher.enqueue(db, JOB_PUSH, {"message": "komunikat"})
+
+    db.expire_all()
+    job = db.get(AlertJob, job_id)
+    assert job.status == AlertJobStatus.QUEUED
+    assert job.written_at is not None and job.delivery_attempts == 1
+    assert push_channel.messages == []
+
+    assert dispatcher.recover() == 1
+
+    db.expire_all()
+    job = db.get(AlertJob, job_id)
+    assert job.status == AlertJobStatus.DONE
+    assert [m.traveler_pesel for m in push_channel.messages] == ["1"]
+    assert db.query(Notification).count() == 1
+
+
+def test_crash_during_delivery_leaves_job_for_recovery(db, dispatcher, push_channel, monkeypatch):
+    add_traveler(db, "1")
+    db.commit()
+
+    def crash(self, plan):
+        raise RuntimeError("proces przerwany")
+    monkeypatch.setattr(NotificationService, "deliver_plan", crash)
+    job_id = dispatcher.enqueue(db, JOB_PUSH, {"message": "komunikat"})
+    monkeypatch.undo()
+
+    db.expire_all()
+    assert db.get(AlertJob, job_id).status == AlertJobStatus.QUEUED
+
+    push_channel.failures = 0
+    dispatcher.recover()
+
+    db.expire_all()
+    assert db.get(AlertJob, job_id).status == AlertJobStatus.DONE
+    assert len(push_channel.messages) == 1
+    assert db.query(Notification).count() == 1
+
+
+def test_delivery_gives_up_after_attempt_limit(db, dispatcher, push_channel):
+    add_traveler(db, "1")
+    db.commit()
+    push_channel.failures = 100
+    dispatcher.delivery_attempts = 2
+
+    job_id = dispatcher.enqueue(db, JOB_PUSH, {"message": "komunikat"})
+    dispatcher.recover()
+
+    db.expire_all()
+    job = db.get(AlertJob, job_id)
+    assert job.status == AlertJobStatus.DONE
+    assert "push" in job.error
+
+
+def test_inline_mode_renews_lease_of_running_job(db, dispatcher):
+    app = Flask(__name__)
+    app.config.update(ALERT_WORKERS=0, ALERT_JOB_LEASE_SECONDS=0.3)
+    job_id = add_running_job(db, dispatcher.holder, heartbeat_age_seconds=0)
+    claimed_at = db.get(AlertJob, job_id).heartbeat_at
+
+    dispatcher.init_app(app)
+    try:
+        assert dispatcher.executor is None
+        time.sleep(0.5)
+    finally:
+        dispatcher.stop()
+
+    db.expire_all()
+    job = db.get(AlertJob, job_id)
+    assert job.status == AlertJobStatus.RUNNING
+    assert job.heartbeat_at > claimed_at
@@ -0,0 +1,98 @@
+import time
+import pytest
+from app.delivery import ChannelSettings, DeliveryChannel, DeliveryEngine, LocalSink, TokenBucket
+
+
+class FailingChannel(DeliveryChannel):
+    name = "sms"
+
+    def send_batch(self, messages):
+        raise ConnectionError("bramka niedostępna")
+
+
+def recipient(pesel, sms=False, email=False, push=False):
+    # (pesel, email, phone_number, pref_sms, pref_email, pref_push)
+    return pesel, f"{pesel}@example.com", f"+48{pesel}", sms, email, push
+
+
+def sinks():
+    return {name: LocalSink(name) for name in ("email", "sms", "push")}
+
+
+def test_channel_without_send_batch_cannot_be_created():
+    class Incomplete(DeliveryChannel):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_recipients_are_routed_by_preferences():
+    channels = sinks()
+    engine = DeliveryEngine(channels)
+
+    stats = engine.deliver([
+        recipient("1", sms=True),
+        recipient("2", email=True, push=True),
+        recipient("3"),
+        ("4", None, None, True, True, True),   # brak adresów - tylko push (po PESEL-u)
+    ], "treść", "temat")
+
+    assert [m.address for m in channels["sms"].messages] == ["+481"]
+    assert [m.address for m in channels["email"].messages] == ["2@example.com"]
+    assert sorted(m.traveler_pesel for m in channels["push"].messages) == ["2", "4"]
+    assert stats["push"] == {"sent": 2, "failed": 0, "batches": 1}
+
+
+def test_only_requested_channels_are_used():
+    channels = sinks()
+    stats = DeliveryEngine(channels).deliver([recipient("1", sms=True, push=True)], "treść", channels=("push",))
+
+    assert channels["sms"].messages == []
+    assert list(stats) == ["push"]
+
+
+def test_messages_are_sent_in_batches_of_configured_size():
+    channels = sinks()
+    engine = DeliveryEngine(channels, {"email": ChannelSettings(batch_size=10, concurrency=2)})
+
+    stats = engine.deliver((recipient(str(i), email=True) for i in range(25)), "treść")
+
+    assert channels["email"].batches == 3
+    assert len(channels["email"].messages) == 25
+    assert stats["email"] == {"sent": 25, "failed": 0, "batches": 3}
+
+
+def test_failed_batches_are_counted_per_channel():
+    channels = sinks()
+    channels["sms"] = FailingChannel()
+    engine = DeliveryEngine(channels, {"sms": ChannelSettings(batch_size=2)})
+
+    stats = engine.deliver([recipient(str(i), sms=True, push=True) for i in range(3)], "treść")
+
+    assert stats["sms"] == {"sent": 0, "failed": 3, "batches": 2}
+    assert stats["push"]["sent"] == 3
+
+
+def test_token_bucket_without_rate_never_blocks():
+    bucket = TokenBucket(0)
+    started = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire(100)
+    assert time.monotonic() - started < 0.5
+
+
+def test_token_bucket_limits_rate_after_burst():
+    bucket = TokenBucket(rate=100, capacity=10)
+    started = time.monotonic()
+    bucket.acquire(10)      # pełny kubełek - bez czekania
+    assert time.monotonic() - started < 0.05
+
+    bucket.acquire(10)      # 10 żetonów przy 100/s to ok. 0,1 s
+    assert time.monotonic() - started >= 0.09
+
+
+def test_token_bucket_caps_oversized_requests_at_capacity():
+    bucket = TokenBucket(rate=1000, capacity=5)
+    bucket.acquire(50)
+    assert bucket.tokens < 1
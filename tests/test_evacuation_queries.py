@@ -0,0 +1,75 @@
+import pytest
+from flask import Flask, g
+from app.cache.version_clock import version_clock
+from app.services.evacuation_service import EvacuationService
+from app.views import all_blueprints
+from tests.factories import add_evacuation, add_location
+
+
+def seed(db, evacuations):
+    # Każda ewakuacja w kilku miastach dwóch różnych krajów
+    for i in range(evacuations):
+        cities = [add_location(db, f"Kraj {i % 2 + j % 2}", f"Miasto {i}-{j}").city for j in range(3)]
+        add_evacuation(db, cities)
+    db.commit()
+    db.expire_all()
+
+
+@pytest.fixture
+def client(db):
+    # Szablony i pliki statyczne aplikacji, sesja testowa zamiast g.db z puli
+    flask_app = Flask("app")
+    for bp in all_blueprints:
+        flask_app.register_blueprint(bp)
+
+    @flask_app.before_request
+    def use_test_session():
+        g.db = db
+        version_clock.invalidate()
+        db.expire_all()
+
+    return flask_app.test_client()
+
+
+def test_get_all_evacuations_runs_constant_number_of_statements(db, count_statements):
+    seed(db, 2)
+    with count_statements() as small:
+        assert len(EvacuationService(db).get_all_evacuations()) == 2
+
+    seed(db, 40)
+    with count_statements() as large:
+        evacuations = EvacuationService(db).get_all_evacuations()
+
+    assert len(evacuations) == 42
+    assert all(len(e["cities"]) == 3 and e["countries"] for e in evacuations)
+    # ewakuacje, obszary, miasta, kraje
+    assert len(large) == len(small) == 4
+
+
+def test_get_evacuation_by_id_runs_constant_number_of_statements(db, count_statements):
+    seed(db, 30)
+    with count_statements() as statements:
+        evacuation = EvacuationService(db).get_evacuation_by_id(7)
+
+    assert len(evacuation["cities"]) == 3
+    assert len(statements) == 4
+
+
+# ewakuacje, obszary, miasta, kraje; /evacuation/all czyta też liczniki data_versions (warunkowy GET)
+@pytest.mark.parametrize("path, expected", [("/evacuation/all", 5), ("/evacuations", 4)])
+def test_evacuation_views_run_constant_number_of_statements(db, count_statements, client, path, expected):
+    seed(db, 2)
+    with count_statements() as small:
+        assert client.get(path).status_code == 200
+
+    seed(db, 40)
+    with count_statements() as large:
+        response = client.get(path)
+
+    assert response.status_code == 200
+    if path == "/evacuations":
+        # Widok HTML przy błędzie pokazuje dane przykładowe - sprawdzamy, że to ewakuacje z bazy
+        assert response.get_data(as_text=True).count("/edit") == 42
+    else:
+        assert len(response.get_json()) == 42
+    assert len(large) == len(small) == expected
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+import pytest
+from flask import Flask, g
+import app.views.http_cache as http_cache
+from app.cache.version_clock import version_clock
+from app.repositories.data_version_repository import DataVersionRepository
+from app.views.http_cache import conditional
+
+VERSION = "reference"
+
+
+@pytest.fixture
+def client(db):
+    flask_app = Flask(__name__)
+    calls = []
+
+    @flask_app.before_request
+    def use_test_session():
+        g.db = db
+        # Każde żądanie czyta liczniki z bazy, a nie z okna check_interval
+        version_clock.invalidate()
+
+    @flask_app.route("/reference")
+    @conditional(VERSION)
+    def reference():
+        calls.append("reference")
+        return {"items": []}
+
+    @flask_app.route("/active")
+    @conditional(VERSION, period=60)
+    def active():
+        calls.append("active")
+        return {"items": []}
+
+    client = flask_app.test_client()
+    client.calls = calls
+    DataVersionRepository(db).bump(VERSION)
+    db.commit()
+    return client
+
+
+def test_matching_etag_returns_304_without_calling_view(client, db):
+    first = client.get("/reference")
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    second = client.get("/reference", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.data == b""
+    assert client.calls == ["reference"]
+
+    DataVersionRepository(db).bump(VERSION)
+    db.commit()
+    third = client.get("/reference", headers={"If-None-Match": first.headers["ETag"]})
+    assert third.status_code == 200
+    assert third.headers["ETag"] != first.headers["ETag"]
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client):
+    first = client.get("/reference")
+    last_modified = first.headers["Last-Modified"]
+
+    assert client.get("/reference", headers={"If-Modified-Since": last_modified}).status_code == 304
+    # Nieaktualny ETag wygrywa z pasującą datą
+    stale = client.get("/reference", headers={"If-None-Match": '"stale"', "If-Modified-Since": last_modified})
+    assert stale.status_code == 200
+    # ...a pasujący ETag wygrywa z datą sprzed zmiany
+    fresh = client.get("/reference", headers={
+        "If-None-Match": first.headers["ETag"],
+        "If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"
+    })
+    assert fresh.status_code == 304
+
+
+def test_period_rollover_changes_validators(client, monkeypatch):
+    now = [600.0]
+    monkeypatch.setattr(http_cache, "time", SimpleNamespace(time=lambda: now[0]))
+
+    first = client.get("/active")
+    now[0] = 659.0
+    same_period = client.get("/active", headers={"If-None-Match": first.headers["ETag"]})
+    assert same_period.status_code == 304
+
+    now[0] = 660.0
+    next_period = client.get("/active", headers={"If-None-Match": first.headers["ETag"]})
+    assert next_period.status_code == 200
+    assert next_period.headers["ETag"] != first.headers["ETag"]
+    assert client.calls == ["active", "active"]
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from app.repositories.presence_repository import PresenceRepository
+from app.services.notification_service import NotificationService
+from tests.factories import add_location, add_traveler, add_trip
+
+
+def add_current_trip(db):
+    location = add_location(db, "Francja", "Paryż")
+    now = datetime.now()
+    add_trip(db, add_traveler(db, "90010112345"),
+             [(location, (now - timedelta(days=1)).isoformat(), (now + timedelta(days=1)).isoformat())])
+    db.commit()
+    return location.city_id
+
+
+def test_alert_reaches_travelers_before_projection_is_built(db):
+    # Etapy sprzed projekcji: traveler_presence jest pusta, a alert i tak musi dotrzeć
+    city_id = add_current_trip(db)
+
+    assert not PresenceRepository(db).is_complete()
+    assert NotificationService(db).fan_out_evacuation(city_id, "Powódź") == 1
+
+
+def test_rebuild_marks_projection_complete(db):
+    city_id = add_current_trip(db)
+    presence = PresenceRepository(db)
+
+    assert presence.rebuild() == 1
+    assert presence.is_complete()
+    assert NotificationService(db).fan_out_evacuation(city_id, "Powódź") == 1
+
+
+def test_projection_is_complete_only_after_rebuild(db):
+    presence = PresenceRepository(db)
+    assert not presence.is_complete()
+
+    presence.rebuild()
+    assert presence.is_complete()
@@ -0,0 +1,76 @@
+import app.views.app as views
+from app.cache.reference_cache import reference_cache
+from app.cache.stage_index import StageIndex
+from app.models import TripStatus
+from tests.factories import add_location, add_traveler, add_trip
+
+
+def seed(db):
+    paris = add_location(db, "Francja", "Paryż")
+    lyon = add_location(db, "Francja", "Lyon")
+    rome = add_location(db, "Włochy", "Rzym")
+    for i in range(120):
+        stages = [(paris if i % 2 else rome, "2030-01-01", "2030-01-05")]
+        if i % 3 == 0:
+            stages.append((lyon, "2030-02-01", "2030-02-03"))
+        status = TripStatus.IN_PROGRESS if i % 4 == 0 else TripStatus.PLANNED
+        add_trip(db, add_traveler(db, f"9001011{i:04d}"), stages, status=status)
+    db.commit()
+    reference_cache.invalidate()
+
+
+def all_pages(db, *filters):
+    ids, after_id, summaries = [], None, []
+    while True:
+        rows, after_id, summary = views.get_report_page(db, *filters, after_id=after_id)
+        ids += [row["id"] for row in rows]
+        summaries.append(summary)
+        if after_id is None:
+            return ids, summaries
+
+
+def test_index_report_pages_match_sql(db, monkeypatch):
+    seed(db)
+    filters = [("Francja", "2030-01-02", "2030-01-03", ""), ("", "", "", "PLANNED"), ("Wło", "", "", "")]
+    expected = [all_pages(db, *f) for f in filters]
+
+    index = StageIndex()
+    index.enabled = True
+    index.load(db)
+    monkeypatch.setattr(views, "stage_index", index)
+
+    for f, (ids, summaries) in zip(filters, expected):
+        index_ids, index_summaries = all_pages(db, *f)
+        assert index_ids == ids
+        for summary, index_summary in zip(summaries, index_summaries):
+            assert index_summary["total"] == summary["total"]
+            assert index_summary["by_status"] == summary["by_status"]
+            assert dict(index_summary["by_country"]) == dict(summary["by_country"])
+
+
+def test_index_report_page_skips_sql_matching(db, monkeypatch):
+    seed(db)
+    index = StageIndex()
+    index.enabled = True
+    index.load(db)
+    monkeypatch.setattr(views, "stage_index", index)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("dopasowanie SQL przy włączonym indeksie")
+    monkeypatch.setattr(views.ReportRepository, "select_matching_trip_ids", fail)
+
+    rows, after_id, summary = views.get_report_page(db, "Francja", "", "", "")
+    assert len(rows) == views.REPORT_PAGE_SIZE and summary["total"] == 80
+
+
+def test_csv_rows_stream_from_sql_even_with_index(db, monkeypatch):
+    seed(db)
+    index = StageIndex()
+    index.enabled = True
+    index.load(db)
+    monkeypatch.setattr(views, "stage_index", index)
+    monkeypatch.setattr(index, "overlapping", lambda *a, **k: (_ for _ in ()).throw(AssertionError()))
+
+    rows = list(views.iter_report_rows(db, "Francja", "", "", ""))
+    assert len(rows) == 80
+    assert [row.id for row in rows] == sorted((row.id for row in rows), reverse=True)
@@ -0,0 +1,91 @@
+import random
+from datetime import datetime, timedelta
+from app.cache.stage_index import StageIndex, StageEntry, _Bucket
+from app.models import Stage
+from app.repositories.data_version_repository import DataVersionRepository
+from app.services.stage_projections import StageProjections
+from tests.factories import add_location, add_traveler, add_trip
+
+BASE = datetime(2030, 1, 1)
+
+
+def entry(stage_id, start_day, days):
+    start = BASE + timedelta(days=start_day)
+    return StageEntry(stage_id, stage_id, "p", 1, 1, None, start, start + timedelta(days=days))
+
+
+def test_bucket_changes_do_not_rebuild_tree_and_match_brute_force():
+    rng = random.Random(7)
+    bucket = _Bucket()
+    current = {}
+    for stage_id in range(1000):
+        current[stage_id] = entry(stage_id, rng.randrange(365), rng.randrange(30))
+        bucket.add(current[stage_id])
+    bucket.overlap(BASE, BASE)
+    tree = bucket.tree
+
+    for _ in range(50):
+        stage_id = rng.randrange(1200)
+        if stage_id in current and rng.random() < 0.5:
+            bucket.remove(stage_id)
+            del current[stage_id]
+        else:
+            current[stage_id] = entry(stage_id, rng.randrange(365), rng.randrange(30))
+            bucket.add(current[stage_id])
+
+        lo = BASE + timedelta(days=rng.randrange(365))
+        hi = lo + timedelta(days=rng.randrange(10))
+        expected = {e.stage_id for e in current.values() if e.start_date <= hi and e.end_date >= lo}
+        found = [e.stage_id for e in bucket.overlap(lo, hi)]
+        assert sorted(found) == sorted(expected)
+
+    assert bucket.tree is tree
+
+
+def save_stage(db, trip, location, start, end):
+    stage = Stage(trip_id=trip.id, location_id=location.id, start_date=start, end_date=end)
+    db.add(stage)
+    db.flush()
+    projections = StageProjections(db)
+    projections.stages_saved([stage.id])
+    projections.commit()
+    return stage
+
+
+def test_changes_from_other_process_are_read_from_change_log(db):
+    location = add_location(db, "Francja", "Paryż")
+    trip = add_trip(db, add_traveler(db, "90010112345"), [])
+    db.commit()
+    index = StageIndex()
+    index.enabled = True
+    index.load(db)
+
+    stage = save_stage(db, trip, location, BASE, BASE + timedelta(days=3))
+
+    found = index.overlapping(db, BASE, BASE, city_ids=[location.city_id])
+    assert [e.stage_id for e in found] == [stage.id]
+    assert (index.reloads, index.refreshes) == (1, 1)
+
+    db.delete(stage)
+    projections = StageProjections(db)
+    projections.stages_deleted([stage.id])
+    projections.commit()
+
+    assert index.overlapping(db, BASE, BASE, city_ids=[location.city_id]) == []
+    assert (index.reloads, index.refreshes) == (1, 2)
+
+
+def test_gap_in_change_log_reloads_index(db):
+    location = add_location(db, "Francja", "Paryż")
+    trip = add_trip(db, add_traveler(db, "90010112345"), [])
+    db.commit()
+    index = StageIndex()
+    index.load(db)
+
+    # Zapis z pominięciem dziennika (np. sprzed migracji)
+    DataVersionRepository(db).bump("stages")
+    db.commit()
+    save_stage(db, trip, location, BASE, BASE + timedelta(days=3))
+
+    assert len(index.overlapping(db, BASE, BASE)) == 1
+    assert index.reloads == 2
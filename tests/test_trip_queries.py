@@ -0,0 +1,44 @@
+from app.services.trip_service import TripService
+from tests.factories import add_companion, add_location, add_traveler, add_trip
+
+
+def seed(db, traveler, trips, first_id):
+    location = add_location(db, "Francja", f"Paryż {first_id}")
+    for i in range(first_id, first_id + trips):
+        trip = add_trip(db, traveler, [(location, "2030-01-01", "2030-01-03"),
+                                       (location, "2030-01-04", "2030-01-06")])
+        add_companion(db, trip, f"8001011{i:04d}")
+    db.commit()
+    db.expire_all()
+
+
+def test_get_all_trips_runs_constant_number_of_statements(db, count_statements):
+    traveler = add_traveler(db, "90010112345")
+    seed(db, traveler, 2, 0)
+    with count_statements() as small:
+        assert len(TripService(db).get_all_trips()) == 2
+
+    seed(db, traveler, 50, 2)
+    with count_statements() as large:
+        trips = TripService(db).get_all_trips()
+
+    assert len(trips) == 52
+    assert all(len(t["stages"]) == 2 and len(t["companions"]) == 1 for t in trips)
+    # podróże, etapy, companioni - zamiast 2N + 1
+    assert len(large) == len(small) == 3
+
+
+def test_trips_by_traveler_run_constant_number_of_statements(db, count_statements):
+    traveler = add_traveler(db, "90010112345")
+    seed(db, traveler, 2, 0)
+    with count_statements() as small:
+        TripService(db).get_trips_by_traveler_pesel("90010112345")
+
+    seed(db, traveler, 50, 2)
+    with count_statements() as large:
+        result = TripService(db).get_trips_by_traveler_pesel("90010112345")
+
+    assert len(result["trips"]) == 52
+    assert all(len(t["stages"]) == 2 and len(t["companions"]) == 1 for t in result["trips"])
+    # podróżny, podróże, etapy, companioni
+    assert len(large) == len(small) == 4
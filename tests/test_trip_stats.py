@@ -0,0 +1,130 @@
+from datetime import date
+from app.models import TripStat, TripStatus
+from app.repositories.trip_stats_repository import TripStatsRepository, SCOPE_CITY, SCOPE_COUNTRY
+from app.services.stage_projections import StageProjections
+from app.services.stage_service import StageService
+from app.services.trip_service import TripService
+from tests.factories import add_location, add_traveler, add_trip
+
+
+def cube(db):
+    return sorted(
+        (stat.scope, stat.scope_id, stat.day, stat.status.value, stat.trips, stat.travelers)
+        for stat in db.query(TripStat)
+    )
+
+
+def cell(db, scope, scope_id, day):
+    stat = db.query(TripStat).filter_by(scope=scope, scope_id=scope_id, day=day, status=TripStatus.PLANNED).first()
+    return (stat.trips, stat.travelers) if stat else (0, 0)
+
+
+def save_trips(db, *trips):
+    projections = StageProjections(db)
+    for trip in trips:
+        projections.trip_saved(trip.id)
+    projections.commit()
+
+
+def assert_matches_rebuild(db):
+    maintained = cube(db)
+    TripStatsRepository(db).rebuild()
+    assert maintained == cube(db)
+    db.rollback()
+
+
+def test_delete_trip_removes_it_from_cube(db):
+    paris = add_location(db, "Francja", "Paryż")
+    lyon = add_location(db, "Francja", "Lyon")
+    first = add_trip(db, add_traveler(db, "1"), [(paris, "2026-10-20T10:00", "2026-10-23T12:00")])
+    second = add_trip(db, add_traveler(db, "2"), [(lyon, "2026-10-22T08:00", "2026-10-25T18:00")])
+    save_trips(db, first, second)
+    france = paris.city.country_id
+    assert cell(db, SCOPE_COUNTRY, france, date(2026, 10, 22)) == (2, 2)
+
+    TripService(db).delete_trip(second.id)
+
+    assert cell(db, SCOPE_COUNTRY, france, date(2026, 10, 22)) == (1, 1)
+    assert cell(db, SCOPE_CITY, lyon.city_id, date(2026, 10, 22)) == (0, 0)
+    assert_matches_rebuild(db)
+
+
+def test_delete_only_stage_empties_city_cells(db):
+    krakow = add_location(db, "Polska", "Kraków")
+    trip = add_trip(db, add_traveler(db, "1"), [(krakow, "2026-10-01T00:00", "2026-10-03T00:00")])
+    save_trips(db, trip)
+    assert cell(db, SCOPE_CITY, krakow.city_id, date(2026, 10, 2)) == (1, 1)
+
+    StageService(db).delete_stage(trip.stages[0].id)
+
+    assert cell(db, SCOPE_CITY, krakow.city_id, date(2026, 10, 2)) == (0, 0)
+    assert cube(db) == []
+
+
+def test_deltas_match_rebuild_for_long_overlapping_stages(db):
+    berlin = add_location(db, "Niemcy", "Berlin")
+    munich = add_location(db, "Niemcy", "Monachium")
+    traveler = add_traveler(db, "1")
+    # Etap dłuższy niż paczka dni przeliczenia i dwa etapy tej samej podróży w jednym dniu
+    long_trip = add_trip(db, traveler, [(berlin, "2026-01-01T00:00", "2026-12-31T23:00")])
+    short_trip = add_trip(db, traveler, [
+        (berlin, "2026-06-01T08:00", "2026-06-01T12:00"),
+        (munich, "2026-06-01T15:00", "2026-06-03T09:00")
+    ], status=TripStatus.IN_PROGRESS)
+    save_trips(db, long_trip, short_trip)
+
+    assert cell(db, SCOPE_CITY, berlin.city_id, date(2026, 12, 31)) == (1, 1)
+    assert_matches_rebuild(db)
+
+
+def test_traveler_with_two_trips_is_counted_once_until_both_are_gone(db):
+    paris = add_location(db, "Francja", "Paryż")
+    traveler = add_traveler(db, "1")
+    first = add_trip(db, traveler, [(paris, "2026-10-20T10:00", "2026-10-23T12:00")])
+    second = add_trip(db, traveler, [(paris, "2026-10-22T08:00", "2026-10-25T18:00")])
+    save_trips(db, first, second)
+    assert cell(db, SCOPE_CITY, paris.city_id, date(2026, 10, 22)) == (2, 1)
+
+    TripService(db).delete_trip(first.id)
+    assert cell(db, SCOPE_CITY, paris.city_id, date(2026, 10, 22)) == (1, 1)
+    assert cell(db, SCOPE_CITY, paris.city_id, date(2026, 10, 20)) == (0, 0)
+
+    TripService(db).delete_trip(second.id)
+    assert cube(db) == []
+
+
+def test_trip_status_and_traveler_change_move_cells(db):
+    paris = add_location(db, "Francja", "Paryż")
+    first, second = add_traveler(db, "1"), add_traveler(db, "2")
+    kept = add_trip(db, first, [(paris, "2026-10-20T10:00", "2026-10-21T12:00")])
+    moved = add_trip(db, first, [(paris, "2026-10-21T08:00", "2026-10-22T18:00")])
+    save_trips(db, kept, moved)
+
+    TripService(db).update_trip(moved.id, {"traveler_pesel": "2"})
+    assert cell(db, SCOPE_CITY, paris.city_id, date(2026, 10, 21)) == (2, 2)
+    assert_matches_rebuild(db)
+
+    TripService(db).update_trip(moved.id, {"status": TripStatus.IN_PROGRESS.value})
+    assert cell(db, SCOPE_CITY, paris.city_id, date(2026, 10, 21)) == (1, 1)
+    assert_matches_rebuild(db)
+
+
+def test_moving_stage_to_other_city_and_dates(db):
+    paris = add_location(db, "Francja", "Paryż")
+    lyon = add_location(db, "Francja", "Lyon")
+    trip = add_trip(db, add_traveler(db, "1"), [
+        (paris, "2026-10-20T10:00", "2026-10-22T12:00"),
+        (paris, "2026-10-22T14:00", "2026-10-24T12:00")
+    ])
+    other = add_trip(db, add_traveler(db, "2"), [(lyon, "2026-10-23T00:00", "2026-10-23T23:00")])
+    save_trips(db, trip, other)
+
+    StageService(db).update_stage(trip.stages[1].id, {
+        "location_id": lyon.id, "start_date": "2026-10-23T08:00", "end_date": "2026-10-25T12:00"
+    })
+
+    assert cell(db, SCOPE_CITY, paris.city_id, date(2026, 10, 22)) == (1, 1)
+    assert cell(db, SCOPE_CITY, paris.city_id, date(2026, 10, 23)) == (0, 0)
+    assert cell(db, SCOPE_CITY, lyon.city_id, date(2026, 10, 23)) == (2, 2)
+    assert cell(db, SCOPE_COUNTRY, paris.city.country_id, date(2026, 10, 24)) == (1, 1)
+    assert_matches_rebuild(db)
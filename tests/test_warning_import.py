@@ -0,0 +1,34 @@
+from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+from app.models import ConsularWarning
+from app.services.warning_service import WarningService
+
+
+def write_feed(path, external_ids):
+    items = "".join(
+        "<warning>"
+        f"<idZewnetrzne>{ext_id}</idZewnetrzne><nazwa>Ostrzeżenie {ext_id}</nazwa>"
+        f"<tresc>Treść {ext_id}</tresc><typ>Pogodowe</typ><poziomZagrozenia>HIGH</poziomZagrozenia>"
+        "<dataWaznosci>2030-01-01</dataWaznosci>"
+        "</warning>"
+        for ext_id in external_ids
+    )
+    path.write_text(f"<warnings>{items}</warnings>", encoding="utf-8")
+    return str(path)
+
+
+def test_expired_warning_returning_unchanged_is_reactivated(engine, db, tmp_path):
+    service = WarningService(sessionmaker(bind=engine, autoflush=False))
+    feed = tmp_path / "feed.xml"
+
+    service.run_import_cycle(write_feed(feed, ["A", "B"]), source="feed", notify=False)
+    second = service.run_import_cycle(write_feed(feed, ["A"]), source="feed", notify=False)
+    assert second["expired"] == 1
+
+    third = service.run_import_cycle(write_feed(feed, ["A", "B"]), source="feed", notify=False)
+
+    assert third["updated"] == 1
+    assert third["unchanged"] == 1
+    warning = db.query(ConsularWarning).filter_by(external_id="B").one()
+    assert warning.expiry_date == datetime(2030, 1, 1)
+    assert warning.content_hash is not None
@@ -0,0 +1,64 @@
+from datetime import datetime
+from app.delivery import DeliveryEngine, LocalSink
+from app.models import ConsularWarning, Notification, ThreatLevel, TripStatus, WarningNotification
+from app.services.notification_service import NotificationService
+from tests.factories import add_location, add_traveler, add_trip
+
+
+def add_warning(db, location, threat_level=ThreatLevel.MEDIUM):
+    warning = ConsularWarning(external_id="W1", name="Powódź", content="Treść", warning_type="Pogodowe",
+                              threat_level=threat_level, expiry_date=datetime(2099, 1, 1))
+    warning.locations.append(location)
+    db.add(warning)
+    db.commit()
+    return warning
+
+
+def notify(db, warning):
+    push = LocalSink("push")
+    service = NotificationService(db, delivery_engine=DeliveryEngine({"push": push}))
+    count = service.notify_warning_matches([warning.id])
+    db.commit()
+    service.deliver_pending()
+    return count, [m.body for m in push.messages]
+
+
+def seed(db, stages_at_location=1):
+    location = add_location(db, "Francja", "Paryż")
+    add_trip(db, add_traveler(db, "90010112345"),
+             [(location, "2099-01-01", "2099-01-03")] * stages_at_location,
+             status=TripStatus.PLANNED)
+    return location
+
+
+def test_reimport_at_same_level_notifies_nobody(db):
+    warning = add_warning(db, seed(db))
+
+    assert notify(db, warning) == (1, ["Ostrzeżenie konsularne (MEDIUM): Powódź"])
+    assert notify(db, warning) == (0, [])
+    assert db.query(Notification).count() == 1
+
+
+def test_escalation_notifies_again(db):
+    warning = add_warning(db, seed(db))
+    notify(db, warning)
+
+    warning.threat_level = ThreatLevel.HIGH
+    db.commit()
+    assert notify(db, warning) == (1, ["Ostrzeżenie konsularne (HIGH): Powódź"])
+
+    # Obniżenie poziomu to nie eskalacja
+    warning.threat_level = ThreatLevel.LOW
+    db.commit()
+    assert notify(db, warning) == (0, [])
+
+    messages = [n.message for n in db.query(Notification).order_by(Notification.id)]
+    assert messages == ["Ostrzeżenie konsularne (MEDIUM): Powódź", "Ostrzeżenie konsularne (HIGH): Powódź"]
+
+
+def test_several_stages_at_one_location_give_one_notification(db):
+    warning = add_warning(db, seed(db, stages_at_location=3))
+
+    assert notify(db, warning) == (1, ["Ostrzeżenie konsularne (MEDIUM): Powódź"])
+    assert db.query(Notification).count() == 1
+    assert db.query(WarningNotification).count() == 1
@@ -0,0 +1,116 @@
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.models import SchedulerLease, WarningFeed
+from app.services.warning_service import WarningService
+from app.services.warning_sync import LEASE_NAME, STATUS_FAILED, STATUS_IMPORTED, STATUS_UNCHANGED, WarningSync
+from tests.test_warning_import import write_feed
+
+
+def make_sync(engine, holder, lease_seconds=60.0):
+    sync = WarningSync()
+    sync.session_factory = sessionmaker(bind=engine, autoflush=False)
+    sync.holder = holder
+    sync.interval = 10.0
+    sync.jitter = 0
+    sync.max_backoff = 50.0
+    sync.lease_seconds = lease_seconds
+    return sync
+
+
+@pytest.fixture
+def no_notify(monkeypatch):
+    # Dopasowanie podróżnych (kolejka alertów) nie jest częścią tych testów
+    original = WarningService.run_import_cycle
+    monkeypatch.setattr(WarningService, "run_import_cycle",
+                        lambda self, path, **kwargs: original(self, path, notify=False, **kwargs))
+
+
+def expire_lease(db):
+    db.query(SchedulerLease).filter_by(name=LEASE_NAME).update({"expires_at": datetime.now() - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_only_one_process_holds_the_lease_until_it_expires(engine, db):
+    first, second = make_sync(engine, "first"), make_sync(engine, "second")
+
+    assert first._acquire()
+    assert not second._acquire()
+    assert first._acquire()
+
+    expire_lease(db)
+    assert second._acquire()
+    assert not first._acquire()
+
+
+def test_failures_back_off_exponentially_up_to_limit(engine, db, tmp_path):
+    sync = make_sync(engine, "first")
+    missing = str(tmp_path / "missing.xml")
+
+    delays = []
+    for _ in range(4):
+        run = sync.run_feed(missing)
+        assert run["status"] == STATUS_FAILED
+        db.expire_all()
+        feed = db.get(WarningFeed, missing)
+        delays.append(round((feed.next_run_at - feed.last_run_at).total_seconds()))
+
+    assert delays == [20, 40, 50, 50]
+    assert feed.consecutive_failures == 4
+    assert not sync._due(missing)
+
+
+def test_unchanged_feed_is_skipped_by_mtime_then_checksum(engine, tmp_path, no_notify):
+    sync = make_sync(engine, "first")
+    path = write_feed(tmp_path / "feed.xml", ["A"])
+
+    assert sync.run_feed(path)["status"] == STATUS_IMPORTED
+    run = sync.run_feed(path)
+    assert (run["status"], run["unchanged_by"]) == (STATUS_UNCHANGED, "mtime")
+
+    # Ta sama treść, nowy czas modyfikacji
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    run = sync.run_feed(path)
+    assert (run["status"], run["unchanged_by"]) == (STATUS_UNCHANGED, "checksum")
+
+    write_feed(tmp_path / "feed.xml", ["A", "B"])
+    assert sync.run_feed(path)["status"] == STATUS_IMPORTED
+
+
+def test_lease_is_renewed_during_long_import(engine, tmp_path, monkeypatch):
+    leader, other = make_sync(engine, "leader", lease_seconds=0.3), make_sync(engine, "other", lease_seconds=0.3)
+    path = write_feed(tmp_path / "feed.xml", ["A"])
+    attempts = []
+
+    def slow_import(self, xml_path, **kwargs):
+        time.sleep(0.5)
+        attempts.append(other._acquire())
+        return {}
+    monkeypatch.setattr(WarningService, "run_import_cycle", slow_import)
+
+    assert leader._acquire()
+    run = leader.run_feed(path)
+
+    assert attempts == [False]
+    assert run["status"] == STATUS_IMPORTED and "lease_lost" not in run
+
+
+def test_feed_state_is_not_recorded_after_lease_was_taken_over(engine, db, tmp_path, monkeypatch):
+    leader, other = make_sync(engine, "leader"), make_sync(engine, "other")
+    path = write_feed(tmp_path / "feed.xml", ["A"])
+
+    def taken_over(self, xml_path, **kwargs):
+        expire_lease(db)
+        assert other._acquire()
+        return {}
+    monkeypatch.setattr(WarningService, "run_import_cycle", taken_over)
+
+    assert leader._acquire()
+    run = leader.run_feed(path)
+
+    assert run["lease_lost"]
+    db.expire_all()
+    assert db.get(WarningFeed, path).checksum is None